@@ -1,5 +1,4 @@
 import tkinter as tk
-import requests
 import logging
 from logging.handlers import RotatingFileHandler
 from tkinter import simpledialog, messagebox, scrolledtext, filedialog
@@ -11,7 +10,6 @@ import os
 import datetime
 import webbrowser
 import psutil
-import wikipedia
 import pyautogui
 import time
 import sys
@@ -19,23 +17,36 @@ import subprocess
 import platform
 import urllib.parse
 import re
-import pyttsx3  # Add pyttsx3 for offline TTS
 import smtplib
 from email.mime.text import MIMEText
 import random  # Add random for conversational enhancements
 # Modern UI: Requires 'pip install customtkinter'
 import customtkinter as ctk
-import queue
-import glob
+import contextvars
 import json
 import shutil
 import math
 from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as wait_futures
 from features.web_automation import YouTubeAutomation, BrowserController, SystemLauncher
-try:
-    from serpapi import GoogleSearch  # Optional dependency
-except Exception:
-    GoogleSearch = None
+from core.intent_router import IntentRouter
+from core.streaming import SentenceBuffer
+from core.llm_cache import ResponseCache
+from core.http_client import get_client, turn_deadline
+from core.pipeline import CommandPipeline, Stage, current_job
+from core.audio_frontend import VADMicrophone
+from core.kws import MfccDtwSpotter
+from core.interfaces import STTError
+from core.stt.router import STTRouter
+from core.speculative import SpeculativeDispatcher
+from core.tts import get_tts_service
+from core.conversation_store import ConversationStore
+from core.profile_store import ProfileStore
+from core.camera import get_camera_service
+from config.settings import (
+    CACHE_DIR, CONVERSATION_CONFIG, CV_CONFIG, HTTP_CONFIG, KWS_CONFIG, LLM_CACHE_CONFIG, PROFILE_CONFIG,
+    STT_CONFIG
+)
 
 # Camera and AI Vision imports
 try:
@@ -594,6 +605,8 @@ class EnhancedChatBubble(ctk.CTkFrame):
             text_color=colors["accent"] if sender.lower() in ["assistant", "jarvis", "sam"] else text_color
         )
         sender_label.pack(side="left")
+        self._sender_label = sender_label
+        self._time_label = None
         
         # Timestamp with modern styling
         if timestamp:
@@ -610,15 +623,53 @@ class EnhancedChatBubble(ctk.CTkFrame):
                 font=("Segoe UI", 10),
             )
             time_label.pack()
+            self._time_label = time_label
         
         # Enhanced message text with code highlighting
+        self._msg_frame = msg_frame
+        self._colors = colors
+        self._text_color = text_color
+        self._anchor = anchor
+        self._message_widgets = []
+        self.message = message
+        self._render_message(message)
+        
+        # Pack the bubble with enhanced spacing
+        self.kind = self.kind_of(sender)
+        self.pack_options = {"fill": "x", "padx": padx, "pady": 8}
+        self.pack(**self.pack_options)
+        
+        # Add entrance animation
+        self.animate_entrance()
+
+    @staticmethod
+    def kind_of(sender):
+        """Bubbles of the same kind share a layout and can be reused for each other."""
+        sender = sender.lower()
+        if sender == "user":
+            return "user"
+        if sender in ["assistant", "jarvis", "sam"]:
+            return "assistant"
+        return "system"
+
+    def rebind(self, message, sender, timestamp=None):
+        """Reuse this bubble for another message of the same kind."""
+        if self.kind == "system":
+            self._sender_label.configure(text=sender.title())
+        if self._time_label is not None and timestamp:
+            self._time_label.configure(text=f"⏰ {timestamp}")
+        self.update_message(message)
+    
+    def _render_message(self, message):
+        """Create the text and code widgets for a message."""
+        colors = self._colors
         message_parts = self._parse_message(message, colors)
         
         for part in message_parts:
             if part["type"] == "code":
                 # Modern code block styling
                 code_frame = ctk.CTkFrame(
-                    msg_frame, 
+                    self._msg_frame, 
                     fg_color=colors["card"], 
                     corner_radius=12,
                     border_width=1,
@@ -635,23 +686,34 @@ class EnhancedChatBubble(ctk.CTkFrame):
                     justify="left"
                 )
                 code_label.pack(padx=16, pady=12)
+                self._message_widgets.append(code_frame)
             else:
                 # Regular text with enhanced formatting
                 text_label = ctk.CTkLabel(
-                    msg_frame,
+                    self._msg_frame,
                     text=part["content"],
-                    text_color=text_color,
+                    text_color=self._text_color,
                     font=("Segoe UI", 13),
                     wraplength=450,
                     justify="left"
                 )
-                text_label.pack(anchor=anchor, fill="x", pady=2)
-        
-        # Pack the bubble with enhanced spacing
-        self.pack(fill="x", padx=padx, pady=8)
-        
-        # Add entrance animation
-        self.animate_entrance()
+                text_label.pack(anchor=self._anchor, fill="x", pady=2)
+                self._message_widgets.append(text_label)
+    
+    def update_message(self, message):
+        """Replace the bubble text in place, e.g. while a reply streams in."""
+        if message == self.message:
+            return
+        self.message = message
+        # Plain text growing inside a single label only needs a configure
+        if (len(self._message_widgets) == 1 and isinstance(self._message_widgets[0], ctk.CTkLabel)
+                and '`' not in message):
+            self._message_widgets[0].configure(text=message)
+            return
+        for widget in self._message_widgets:
+            widget.destroy()
+        self._message_widgets = []
+        self._render_message(message)
     
     def _parse_message(self, message, colors):
         """Parse message for code blocks and special formatting."""
@@ -711,6 +773,212 @@ class EnhancedChatBubble(ctk.CTkFrame):
         self.original_fg_color = self.cget("fg_color")
         fade_in()
 
+class VirtualChatView:
+    """Chat history that keeps only a window of messages as live widgets.
+
+    Every message is kept as plain data, but at most ``max_live`` of them
+    are materialized as EnhancedChatBubble widgets, so a long session does
+    not accumulate thousands of frames. Bubbles leaving the window go to a
+    small pool per bubble kind and are refilled for the next message
+    instead of being destroyed and rebuilt. Appends and updates made
+    within one frame are applied in a single layout pass followed by one
+    scroll. Older messages are paged back in on request; once the start of
+    this session is reached, ``load_earlier(limit)`` is asked for up to
+    ``limit`` (sender, message, timestamp) tuples from before it, oldest
+    first.
+    """
+
+    def __init__(self, scrollable, max_live=40, page_size=20, pool_size=8, frame_ms=16, load_earlier=None):
+        self.scrollable = scrollable
+        self.canvas = scrollable._parent_canvas
+        self.max_live = max_live
+        self.page_size = page_size
+        self.pool_size = pool_size
+        self.frame_ms = frame_ms
+        self.load_earlier = load_earlier
+        colors = THEMES["copilot_dark"]
+
+        self.body = ctk.CTkFrame(scrollable, fg_color="transparent")
+        self.body.pack(fill="x")
+        self.earlier_btn = ctk.CTkButton(
+            self.body, text="", command=self.show_earlier, fg_color="transparent",
+            text_color=colors["accent"], hover_color=colors["card"], height=28
+        )
+        self.latest_btn = ctk.CTkButton(
+            self.body, text="⬇ Back to latest", command=self.jump_to_latest, fg_color="transparent",
+            text_color=colors["accent"], hover_color=colors["card"], height=28
+        )
+
+        self._messages = []       # [sender, message, timestamp]
+        self._live = {}           # message index -> bubble, for indices in [start, end)
+        self._start = self._end = 0
+        self._following = True    # window ends at the newest message
+        self._pool = {"user": [], "assistant": [], "system": []}
+        self._dirty = set()
+        self._appended = False
+        self._flush_id = None
+        self._loaded = 0          # messages prepended from stored history
+        self._first_handle = 0    # handle of the first message of this session since clear()
+        self._history_done = load_earlier is None
+
+    def __len__(self):
+        return len(self._messages)
+
+    # ----- updates (coalesced) -----
+
+    def append(self, sender, message, timestamp=None):
+        """Add a message; returns a handle for later ``update`` calls."""
+        self._messages.append([sender, message, timestamp])
+        self._appended = True
+        self._schedule()
+        # Handles stay valid when stored history is prepended, and are never
+        # reused after clear(), so a late update cannot hit a newer message
+        return self._first_handle + len(self._messages) - 1 - self._loaded
+
+    def update(self, index, message):
+        """Replace the text of a message, e.g. while a reply streams in.
+
+        Updates for messages removed by ``clear`` are ignored.
+        """
+        index += self._loaded - self._first_handle
+        if not self._loaded <= index < len(self._messages):
+            return
+        self._messages[index][1] = message
+        self._dirty.add(index)
+        self._schedule()
+
+    def _schedule(self):
+        if self._flush_id is None:
+            self._flush_id = self.body.after(self.frame_ms, self._flush)
+
+    def _flush(self):
+        self._flush_id = None
+        at_bottom = self.canvas.yview()[1] >= 0.999
+        appended, self._appended = self._appended, False
+        dirty, self._dirty = self._dirty, set()
+        if appended:
+            if self._following:
+                # Trim first so the new bubbles can reuse the released ones,
+                # and skip messages a large batch would push straight out
+                end = len(self._messages)
+                start = max(self._start, end - self.max_live)
+                for index in range(self._start, min(start, self._end)):
+                    self._release(index)
+                for index in range(max(start, self._end), end):
+                    self._materialize(index)
+                self._start, self._end = start, end
+            else:
+                self.jump_to_latest(scroll=False)
+        for index in dirty:
+            bubble = self._live.get(index)
+            if bubble is not None:
+                bubble.update_message(self._messages[index][1])
+        self._update_buttons()
+        if appended or at_bottom:
+            self.canvas.yview_moveto(1.0)
+
+    # ----- materialization -----
+
+    def _materialize(self, index, before=None):
+        sender, message, timestamp = self._messages[index]
+        pool = self._pool[EnhancedChatBubble.kind_of(sender)]
+        if pool:
+            bubble = pool.pop()
+            bubble.rebind(message, sender, timestamp)
+        else:
+            bubble = EnhancedChatBubble(self.body, message=message, sender=sender, timestamp=timestamp)
+            bubble.pack_forget()
+        if before is not None:
+            bubble.pack(before=before, **bubble.pack_options)
+        else:
+            bubble.pack(**bubble.pack_options)
+        self._live[index] = bubble
+        return bubble
+
+    def _release(self, index):
+        bubble = self._live.pop(index)
+        bubble.pack_forget()
+        pool = self._pool[bubble.kind]
+        if len(pool) < self.pool_size:
+            pool.append(bubble)
+        else:
+            bubble.destroy()
+
+    def _update_buttons(self):
+        self.earlier_btn.pack_forget()
+        self.latest_btn.pack_forget()
+        first = self._live.get(self._start)
+        if self._start > 0 or not self._history_done:
+            count = f" ({self._start})" if self._start else ""
+            self.earlier_btn.configure(text=f"⬆ Show earlier messages{count}")
+            if first is not None:
+                self.earlier_btn.pack(before=first, pady=(4, 0))
+            else:
+                self.earlier_btn.pack(pady=(4, 0))
+        if not self._following:
+            self.latest_btn.pack(pady=(0, 4))
+
+    # ----- navigation -----
+
+    def show_earlier(self):
+        """Page the previous ``page_size`` messages in above the window."""
+        if self._start == 0 and not self._prepend_history():
+            return
+        new_start = max(0, self._start - min(self.page_size, self.max_live))
+        first = self._live.get(self._start)
+        for index in range(new_start, self._start):
+            self._materialize(index, before=first)
+        self._start = new_start
+        while self._end - self._start > self.max_live:
+            self._end -= 1
+            self._release(self._end)
+            self._following = False
+        self._update_buttons()
+        self.canvas.yview_moveto(0.0)
+
+    def _prepend_history(self):
+        if self._history_done:
+            return False
+        older = self.load_earlier(self.page_size)
+        if len(older) < self.page_size:
+            self._history_done = True
+        if not older:
+            self._update_buttons()
+            return False
+        count = len(older)
+        self._messages[:0] = [list(message) for message in older]
+        self._loaded += count
+        self._live = {index + count: bubble for index, bubble in self._live.items()}
+        self._dirty = {index + count for index in self._dirty}
+        self._start += count
+        self._end += count
+        return True
+
+    def jump_to_latest(self, scroll=True):
+        """Show the newest ``max_live`` messages again."""
+        for index in list(self._live):
+            self._release(index)
+        self._end = len(self._messages)
+        self._start = max(0, self._end - self.max_live)
+        for index in range(self._start, self._end):
+            self._materialize(index)
+        self._following = True
+        self._update_buttons()
+        if scroll:
+            self.canvas.yview_moveto(1.0)
+
+    def clear(self):
+        for index in list(self._live):
+            self._release(index)
+        self._first_handle += len(self._messages) - self._loaded
+        self._messages.clear()
+        self._dirty.clear()
+        self._loaded = 0
+        self._history_done = self.load_earlier is None
+        self._start = self._end = 0
+        self._following = True
+        self._update_buttons()
+
 class VoiceVisualizer(ctk.CTkFrame):
     """Voice activity visualizer with animated bars."""
     
@@ -1240,7 +1508,7 @@ class NaturalLanguageNavigator:
             "'show desktop' -> {\"action\": \"show_desktop\"}. "
             f"User: {text}"
         )
-        raw = self.assistant.mistral_chat(prompt)
+        raw = self.assistant.mistral_chat(prompt, intent="plan")
         try:
             # Try to find JSON in response
             m = re.search(r"\{[\s\S]*\}", raw)
@@ -1252,19 +1520,81 @@ class NaturalLanguageNavigator:
 
 
 class MultiIntentPlanner:
-    """Parse and execute compound natural language commands in sequence.
+    """Parse and execute compound natural language commands.
     Splits text into steps, categorizes each, and routes to existing handlers.
+    Independent steps run in parallel; steps that share a resource (browser,
+    keyboard/mouse, audio...) or follow "then" keep their order.
     Falls back to AI planning when needed.
     """
 
-    def __init__(self, assistant):
+    # Connectors that order a step after everything before it
+    SEQUENTIAL_CONNECTORS = ("then", "after that", "next")
+
+    def __init__(self, assistant, max_workers=4, step_timeout=30.0):
         self.assistant = assistant
+        self.max_workers = max_workers
+        self.step_timeout = step_timeout
+        self._cancel = threading.Event()
 
-    def _split_into_steps(self, text):
+    def cancel(self):
+        """Skip every step of the running plan that has not started yet.
+
+        A plan running as a pipeline job is also cancelled when a newer
+        command supersedes that job.
+        """
+        self._cancel.set()
+
+    def _split_with_connectors(self, text):
+        """Return (step, follows_sequential_connector) pairs."""
         # Split on common connectors: and, then, after that, next, commas, plus tolerant 'an'
-        parts = re.split(r"\s*(?:,|\band\b|\ban\b|\bthen\b|\bafter that\b|\bnext\b)\s*", text, flags=re.IGNORECASE)
-        # Filter out empty fragments
-        return [p.strip() for p in parts if p and p.strip()]
+        parts = re.split(r"\s*(,|\band\b|\ban\b|\bthen\b|\bafter that\b|\bnext\b)\s*", text, flags=re.IGNORECASE)
+        steps = []
+        sequential = False
+        for i, part in enumerate(parts):
+            if i % 2:
+                sequential = sequential or part.lower() in self.SEQUENTIAL_CONNECTORS
+                continue
+            # Filter out empty fragments
+            if part and part.strip():
+                steps.append((part.strip(), sequential and bool(steps)))
+                sequential = False
+        return steps
+
+    def _split_into_steps(self, text):
+        return [step for step, _ in self._split_with_connectors(text)]
+
+    def _step_resources(self, segment):
+        """Shared resources a step uses; steps claiming the same one stay ordered."""
+        seg = self._normalize_segment(segment).lower()
+        category = self.assistant._route_command(seg).category
+        resources = set()
+        if category in ('search', 'media') or re.search(r"\b(youtube|google|browser|website|tab)\b", seg):
+            resources.add('browser')
+            # Simulated automation drives the browser with the real keyboard and mouse
+            if getattr(self.assistant, 'automation_strategy', 'direct') == 'simulate':
+                resources.add('input')
+        if category == 'media':
+            resources.add('audio')
+        if category == 'navigation':
+            resources.add('input')
+        if category in ('system', 'file'):
+            resources.add(category)
+        return resources
+
+    def _build_plan(self, steps):
+        """Turn (step, sequential) pairs into DAG nodes with dependency sets."""
+        plan = []
+        last_user = {}
+        for i, (step, sequential) in enumerate(steps, 1):
+            resources = self._step_resources(step)
+            if sequential:
+                deps = {node['index'] for node in plan}
+            else:
+                deps = {last_user[r] for r in resources if r in last_user}
+            for r in resources:
+                last_user[r] = i
+            plan.append({'index': i, 'step': step, 'deps': deps})
+        return plan
 
     def _normalize_segment(self, segment):
         seg = segment.strip().lower()
@@ -1292,7 +1622,7 @@ class MultiIntentPlanner:
     def _execute_segment(self, segment):
         try:
             seg = self._normalize_segment(segment)
-            category = self.assistant._categorize_command(seg)
+            category = self.assistant._route_command(seg).category
             if category == 'navigation':
                 return self.assistant._handle_navigation_command(seg)
             elif category == 'search':
@@ -1313,12 +1643,14 @@ class MultiIntentPlanner:
             return f"❌ Error executing step '{segment}': {e}"
 
     def execute(self, text):
-        steps = self._split_into_steps(text)
-        if not steps:
+        pairs = self._split_with_connectors(text)
+        if not pairs:
             # Try AI planning if we couldn't split
-            steps = self._interpret_with_ai(text)
-        if not steps:
+            pairs = [(step, False) for step in (self._interpret_with_ai(text) or [])]
+        if not pairs:
             return "🤖 I couldn't understand the sequence. Please try simpler steps, e.g., 'open youtube and play music and open google and search cats'."
+        steps = [step for step, _ in pairs]
+        plan = self._build_plan(pairs)
 
         # Visualize steps if supported
         try:
@@ -1327,51 +1659,113 @@ class MultiIntentPlanner:
         except Exception:
             pass
 
-        # Stream step-by-step execution
-        results = []
-        for i, step in enumerate(steps, 1):
-            msg = f"▶️ Step {i}: {step}"
-            try:
-                self.assistant.add_to_chat("SAM", msg, "system")
-            except Exception:
-                pass
-            # Notify start
-            start_ts = time.time()
-            try:
-                if hasattr(self.assistant, 'notify_step_start'):
-                    self.assistant.notify_step_start(i, step)
-            except Exception:
-                pass
+        results = self._run_plan(plan)
+        summary = "\n".join(f"Step {i}: {results[i]}" for i in sorted(results))
+        # End visualization
+        try:
+            if hasattr(self.assistant, 'end_planner_visual'):
+                self.assistant.end_planner_visual()
+        except Exception:
+            pass
+        return f"✅ Completed {len(steps)} step(s).\n{summary}"
 
-            result = self._execute_segment(step)
-            elapsed = time.time() - start_ts
+    def _run_step(self, step):
+        # Network calls inside one step share the step's own deadline
+        with turn_deadline(self.step_timeout):
+            return self._execute_segment(step)
+
+    def _run_plan(self, plan):
+        """Run ready steps on a bounded pool; report each one as it finishes.
+
+        Chat updates and step notifications are issued from this (calling)
+        thread in completion order. A step that overruns ``step_timeout``
+        is reported as failed so its successors can go ahead; it keeps
+        running (Python threads cannot be interrupted) and keeps its pool
+        slot until it returns. After cancel(), or once the pipeline job
+        running this plan is superseded, steps that have not started are
+        skipped.
+        """
+        self._cancel.clear()
+        job = current_job()
+        results = {}
+        pending = {node['index']: node for node in plan}
+        running = {}
+        overrun = []  # timed-out steps still occupying a worker
+
+        def finish(node, result, elapsed):
+            index, step = node['index'], node['step']
             # Determine success
-            success = True
-            try:
-                if isinstance(result, str) and (result.startswith("❌") or "❌" in result.lower()):
-                    success = False
-            except Exception:
-                success = True
-            results.append(f"Step {i}: {result}")
+            success = not (isinstance(result, str) and "❌" in result)
+            results[index] = result
             try:
                 self.assistant.add_to_chat("SAM", result, "jarvis")
             except Exception:
                 pass
-            # Notify finish
             try:
                 if hasattr(self.assistant, 'notify_step_finish'):
-                    self.assistant.notify_step_finish(i, step, success=success, message=result, elapsed=elapsed)
+                    self.assistant.notify_step_finish(index, step, success=success, message=result, elapsed=elapsed)
             except Exception:
                 pass
 
-        summary = "\n".join(results)
-        # End visualization
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="planner")
         try:
-            if hasattr(self.assistant, 'end_planner_visual'):
-                self.assistant.end_planner_visual()
-        except Exception:
-            pass
-        return f"✅ Completed {len(steps)} step(s).\n{summary}"
+            while pending or running:
+                if self._cancel.is_set() or (job is not None and job.cancelled):
+                    for node in pending.values():
+                        finish(node, f"❌ Skipped '{node['step']}' (cancelled)", 0.0)
+                    pending.clear()
+
+                overrun = [f for f in overrun if not f.done()]
+                ready = [node for node in pending.values() if not node['deps'] & (set(pending) | set(running.values()))]
+                for node in ready:
+                    if len(running) + len(overrun) >= self.max_workers:
+                        break
+                    index, step = node['index'], node['step']
+                    del pending[index]
+                    try:
+                        self.assistant.add_to_chat("SAM", f"▶️ Step {index}: {step}", "system")
+                    except Exception:
+                        pass
+                    try:
+                        if hasattr(self.assistant, 'notify_step_start'):
+                            self.assistant.notify_step_start(index, step)
+                    except Exception:
+                        pass
+                    # Carry the turn deadline into the worker thread
+                    context = contextvars.copy_context()
+                    future = pool.submit(context.run, self._run_step, step)
+                    future.started_at = time.time()
+                    future.node = node
+                    running[future] = index
+
+                if not running:
+                    if pending and overrun:
+                        # Every slot is held by an overrunning step; wait for one to return
+                        wait_futures(overrun, timeout=0.5, return_when=FIRST_COMPLETED)
+                    continue
+                now = time.time()
+                next_deadline = min(f.started_at + self.step_timeout for f in running) - now
+                if job is not None:
+                    # Wake up regularly to notice the job being superseded
+                    next_deadline = min(next_deadline, 0.25)
+                done, _ = wait_futures(list(running), timeout=max(0.0, next_deadline), return_when=FIRST_COMPLETED)
+                now = time.time()
+                for future in done:
+                    del running[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = f"❌ Error executing step '{future.node['step']}': {e}"
+                    finish(future.node, result, now - future.started_at)
+                for future in [f for f in running if now - f.started_at >= self.step_timeout]:
+                    del running[future]
+                    overrun.append(future)
+                    finish(future.node, f"❌ Step timed out after {self.step_timeout:.0f}s (no longer waiting for it)",
+                           now - future.started_at)
+        finally:
+            # Do not wait for steps that overran
+            pool.shutdown(wait=False)
+        return results
 
     def _interpret_with_ai(self, text):
         if not hasattr(self.assistant, 'mistral_chat'):
@@ -1383,7 +1777,7 @@ class MultiIntentPlanner:
             "{\"steps\": [\"open youtube\", \"play music\", \"open google\", \"search cats\"]}. "
             f"User: {text}"
         )
-        raw = self.assistant.mistral_chat(prompt)
+        raw = self.assistant.mistral_chat(prompt, intent="plan")
         try:
             m = re.search(r"\{[\s\S]*\}", raw)
             if m:
@@ -1412,7 +1806,13 @@ class EnhancedJarvisGUI:
         self.theme = "copilot_dark"
         self.sidebar_width = 280
         self.chat_font_size = 13
-        self.conversation_history = []
+        # Chat history lives on disk; only the current session's tail is kept in memory
+        self.conversation = ConversationStore(
+            CONVERSATION_CONFIG["path"], source="gui", tail_size=CONVERSATION_CONFIG["tail_size"]
+        )
+        self._history_cursor = self.conversation.session_start_id
+        self.profiles = ProfileStore(PROFILE_CONFIG["directory"])
+        self._save_profile_after_id = None
         self.speaking = False
         self.listening = False
         self.hotword_detection = False
@@ -1437,10 +1837,59 @@ class EnhancedJarvisGUI:
         self.browser_controller = BrowserController()
         self.system_launcher = SystemLauncher()
 
+        # One staged worker pipeline for STT, routing, actions, LLM and TTS
+        self.pipeline = CommandPipeline(
+            [
+                Stage("stt", self._stt_stage, workers=2, queue_size=4),
+                Stage("route", self._route_stage, workers=1, queue_size=8),
+                Stage("action", self._action_stage, workers=2, queue_size=8),
+                Stage("llm", self._action_stage, workers=2, queue_size=4),
+            ],
+            ui_dispatch=lambda fn: self.root.after(0, fn),
+            name="commands",
+        )
+        self.pipeline.start()
+
         # Initialize components
         self._initialize_ui_components()
         self._initialize_audio_components()
 
+        # Compiled intent router shared by every command entry point
+        self.intent_router = IntentRouter()
+
+        # Pooled keep-alive HTTP client shared by every outbound API call
+        self.http = get_client()
+
+        # Persistent cache of AI replies, keyed by prompt and conversation state
+        self.response_cache = None
+        if LLM_CACHE_CONFIG.get("enabled"):
+            try:
+                self.response_cache = ResponseCache(CACHE_DIR / "llm_cache.db", **LLM_CACHE_CONFIG)
+            except Exception as e:
+                print(f"LLM response cache unavailable: {e}")
+
+        # Speech-to-text engine per language (Google online, Vosk/whisper.cpp offline)
+        self.stt = STTRouter.from_config()
+        self.command_mic = None
+        self.speculative = SpeculativeDispatcher(
+            self._run_speculative_command,
+            self._capture_speculative_state,
+            self._restore_speculative_state,
+            stable_ms=STT_CONFIG.get("speculative_stable_ms", 250),
+            on_rollback=self._on_speculative_rollback,
+        )
+
+        # On-device wake word matching; hotwords without enrolled
+        # recordings still fall back to cloud transcription
+        self.keyword_spotter = None
+        if KWS_CONFIG.get("enabled"):
+            try:
+                self.keyword_spotter = MfccDtwSpotter(
+                    KWS_CONFIG["model_dir"], sensitivity=KWS_CONFIG.get("sensitivity", 0.5)
+                )
+            except Exception as e:
+                print(f"Keyword spotter unavailable: {e}")
+
         # Initialize modular natural language navigator for system navigation
         try:
             self.navigator = NaturalLanguageNavigator(self)
@@ -1528,9 +1977,6 @@ class EnhancedJarvisGUI:
 
     def _initialize_ui_components(self):
         """Initialize UI-related components."""
-        # Initialize conversation history
-        self.conversation_history = []
-        
         # Initialize theme
         self.theme = "copilot_dark"
         
@@ -1542,54 +1988,16 @@ class EnhancedJarvisGUI:
     
     def _initialize_audio_components(self):
         """Initialize audio-related components."""
-        # Initialize TTS engine
-        try:
-            self.tts_engine = pyttsx3.init()
-            self.tts_engine.setProperty('rate', 150)
-            self.tts_engine.setProperty('volume', 0.8)
-            self.tts_rate = 150
-            self.tts_volume = 0.8
-            if hasattr(self, 'logger'):
-                self.logger.info("TTS engine initialized")
-            # TTS queue and worker to ensure seamless, non-blocking speech
-            self.tts_queue = queue.Queue()
-            self._tts_worker_running = True
-            def _tts_worker():
-                while self._tts_worker_running:
-                    try:
-                        item = self.tts_queue.get()
-                        if item is None:
-                            break
-                        text = self._prepare_text_for_speech(item)
-                        if not text:
-                            continue
-                        self.speaking = True
-                        self._apply_enhanced_tts_settings()
-                        self.tts_engine.say(text)
-                        self.tts_engine.runAndWait()
-                    except Exception as e:
-                        print(f"TTS worker error: {e}")
-                        try:
-                            self.tts_engine = pyttsx3.init()
-                            self.update_tts_settings()
-                        except Exception:
-                            pass
-                    finally:
-                        self.speaking = False
-            try:
-                self.tts_thread = threading.Thread(target=_tts_worker, daemon=True)
-                self.tts_thread.start()
-            except Exception:
-                pass
-        except Exception as e:
-            print(f"TTS initialization error: {e}")
-            if hasattr(self, 'logger'):
-                self.logger.error(f"TTS initialization error: {e}")
-            self.tts_engine = None
-            self.tts_voice_id = None
-            self.tts_rate = 150
-            self.tts_volume = 0.8
+        # Speech settings; slightly slower than the engine default for a more natural flow
+        self.tts_rate = 140
+        self.tts_volume = 0.85
         
+        # Speech is queued on the shared TTS service's single worker, which
+        # owns the engine; settings are applied to it before each utterance
+        self.tts = get_tts_service()
+        self.tts.prepare = self._apply_enhanced_tts_settings
+        self.tts.add_listener(lambda speaking: setattr(self, 'speaking', speaking))
+
         # Initialize speech recognition
         self.recognizer = sr.Recognizer()
         try:
@@ -1895,12 +2303,12 @@ class EnhancedJarvisGUI:
             ("🎵", "Music", self.play_music_folder),
             ("📝", "Notes", self.open_notepad),
             ("🧮", "Calc", self.open_calculator),
-            ("🌤️", "Weather", lambda: self.process_command("weather")),
+            ("🌤️", "Weather", lambda: self._submit_command("weather")),
             ("📸", "Screen", self.quick_screenshot),
-            ("📰", "News", lambda: self.process_command("news")),
+            ("📰", "News", lambda: self._submit_command("news")),
             ("🛠️", "System", self.show_system_info_popup),
             ("🔤", "ASCII Art", self.ascii_art_generator),
-            ("💻", "Code", lambda: self.process_command("generate fibonacci")),
+            ("💻", "Code", lambda: self._submit_command("generate fibonacci")),
             ("🎲", "3D Models", self.open_3d_model_viewer),
             ("📁", "Load 3D", self.load_custom_3d_model)
         ]
@@ -1942,12 +2350,12 @@ class EnhancedJarvisGUI:
         nav_buttons.pack(fill="x", padx=20, pady=10)
 
         nav_actions = [
-            ("🖥️", "Desktop", lambda: self.process_command("show desktop")),
-            ("🔄", "Switch", lambda: self.process_command("switch window")),
-            ("📥", "Downloads", lambda: self.process_command("go to downloads")),
-            ("📶", "Wi‑Fi", lambda: self.process_command("open settings for wifi")),
-            ("↘️", "Scroll", lambda: self.process_command("scroll down")),
-            ("✨", "Multi‑Step", lambda: self.process_command("open youtube and play a song and open google and search cats")),
+            ("🖥️", "Desktop", lambda: self._submit_command("show desktop")),
+            ("🔄", "Switch", lambda: self._submit_command("switch window")),
+            ("📥", "Downloads", lambda: self._submit_command("go to downloads")),
+            ("📶", "Wi‑Fi", lambda: self._submit_command("open settings for wifi")),
+            ("↘️", "Scroll", lambda: self._submit_command("scroll down")),
+            ("✨", "Multi‑Step", lambda: self._submit_command("open youtube and play a song and open google and search cats")),
         ]
         for i, (icon, text, command) in enumerate(nav_actions):
             row, col = i // 2, i % 2
@@ -2190,9 +2598,9 @@ class EnhancedJarvisGUI:
         
         # Initialize camera variables
         self.camera_active = False
-        self.camera_capture = None
-        self.camera_thread = None
-        self.camera_running = False
+        self.camera = get_camera_service() if CAMERA_AVAILABLE else None
+        self.camera_preview = None
+        self._preview_count = 0
         
         # Start updating temporal and network info
         self.update_temporal_info()
@@ -2266,31 +2674,14 @@ class EnhancedJarvisGUI:
                 print("Stopping existing camera...")
                 self.stop_camera()
             
-            # Initialize camera capture
+            # Join the shared capture service (opens the device if nobody else has)
             print("Initializing camera capture...")
-            self.camera_capture = cv2.VideoCapture(0)
-            
-            if not self.camera_capture.isOpened():
+            if not self.camera.acquire():
                 self.add_to_chat("System", "❌ Could not open camera. Check if camera is connected.", "error")
                 return
             
             print("Camera opened successfully")
             
-            # Set camera properties
-            self.camera_capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.camera_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.camera_capture.set(cv2.CAP_PROP_FPS, 30)
-            
-            # Test camera by reading multiple frames
-            print("Testing camera...")
-            # Single quick test read to avoid blocking the UI
-            ret, test_frame = self.camera_capture.read()
-            if not (ret and test_frame is not None):
-                self.add_to_chat("System", "❌ Camera test failed. Cannot read frames.", "error")
-                self.camera_capture.release()
-                return
-            print("Camera test successful")
-            
             # Update UI
             colors = THEMES[self.theme]
             self.camera_btn.configure(
@@ -2311,20 +2702,13 @@ class EnhancedJarvisGUI:
             
             # Set camera state
             self.camera_active = True
-            self.camera_running = True
             
-            print("Starting camera thread...")
-            # Start camera thread
-            self.camera_thread = threading.Thread(target=self.camera_feed_loop, daemon=True)
-            self.camera_thread.start()
-            
-            if self.camera_thread.is_alive():
-                print("Camera thread started successfully")
-                self.add_to_chat("SAM", "📹 Camera activated! You can now ask me 'What is this?' to analyze what I see.", "info")
-            else:
-                print("Camera thread failed to start")
-                self.add_to_chat("System", "❌ Camera thread failed to start.", "error")
-                self.stop_camera()
+            # The preview takes the newest frame at its own rate; frames in between are skipped
+            self._preview_count = 0
+            self.camera_preview = self.camera.subscribe(
+                self._update_camera_preview, rate_hz=CV_CONFIG.get("preview_hz", 15), name="preview"
+            )
+            self.add_to_chat("SAM", "📹 Camera activated! You can now ask me 'What is this?' to analyze what I see.", "info")
             
         except Exception as e:
             print(f"Error starting camera: {e}")
@@ -2337,18 +2721,14 @@ class EnhancedJarvisGUI:
         """Stop the camera feed."""
         try:
             print("Stopping camera...")
-            self.camera_running = False
-            self.camera_active = False
-            
-            # Wait briefly for camera thread to finish without freezing UI
-            if hasattr(self, 'camera_thread') and self.camera_thread and self.camera_thread.is_alive():
-                self.camera_thread.join(timeout=0.25)
-                print("Camera thread stopped")
-            
-            # Release camera
-            if hasattr(self, 'camera_capture') and self.camera_capture:
-                self.camera_capture.release()
-                self.camera_capture = None
+            was_active, self.camera_active = self.camera_active, False
+            
+            # Stop the preview and give up our share of the camera
+            if self.camera_preview is not None:
+                self.camera.unsubscribe(self.camera_preview)
+                self.camera_preview = None
+            if was_active:
+                self.camera.release()
                 print("Camera released")
             
             # Update UI
@@ -2379,66 +2759,22 @@ class EnhancedJarvisGUI:
             import traceback
             traceback.print_exc()
     
-    def camera_feed_loop(self):
-        """Main camera feed loop with improved reliability."""
-        print("Camera feed loop started")
-        frame_count = 0
-        consecutive_failures = 0
-        max_failures = 10
-        
-        while self.camera_running and self.camera_active:
-            try:
-                if not self.camera_capture or not self.camera_capture.isOpened():
-                    print("Camera capture not available")
-                    break
-                
-                ret, frame = self.camera_capture.read()
-                if ret and frame is not None:
-                    consecutive_failures = 0  # Reset failure counter
-                    
-                    # Store current frame for analysis
-                    self.current_frame = frame.copy()
-                    
-                    # Convert frame to PIL Image
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    pil_image = Image.fromarray(frame_rgb)
-                    
-                    # Resize for display (larger for better visibility)
-                    display_size = (280, 100)
-                    pil_image_resized = pil_image.resize(display_size, Image.Resampling.LANCZOS)
-                    
-                    # Convert to PhotoImage
-                    photo_image = ImageTk.PhotoImage(pil_image_resized)
-                    
-                    # Update UI in main thread
-                    try:
-                        self.root.after(0, lambda img=photo_image, count=frame_count: self.update_camera_display(img, count))
-                        frame_count += 1
-                    except Exception as ui_error:
-                        print(f"UI update error: {ui_error}")
-                        
-                else:
-                    consecutive_failures += 1
-                    print(f"Failed to read frame from camera (attempt {consecutive_failures})")
-                    if consecutive_failures >= max_failures:
-                        print("Too many consecutive failures, stopping camera")
-                        break
-                        
-                time.sleep(0.033)  # ~30 FPS
-                
-            except Exception as e:
-                consecutive_failures += 1
-                print(f"Camera feed error: {e}")
-                import traceback
-                traceback.print_exc()
-                if consecutive_failures >= max_failures:
-                    break
-                time.sleep(0.1)  # Wait a bit before retrying
-        
-        print("Camera feed loop ended")
-        # Cleanup
-        if self.camera_capture:
-            self.camera_capture.release()
+    @property
+    def current_frame(self):
+        """Newest camera frame as a read-only view into the capture ring, or None."""
+        frame = self.camera.latest() if self.camera_active else None
+        return frame.image if frame is not None else None
+
+    def _update_camera_preview(self, frame):
+        """Camera subscriber: scale the newest frame down for the preview label."""
+        try:
+            # Resize the shared frame first, so only the small image is converted
+            small = cv2.resize(frame.image, (280, 100), interpolation=cv2.INTER_AREA)
+            photo_image = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(small, cv2.COLOR_BGR2RGB)))
+            self.root.after(0, lambda img=photo_image, count=self._preview_count: self.update_camera_display(img, count))
+            self._preview_count += 1
+        except Exception as e:
+            print(f"Camera preview error: {e}")
     
     def update_camera_display(self, photo_image, frame_count=0):
         """Update camera display in main thread with improved reliability."""
@@ -2475,7 +2811,7 @@ class EnhancedJarvisGUI:
     def analyze_camera_image(self, query=""):
         """Analyze the current camera image using AI vision."""
         try:
-            if not self.camera_active or not hasattr(self, 'current_frame'):
+            if not self.camera_active or self.current_frame is None:
                 return "❌ No camera feed available. Please activate the camera first."
             
             if not VISION_AVAILABLE:
@@ -2527,7 +2863,7 @@ class EnhancedJarvisGUI:
                 ]
             }
             
-            response = requests.post(url, json=request_data, timeout=10)
+            response = self.http.post(url, json=request_data, timeout=10, retry=True)
             
             if response.status_code == 200:
                 data = response.json()
@@ -2591,7 +2927,7 @@ class EnhancedJarvisGUI:
             Be helpful and descriptive, but also mention that this is an AI interpretation since I can't actually see the image.
             """
             
-            response = self.mistral_chat(prompt)
+            response = self.mistral_chat(prompt, intent="vision")
             return f"🤖 {response}\n\n💡 Note: This is an AI interpretation since I can't directly analyze the image."
             
         except Exception as e:
@@ -2602,21 +2938,17 @@ class EnhancedJarvisGUI:
         status = {
             "camera_available": CAMERA_AVAILABLE,
             "camera_active": getattr(self, 'camera_active', False),
-            "camera_running": getattr(self, 'camera_running', False),
-            "camera_capture": getattr(self, 'camera_capture', None) is not None,
-            "camera_thread": getattr(self, 'camera_thread', None) is not None,
-            "camera_thread_alive": getattr(self, 'camera_thread', None) and getattr(self, 'camera_thread', None).is_alive() if hasattr(self, 'camera_thread') else False,
-            "current_frame": hasattr(self, 'current_frame'),
+            "camera_running": bool(self.camera and self.camera.active),
+            "current_frame": self.current_frame is not None,
             "camera_feed_label": hasattr(self, 'camera_feed_label')
         }
         
-        if hasattr(self, 'camera_capture') and self.camera_capture:
-            status["camera_opened"] = self.camera_capture.isOpened()
-            if self.camera_capture.isOpened():
-                ret, frame = self.camera_capture.read()
-                status["can_read_frames"] = ret and frame is not None
-                if ret and frame is not None:
-                    status["frame_size"] = f"{frame.shape[1]}x{frame.shape[0]}"
+        if self.camera is not None:
+            status["camera_service"] = self.camera.stats()
+            frame = self.current_frame
+            status["can_read_frames"] = frame is not None
+            if frame is not None:
+                status["frame_size"] = f"{frame.shape[1]}x{frame.shape[0]}"
         
         return status
     
@@ -2626,6 +2958,13 @@ class EnhancedJarvisGUI:
             if not CAMERA_AVAILABLE:
                 return "❌ OpenCV not available"
             
+            # The device is already open in the capture service; do not open it twice
+            if self.camera.active:
+                frame = self.camera.wait_newer(self.camera.seq)
+                if frame is None:
+                    return "❌ Cannot read frames from camera"
+                return f"✅ Camera test successful - Frame size: {frame.image.shape[1]}x{frame.image.shape[0]}"
+            
             cap = cv2.VideoCapture(0)
             if not cap.isOpened():
                 return "❌ Cannot open camera"
@@ -2718,6 +3057,12 @@ class EnhancedJarvisGUI:
             corner_radius=0
         )
         self.chat_scrollable_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        # Only the most recent bubbles stay materialized; older ones are paged in
+        self.chat_view = VirtualChatView(
+            self.chat_scrollable_frame,
+            page_size=CONVERSATION_CONFIG["page_size"],
+            load_earlier=self._load_earlier_chat,
+        )
 
         # Planner step panel (hidden by default, shown when multi-intent runs)
         try:
@@ -3085,8 +3430,8 @@ class EnhancedJarvisGUI:
             if hasattr(self, 'status_label'):
                 self.status_label.configure(text=f"🎨 Theme changed to {new_theme.title()}")
             
-            # Save profile
-            self.save_profile()
+            # Save profile (debounced: themes are often flicked through)
+            self.schedule_profile_save()
             
         except Exception as e:
             print(f"Error changing theme: {e}")
@@ -3292,46 +3637,31 @@ class EnhancedJarvisGUI:
         self.add_to_chat("System", welcome_msg, "system")
         
         # Update TTS voice to match new language
+        self.tts_voice_id = None
         self.update_tts_settings()
         
         # Speak the welcome message in the new language
-        threading.Thread(target=self.speak_text, args=(welcome_msg,), daemon=True).start()
+        self.speak_text(welcome_msg)
 
     def add_to_chat(self, sender, message, msg_type="info"):
-        """Add a message to the chat using modern chat bubbles."""
+        """Add a message to the chat using modern chat bubbles.
+
+        Safe to call from worker threads: the message is handed to the Tk thread.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            self.root.after(0, lambda: self.add_to_chat(sender, message, msg_type))
+            return
         timestamp = datetime.datetime.now().strftime("%H:%M")
         
-        # Create chat bubble
-        bubble = EnhancedChatBubble(
-            self.chat_scrollable_frame,
-            message=message,
-            sender=sender,
-            timestamp=timestamp
-        )
-        
-        # Scroll to bottom
-        self.chat_scrollable_frame._parent_canvas.yview_moveto(1.0)
+        # Rendered (and scrolled to the bottom) with the rest of this frame's updates
+        self.chat_view.append(sender, message, timestamp)
         
-        # Store in conversation history
-        self.conversation_history.append({
-            "timestamp": timestamp,
-            "sender": sender,
-            "message": message,
-            "type": msg_type
-        })
-        
-        # Save profile (debounced)
-        try:
-            if hasattr(self, "_save_profile_after_id") and self._save_profile_after_id:
-                self.root.after_cancel(self._save_profile_after_id)
-        except Exception:
-            pass
-        try:
-            # debounce writes to avoid frequent disk I/O stutter
-            self._save_profile_after_id = self.root.after(800, self.save_profile)
-        except Exception:
-            # fallback in rare headless cases
-            self.save_profile()
+        self._record_chat_message(sender, message, msg_type, timestamp)
+
+    def _record_chat_message(self, sender, message, msg_type, timestamp):
+        """Store a chat message in history."""
+        # Written behind to the conversation store
+        self.conversation.append(EnhancedChatBubble.kind_of(sender), message, sender=sender, kind=msg_type)
         
         # Show toast notification for errors
         if msg_type == "error":
@@ -3364,18 +3694,21 @@ class EnhancedJarvisGUI:
             self.update_status(status_msg)
             
             # Process command with priority for common commands
-            if self._is_quick_command(user_input):
-                self._process_quick_command(user_input)
+            route = self._route_command(user_input)
+            if route.is_quick:
+                self._process_quick_command(user_input, route)
             else:
                 # Show typing indicator for AI responses
                 self.show_typing_indicator()
-                # Process command in background thread with enhanced error handling
+                # Hand the command to the pipeline with enhanced error handling
                 try:
-                    threading.Thread(target=self.process_command, args=(user_input,), daemon=True).start()
+                    if not self._submit_command(user_input, route):
+                        raise RuntimeError("command pipeline is busy")
                 except Exception as e:
-                    print(f"Error starting command thread: {e}")
+                    print(f"Error queueing command: {e}")
                     if hasattr(self, 'logger'):
-                        self.logger.error(f"Error starting command thread: {e}")
+                        self.logger.error(f"Error queueing command: {e}")
+                    self.hide_typing_indicator()
                     error_messages = {
                         "English": "Sorry, I encountered an error processing your request. Please try again.",
                         "Hindi": "क्षमा करें, आपके अनुरोध को संसाधित करने में त्रुटि आई। कृपया पुनः प्रयास करें।",
@@ -3389,102 +3722,94 @@ class EnhancedJarvisGUI:
                 self.logger.exception(f"Error in on_user_input: {e}")
             self.add_to_chat("System", f"Error processing input: {e}", "error")
     
+    def _route_command(self, command):
+        """Route a command through the compiled intent table in a single pass"""
+        return self.intent_router.route(command, getattr(self, 'user_commands', None))
+
     def _is_quick_command(self, command):
         """Check if command can be processed quickly without AI"""
-        command_lower = command.lower()
-        
-        # Email commands should NOT be quick commands - they need full processing
-        if any(email_cmd in command_lower for email_cmd in ['send gmail', 'send email', 'gmail', 'email']):
-            return False
-            
-        quick_commands = [
-            'help', 'clear', 'weather', 'time', 'date', 'system', 'screenshot',
-            'music', 'notes', 'calc', 'web', 'news', 'ascii', 'hello', 'hi',
-            'thanks', 'thank you', 'bye', 'goodbye', 'what can you do', 'who are you',
-            'open', 'play', 'generate', 'code', '3d', 'model', 'viewer'  # Add 3D model commands
-        ]
-        return any(cmd in command_lower for cmd in quick_commands)
+        return self._route_command(command).is_quick
     
-    def _process_quick_command(self, command):
+    def _process_quick_command(self, command, route=None):
         """Process quick commands with intelligent task execution"""
         command_lower = command.lower()
+        if route is None:
+            route = self._route_command(command)
+        intent = route.quick
         try:
-            if 'help' in command_lower:
+            if intent == 'help':
                 response = self.get_help_text()
-            elif 'clear' in command_lower:
+            elif intent == 'clear':
                 self.clear_chat()
                 return
-            elif 'weather' in command_lower:
+            elif intent == 'weather':
                 response = self.get_weather_info()
-            elif 'time' in command_lower:
+            elif intent == 'time':
                 response = f"🕐 Current time: {datetime.datetime.now().strftime('%H:%M:%S')}"
-            elif 'date' in command_lower:
+            elif intent == 'date':
                 response = f"📅 Today's date: {datetime.datetime.now().strftime('%B %d, %Y')}"
-            elif 'system' in command_lower:
+            elif intent == 'system':
                 response = self.get_detailed_system_info()
-            elif 'screenshot' in command_lower:
+            elif intent == 'screenshot':
                 response = self.take_screenshot()
-            elif 'music' in command_lower:
+            elif intent == 'music':
                 response = self.handle_music_command()
-            elif 'notes' in command_lower:
+            elif intent == 'notes':
                 response = self.intelligent_open_application("notepad", "Notepad")
-            elif (
-                (re.search(r"\bcalc(ulator)?\b", command_lower) and any(x in command_lower for x in ['open', 'launch', 'start']))
-                or command_lower.strip() in ['calc', 'calculator']
-            ):
+            elif intent == 'calculator':
                 response = self.intelligent_open_application("calculator", "Calculator")
-            elif 'web' in command_lower:
+            elif intent == 'web':
                 response = self.intelligent_open_application("browser", "Web Browser")
-            elif 'news' in command_lower:
+            elif intent == 'news':
                 response = self.get_latest_news()
-            elif 'ascii' in command_lower:
+            elif intent == 'ascii':
                 response = self.ascii_art_generator()
-            elif 'generate' in command_lower or 'code' in command_lower:
-                # Extract the code generation prompt
-                if 'generate' in command_lower:
-                    prompt = command_lower.split('generate', 1)[1].strip()
-                elif 'code' in command_lower:
-                    prompt = command_lower.split('code', 1)[1].strip()
-                else:
-                    prompt = ""
+            elif intent == 'generate':
+                # Code generation prompt is extracted by the router
+                prompt = route.slots.get('prompt', '')
                 
                 if prompt:
                     response = self.generate_code(prompt)
                 else:
                     response = "🤖 Please specify what code you want me to generate. Try:\n• 'generate fibonacci'\n• 'generate factorial'\n• 'generate calculator'\n• 'generate palindrome'"
-            elif '3d' in command_lower or 'model' in command_lower or 'viewer' in command_lower:
+            elif intent == '3d_model':
                 if 'load' in command_lower or 'open' in command_lower or 'file' in command_lower:
                     response = self.load_custom_3d_model()
                 else:
                     response = self.open_3d_model_viewer()
-            elif any(greeting in command_lower for greeting in ['hello', 'hi', 'hey']):
+            elif intent == 'greeting':
                 response = "👋 Hello! How can I help you today?"
-            elif any(thanks in command_lower for thanks in ['thanks', 'thank you']):
+            elif intent == 'thanks':
                 response = "😊 You're welcome! Is there anything else I can help with?"
-            elif any(bye in command_lower for bye in ['bye', 'goodbye']):
+            elif intent == 'goodbye':
                 response = "👋 Goodbye! Feel free to come back anytime."
-            elif 'what can you do' in command_lower or 'who are you' in command_lower:
+            elif intent == 'about':
                 response = "🤖 I'm SAM, your AI assistant! I can help with calculations, web searches, system info, weather, music, and much more. Just ask!"
-            elif 'open' in command_lower:
+            elif intent == 'open':
                 # Intelligent application opening with search-first approach
-                response = self.intelligent_open_command(command_lower)
+                response = self.intelligent_open_command(command_lower, route.slots)
             else:
                 # Try intelligent task execution for unknown commands
                 response = self.intelligent_task_execution(command_lower)
             
-            self.root.after(0, lambda: self.display_response(response))
+            self._to_ui(self.display_response, response)
             
         except Exception as e:
             print(f"Error in _process_quick_command: {e}")
             response = "🤖 I encountered an error processing your command. Please try again."
-            self.root.after(0, lambda: self.display_response(response))
+            self._to_ui(self.display_response, response)
+
+    def intelligent_open_command(self, command_lower, slots=None):
+        """Intelligent application opening with search-first approach like in the video.
 
-    def intelligent_open_command(self, command_lower):
-        """Intelligent application opening with search-first approach like in the video."""
+        ``slots`` are the router's "open" slots when the caller has them.
+        """
         try:
-            # Extract the target from "open [target]" command
-            if 'open' in command_lower:
-                target = command_lower.replace('open', '').strip()
+            # The target of an "open [target]" command
+            if slots is None:
+                slots = self.intent_router.extract_slots("open", command_lower)
+            if 'target' in slots:
+                target = slots['target']
                 
                 # Show searching animation first
                 self.add_to_chat("SAM", f"🔍 Searching for '{target}'...", "system")
@@ -3494,9 +3819,8 @@ class EnhancedJarvisGUI:
 
                 # If command also includes a YouTube play clause, trigger playback shortly after open
                 try:
-                    m = re.search(r"play\s+(.+?)\s+(?:on|in|from)\s+youtube\b", command_lower)
-                    if m:
-                        query = m.group(1).strip()
+                    query = self.intent_router.extract_slots("media", command_lower).get('query')
+                    if query and 'youtube' in command_lower:
                         self.root.after(1600, lambda: self.add_to_chat("SAM", self._play_on_youtube_direct(query), "system"))
                 except Exception:
                     pass
@@ -3835,7 +4159,50 @@ class EnhancedJarvisGUI:
 
 
 
-    def process_command(self, command):
+    # Categories handled by a local action; anything else goes to the LLM
+    ACTION_CATEGORIES = frozenset({
+        "user_defined", "vision", "system", "search", "calculation", "file",
+        "navigation", "multi_intent", "media", "email", "3d_model",
+    })
+
+    def _submit_command(self, command, route=None, supersede=None):
+        """Queue a command on the pipeline; False when it is at capacity."""
+        if route is None:
+            job = self.pipeline.submit("route", command, supersede=supersede)
+        else:
+            job = self.pipeline.submit(self._stage_for(route), (command, route), supersede=supersede)
+        return job is not None
+
+    def _stage_for(self, route):
+        if route.is_quick or route.category in self.ACTION_CATEGORIES:
+            return "action"
+        return "llm"
+
+    def _route_stage(self, job, command):
+        """Pipeline "route" stage: pick the action or LLM workers."""
+        route = self._route_command(command.lower().strip())
+        return self._stage_for(route), (command, route)
+
+    def _action_stage(self, job, item):
+        """Pipeline "action" and "llm" stages: run the routed command."""
+        command, route = item
+        self.process_command(command, route)
+        return None
+
+    def _to_ui(self, fn, *args):
+        """Run fn on the Tk thread; results of a superseded command are dropped."""
+        pipeline = getattr(self, 'pipeline', None)
+        if pipeline is not None:
+            pipeline.to_ui(fn, *args)
+        else:
+            self.root.after(0, lambda: fn(*args))
+
+    def process_command(self, command, route=None):
+        """Handle one command; all network calls share one end-to-end deadline."""
+        with turn_deadline(HTTP_CONFIG.get("turn_deadline")):
+            return self._process_command(command, route)
+
+    def _process_command(self, command, route=None):
         """Ultra-efficient command processing inspired by modern AI assistants."""
         start_time = time.time()
         try:
@@ -3843,14 +4210,16 @@ class EnhancedJarvisGUI:
             if hasattr(self, 'logger'):
                 self.logger.info(f"Processing command: {command_lower}")
             
-            # ⚡ Ultra-fast quick command detection
-            if self._is_quick_command(command_lower):
-                response = self._process_quick_command(command_lower)
+            # ⚡ Single routing pass: quick intent, category and slots together
+            if route is None:
+                route = self._route_command(command_lower)
+            if route.is_quick:
+                response = self._process_quick_command(command_lower, route)
                 self._track_performance(start_time, "quick")
                 return response
             
             # 🎯 Intelligent command categorization for faster routing
-            command_type = self._categorize_command(command_lower)
+            command_type = route.category
             if hasattr(self, 'logger'):
                 self.logger.info(f"Categorized command as: {command_type}")
             
@@ -3866,7 +4235,7 @@ class EnhancedJarvisGUI:
                 elif command_type == "system":
                     response = self._handle_system_command(command)
                 elif command_type == "search":
-                    response = self._handle_search_command(command)
+                    response = self._handle_search_command(command, route.slots)
                 elif command_type == "calculation":
                     response = self._handle_calculation_command(command)
                 elif command_type == "file":
@@ -3876,7 +4245,7 @@ class EnhancedJarvisGUI:
                 elif command_type == "multi_intent":
                     response = self._handle_multi_intent_command(command)
                 elif command_type == "media":
-                    response = self._handle_media_command(command)
+                    response = self._handle_media_command(command, route.slots)
                 elif command_type == "email":
                     response = self._handle_email_command(command)
                 elif command_type == "3d_model":
@@ -3884,30 +4253,31 @@ class EnhancedJarvisGUI:
                 else:
                     # Use AI for complex queries with enhanced error handling
                     try:
-                        response = self.mistral_chat(command)
-                        if not response or response.strip() == "":
-                            response = "🤖 I'm not sure how to respond to that. Could you try rephrasing your question or ask me something else?"
+                        # Streamed into its own bubble and spoken sentence by sentence
+                        self._stream_ai_response(command)
+                        response = None
                     except Exception as ai_error:
                         print(f"AI processing error: {ai_error}")
                         if hasattr(self, 'logger'):
                             self.logger.error(f"AI processing error: {ai_error}")
                         response = self._get_fallback_response(command)
                 self._track_performance(start_time, command_type)
-                self.root.after(0, lambda: self.display_response(response))
+                if response is not None:
+                    self._to_ui(self.display_response, response)
                 
             except Exception as e:
                 self.hide_typing_indicator()
                 error_msg = f"❌ Error processing command: {str(e)}"
                 if hasattr(self, 'logger'):
                     self.logger.exception(error_msg)
-                self.root.after(0, lambda: self.display_response(error_msg, "error"))
+                self._to_ui(self.display_response, error_msg, "error")
             
         except Exception as e:
             print(f"Error in process_command: {e}")
             if hasattr(self, 'logger'):
                 self.logger.exception(f"Error in process_command: {e}")
             error_msg = "🤖 I'm having some technical difficulties right now. I can still help with system tasks, calculations, and basic information. Try using the quick action buttons or ask about system info!"
-            self.root.after(0, lambda: self.display_response(error_msg, "error"))
+            self._to_ui(self.display_response, error_msg, "error")
     
     def _track_performance(self, start_time, command_type):
         """Track command performance for efficiency monitoring."""
@@ -3952,73 +4322,7 @@ class EnhancedJarvisGUI:
     
     def _categorize_command(self, command):
         """Ultra-fast command categorization for efficient routing."""
-        command_lower = command.lower()
-
-        # Compound multi-intent connectors
-        if re.search(r"\b(and|then|after that|next)\b", command_lower) or "," in command_lower:
-            return "multi_intent"
-
-        # Media priority: if both 'play' and 'youtube' are present, treat as media
-        if ('play' in command_lower) and ('youtube' in command_lower):
-            return "media"
-        
-        # Camera/vision commands
-        if any(word in command_lower for word in ['what is this', 'what do you see', 'analyze', 'camera', 'vision', 'see']):
-            return "vision"
-        
-        # 3D model commands
-        if any(word in command_lower for word in ['3d', 'model', 'viewer', 'cube', 'sphere', 'cylinder', 'pyramid', 'load', 'stl', 'obj', 'ply']):
-            return "3d_model"
-        
-        # User-defined commands
-        if command in self.user_commands:
-            return "user_defined"
-            
-        # System commands
-        system_keywords = [
-            'system', 'cpu', 'memory', 'battery', 'screenshot', 'open', 'close', 'kill',
-            'volume', 'mute', 'unmute', 'brightness', 'display', 'screen', 'extend', 'duplicate',
-            'second screen', 'pc screen', 'shutdown', 'restart', 'sleep', 'hibernate', 'lock', 'power'
-        ]
-        if any(keyword in command_lower for keyword in system_keywords):
-            return "system"
-        
-        # Search commands
-        search_keywords = ['search', 'google', 'find', 'look up', 'wikipedia', 'news']
-        if any(keyword in command_lower for keyword in search_keywords):
-            return "search"
-
-        # Navigation commands (system navigation & window/folder actions)
-        navigation_keywords = [
-            'desktop','window','tab','switch','minimize','maximize','restore',
-            'scroll','back','forward','settings','wifi','bluetooth','display','sound','network',
-            'battery','storage','downloads','documents','pictures','photos','music','videos'
-        ]
-        if any(keyword in command_lower for keyword in navigation_keywords) or re.search(r"\bgo to\b", command_lower):
-            return "navigation"
-        
-        # Calculation commands
-        calc_keywords = ['calculate', 'compute', 'math', '+', '-', '*', '/', '=']
-        if any(keyword in command_lower for keyword in calc_keywords):
-            return "calculation"
-        
-        # File operations
-        file_keywords = ['file', 'folder', 'directory', 'create', 'delete', 'move', 'copy']
-        if any(keyword in command_lower for keyword in file_keywords):
-            return "file"
-        
-        # Media commands
-        media_keywords = ['play', 'music', 'video', 'song', 'volume']
-        if any(keyword in command_lower for keyword in media_keywords):
-            return "media"
-        
-        # Email commands
-        email_keywords = ['email', 'gmail', 'send', 'mail']
-        if any(keyword in command_lower for keyword in email_keywords):
-            return "email"
-        
-        # Default to AI processing
-        return "ai"
+        return self._route_command(command).category
     
     def _handle_system_command(self, command):
         """Handle system-related commands with instant responses."""
@@ -4282,16 +4586,16 @@ class EnhancedJarvisGUI:
         except Exception as e:
             return False, f"Failed to execute power action: {e}"
     
-    def _handle_search_command(self, command):
+    def _handle_search_command(self, command, slots=None):
         """Handle search commands with instant results."""
-        if command.lower().startswith("google ") or command.lower().startswith("search "):
-            query = command.split(" ", 1)[1]
+        if slots is None:
+            slots = self.intent_router.extract_slots("search", command.lower())
+        kind, query = slots.get('kind'), slots.get('query')
+        if kind in ("google", "search"):
             return self.google_search(query)
-        elif command.lower().startswith("image ") or command.lower().startswith("images "):
-            query = command.split(" ", 1)[1]
+        elif kind in ("image", "images"):
             return self.google_image_search(query)
-        elif command.lower().startswith("news "):
-            query = command.split(" ", 1)[1]
+        elif kind == "news":
             return self.google_news_search(query)
         else:
             return "🔍 Please specify what you want to search for."
@@ -4308,7 +4612,7 @@ class EnhancedJarvisGUI:
             return f"❌ Error handling navigation command: {e}"
 
     def _handle_multi_intent_command(self, command):
-        """Handle compound commands by planning and executing sequentially."""
+        """Handle compound commands by planning and executing their steps."""
         try:
             if not hasattr(self, 'multi_planner') or self.multi_planner is None:
                 return "🧩 Multi-intent module isn't available right now."
@@ -4329,26 +4633,16 @@ class EnhancedJarvisGUI:
         else:
             return self.handle_file_operations(command)
     
-    def _handle_media_command(self, command):
+    def _handle_media_command(self, command, slots=None):
         """Handle media commands efficiently."""
         cmd = command.lower().strip()
+        if slots is None:
+            slots = self.intent_router.extract_slots("media", cmd)
 
-        # Play on YouTube: tolerate extra words and punctuation
-        patterns = [
-            r"play\s+(.+?)\s+(?:on|in|from)\s+youtube\b",
-            r"play\s+(?:on|in|from)\s+youtube\s+(.+?)\b",
-            r"play\s+(.+?)\s+youtube\b",
-        ]
-        for pat in patterns:
-            m = re.search(pat, cmd, flags=re.IGNORECASE)
-            if m:
-                query = m.group(1).strip()
-                return self._play_on_youtube_direct(query)
-
-        # Generic "play <query>" defaults to YouTube search
-        m = re.search(r"\bplay\s+(.+)$", cmd, flags=re.IGNORECASE)
-        if m and 'music' not in cmd:
-            query = m.group(1).strip()
+        # Play on YouTube (the router tolerates extra words); a generic
+        # "play <query>" defaults to a YouTube search unless it asks for music
+        query = slots.get('query')
+        if query and ('youtube' in cmd or 'music' not in cmd):
             return self._play_on_youtube_direct(query)
 
         # Music folder/open local player
@@ -4362,14 +4656,13 @@ class EnhancedJarvisGUI:
 
     def _play_on_youtube_direct(self, query: str):
         try:
-            import requests
             import re
             import urllib.parse
             import webbrowser
             q = urllib.parse.quote(query)
             url = f"https://www.youtube.com/results?search_query={q}"
             headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari"}
-            r = requests.get(url, timeout=8, headers=headers)
+            r = self.http.get(url, timeout=8, headers=headers)
             m = re.search(r'"url":"/watch\?v=([^"]+?)"', r.text)
             if not m:
                 m = re.search(r'/watch\?v=([\w-]{11})', r.text)
@@ -4487,7 +4780,7 @@ class EnhancedJarvisGUI:
             
             # Speak response if TTS is enabled and not already speaking
             if enhanced_response and not self.speaking:
-                threading.Thread(target=self.speak_text, args=(enhanced_response,), daemon=True).start()
+                self.speak_text(enhanced_response)
         except Exception as e:
             print(f"Error in display_response: {e}")
             if hasattr(self, 'logger'):
@@ -4584,7 +4877,7 @@ class EnhancedJarvisGUI:
         # Volcano improvement
         if "volcano" in query_lower:
             try:
-                summary = wikipedia.summary("Volcano", sentences=2)
+                summary = self._wikipedia_summary("Volcano", sentences=2)["extract"]
                 return f"🌋 Volcano: {summary}"
             except Exception:
                 return "🌋 A volcano is a rupture in the crust of a planetary-mass object, such as Earth, that allows hot lava, volcanic ash, and gases to escape from a magma chamber below the surface."
@@ -4806,14 +5099,41 @@ class EnhancedJarvisGUI:
                 return f"📚 About {topic.title()}:\n\n{info}\n\nWould you like to know more about any specific aspect of {topic}?"
         return f"🔍 You're searching for information about '{search_term}'. This is an interesting topic! If you want more details, please specify or ask for a Wikipedia summary: 'wikipedia {search_term}'."
 
+    def _wikipedia_summary(self, query, sentences=3):
+        """Best-matching article's intro, title and URL in one API round trip."""
+        lang = getattr(self, 'lang_code', 'en')
+        response = self.http.get(
+            f"https://{lang}.wikipedia.org/w/api.php",
+            params={
+                "action": "query",
+                "format": "json",
+                "formatversion": 2,
+                "generator": "search",
+                "gsrsearch": query,
+                "gsrlimit": 1,
+                "prop": "extracts|info",
+                "exintro": 1,
+                "explaintext": 1,
+                "exsentences": sentences,
+                "inprop": "url",
+                "redirects": 1,
+            },
+            headers={"User-Agent": "SAM-Assistant/2.0"},
+            timeout=8,
+        )
+        response.raise_for_status()
+        pages = response.json().get("query", {}).get("pages", [])
+        if not pages:
+            raise LookupError(f"No Wikipedia article matches '{query}'")
+        page = pages[0]
+        return {"title": page.get("title", query), "extract": page.get("extract", ""), "url": page.get("fullurl", "")}
+
     def search_wikipedia(self, query):
         try:
             if not query:
                 return "Please specify what you'd like to search on Wikipedia."
-            wikipedia.set_lang(self.lang_code)
-            summary = wikipedia.summary(query, sentences=3)
-            page = wikipedia.page(query)
-            response = f"📖 Wikipedia Summary for '{query}':\n\n{summary}\n\n🔗 Full article: {page.url}"
+            page = self._wikipedia_summary(query, sentences=3)
+            response = f"📖 Wikipedia Summary for '{query}':\n\n{page['extract']}\n\n🔗 Full article: {page['url']}"
             return response
         except Exception as e:
             print(f"Error in search_wikipedia: {e}")
@@ -4968,6 +5288,8 @@ Need help with something specific? Just ask!"""
 
     def start_listening(self):
         """Start listening for voice input with Copilot-style feedback."""
+        # Barge-in: the user is about to talk, so stop talking over them
+        self.stop_speaking()
         self.is_listening = True
         self.update_hotword_btn_state()
         self.update_status("Listening...")
@@ -4987,22 +5309,126 @@ Need help with something specific? Just ask!"""
 
     def voice_recognition_thread(self):
         try:
-            # Only use Google (online) speech recognition
+            if self._partials_available():
+                self._stream_voice_command()
+                return
+            # Capture here; recognition runs on the pipeline's STT workers
             with self.microphone as source:
                 self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
                 audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
-            try:
-                text = self.recognizer.recognize_google(audio, language=self.sr_code)
-                self.root.after(0, lambda: self.process_voice_input(text))
-            except sr.UnknownValueError:
-                self.root.after(0, lambda: self.add_to_chat("System", "Could not understand audio. Please try again.", "error"))
-            except sr.RequestError as e:
-                self.root.after(0, lambda: self.add_to_chat("System", f"Could not request results; {e}", "error"))
+            if self.pipeline.submit("stt", audio) is None:
+                self.root.after(0, lambda: self.add_to_chat("System", "I'm still busy with earlier requests. Please try again in a moment.", "warning"))
         except Exception as e:
             self.root.after(0, lambda: self.add_to_chat("System", f"Voice recognition error: {str(e)}", "error"))
         finally:
             self.root.after(0, self.stop_listening)
 
+    def _transcribe(self, audio):
+        """Transcribe captured audio with the STT engine for the current language."""
+        return self.stt.transcribe(
+            audio.get_raw_data(convert_width=2),
+            audio.sample_rate,
+            language=self.sr_code,
+            engine=LANGUAGES[self.language].get("stt_engine"),
+        )
+
+    def _partials_available(self):
+        """Whether commands can be transcribed incrementally while spoken."""
+        if not STT_CONFIG.get("partials", True):
+            return False
+        if not self.stt.streams_partials(self.sr_code, LANGUAGES[self.language].get("stt_engine")):
+            return False
+        if self.command_mic is None:
+            try:
+                # Kept across commands so the ambient calibration is reused
+                self.command_mic = VADMicrophone(max_segment_ms=10000)
+            except Exception as e:
+                print(f"Streaming transcription unavailable: {e}")
+                return False
+        return True
+
+    def _stream_voice_command(self):
+        """Capture one command, transcribing it as it is spoken.
+
+        Partial transcripts are shown in the status bar. Short reversible
+        commands run as soon as the partial settles; the final transcript
+        confirms them or rolls them back before normal processing.
+        """
+        stream = self.stt.open_stream(16000, self.sr_code, LANGUAGES[self.language].get("stt_engine"))
+        speculative = self.speculative if STT_CONFIG.get("speculative_dispatch", True) else None
+        if speculative is not None:
+            speculative.reset()
+        heard_ms, shown = 0, ""
+        for chunk in self.command_mic.utterance(lambda: not self.is_listening):
+            heard_ms += len(chunk) * 1000 // (2 * 16000)
+            partial = stream.accept(chunk)
+            if partial and partial != shown:
+                shown = partial
+                self.root.after(0, lambda p=partial: self.update_status(f"🎤 {p}…"))
+            if partial and speculative is not None:
+                speculative.on_partial(partial, heard_ms)
+        text = stream.finish()
+        if speculative is not None and speculative.on_final(text):
+            # Already carried out from the partial transcript
+            self.root.after(0, lambda: self.add_to_chat("User (Voice)", text, "user"))
+            return
+        if text:
+            self.root.after(0, lambda: self.process_voice_input(text))
+        else:
+            self.root.after(0, lambda: self.add_to_chat("System", "Could not understand audio. Please try again.", "error"))
+
+    def _run_speculative_command(self, command):
+        response = self._handle_system_command(command)
+        if response:
+            self.root.after(0, lambda: self.add_to_chat("SAM", response, "jarvis"))
+
+    def _capture_speculative_state(self, state):
+        """Current mute flag, volume level or brightness; None when it cannot be read."""
+        if state == "brightness":
+            return self._get_current_brightness()
+        devices, volume = self._get_volume_controller()
+        if volume is None:
+            return None
+        if state == "mute":
+            return bool(volume.GetMute())
+        if state == "volume":
+            return volume.GetMasterVolumeLevelScalar()
+        return None
+
+    def _restore_speculative_state(self, state, prior):
+        """Put back what _capture_speculative_state read before a speculative command."""
+        if state == "brightness":
+            ok, message = self._set_brightness_percent(prior)
+            if not ok:
+                raise RuntimeError(message)
+            return
+        devices, volume = self._get_volume_controller()
+        if volume is None:
+            raise RuntimeError("volume control is no longer available")
+        if state == "mute":
+            volume.SetMute(1 if prior else 0, None)
+        elif state == "volume":
+            volume.SetMasterVolumeLevelScalar(prior, None)
+
+    def _on_speculative_rollback(self, command, final_text, error=None):
+        if error:
+            message = f"⚠️ Couldn't undo '{command}' ({error}) — you said '{final_text or '…'}'."
+        else:
+            message = f"↩️ Undid '{command}' — you said '{final_text or '…'}'."
+        self.root.after(0, lambda: self.add_to_chat("System", message, "system"))
+
+    def _stt_stage(self, job, audio):
+        """Pipeline "stt" stage: speech recognition."""
+        try:
+            text = self._transcribe(audio)
+            if text:
+                self.pipeline.to_ui(self.process_voice_input, text)
+            else:
+                self.pipeline.to_ui(self.add_to_chat, "System", "Could not understand audio. Please try again.", "error")
+        except STTError as e:
+            self.pipeline.to_ui(self.add_to_chat, "System", f"Could not request results; {e}", "error")
+        return None
+
     def process_voice_input(self, text):
         """Process voice input and add to text input for editing."""
         # Add to text input for editing
@@ -5012,32 +5438,19 @@ Need help with something specific? Just ask!"""
         # Add to chat
         self.add_to_chat("User (Voice)", text, "user")
         
-        # Process command
-        self.process_command(text)
+        # Process command; a newer utterance supersedes an unfinished one
+        if not self._submit_command(text, supersede="voice"):
+            self.add_to_chat("System", "I'm still busy with earlier requests. Please try again in a moment.", "warning")
 
     def speak_text(self, text):
         """Convert text to speech using TTS engine - enhanced for human-like voice."""
         if not text:
             return
         try:
-            # Enqueue text for the TTS worker to speak sequentially
-            if hasattr(self, 'tts_queue') and self.tts_queue:
-                self.tts_queue.put(text)
-            else:
-                # Fallback: speak synchronously
-                if not hasattr(self, 'tts_engine') or self.tts_engine is None:
-                    self.tts_engine = pyttsx3.init()
-                    self.update_tts_settings()
-                self._apply_enhanced_tts_settings()
-                self.tts_engine.say(self._prepare_text_for_speech(text))
-                self.tts_engine.runAndWait()
+            # Queued sentence by sentence; speech of a superseded command is dropped
+            self.tts.speak(self._prepare_text_for_speech(text), job=current_job())
         except Exception as e:
             print(f"TTS Error: {e}")
-            try:
-                self.tts_engine = pyttsx3.init()
-                self.update_tts_settings()
-            except Exception:
-                pass
     
     def _prepare_text_for_speech(self, text):
         """Prepare text for more natural speech synthesis."""
@@ -5060,39 +5473,31 @@ Need help with something specific? Just ask!"""
 
     def stop_speaking(self):
         try:
-            if hasattr(self, 'tts_engine') and self.tts_engine:
-                self.tts_engine.stop()
-            if hasattr(self, 'tts_queue') and self.tts_queue:
-                # Clear queued items
-                while not self.tts_queue.empty():
-                    try:
-                        self.tts_queue.get_nowait()
-                    except Exception:
-                        break
+            # Stops the current sentence and clears queued ones
+            self.tts.interrupt()
         except Exception:
             pass
     
-    def _apply_enhanced_tts_settings(self):
-        """Apply enhanced TTS settings for more human-like speech with multi-language support."""
+    def _apply_enhanced_tts_settings(self, engine):
+        """Apply the speech settings to the TTS service's engine (runs on its worker thread)."""
         try:
-            if hasattr(self, 'tts_engine') and self.tts_engine:
-                # Optimize speech rate for natural conversation (not too fast, not too slow)
-                natural_rate = 140  # Slightly slower than default for more natural flow
-                self.tts_engine.setProperty('rate', natural_rate)
-                
-                # Set volume to comfortable level
-                self.tts_engine.setProperty('volume', 0.85)
-                
-                # Set language-specific voice
-                self._set_language_voice()
+            engine.setProperty('rate', self.tts_rate)
+            engine.setProperty('volume', self.tts_volume)
+            
+            # The voice picked in settings, else one for the current language
+            voice_id = getattr(self, 'tts_voice_id', None)
+            if voice_id and any(v.id == voice_id for v in engine.getProperty('voices') or []):
+                engine.setProperty('voice', voice_id)
+            else:
+                self._set_language_voice(engine)
                         
         except Exception as e:
             print(f"Error applying enhanced TTS settings: {e}")
     
-    def _set_language_voice(self):
+    def _set_language_voice(self, engine):
         """Set the appropriate voice for the current language."""
         try:
-            voices = self.tts_engine.getProperty('voices')
+            voices = engine.getProperty('voices')
             if not voices:
                 return
             
@@ -5104,7 +5509,7 @@ Need help with something specific? Just ask!"""
             if target_voice_id:
                 for voice in voices:
                     if target_voice_id in voice.id:
-                        self.tts_engine.setProperty('voice', voice.id)
+                        engine.setProperty('voice', voice.id)
                         print(f"Set voice to: {voice.name} for {current_lang}")
                         return
             
@@ -5120,12 +5525,12 @@ Need help with something specific? Just ask!"""
                 voice_name = voice.name.lower()
                 voice_id = voice.id.lower()
                 if any(keyword in voice_name or keyword in voice_id for keyword in target_keywords):
-                    self.tts_engine.setProperty('voice', voice.id)
+                    engine.setProperty('voice', voice.id)
                     print(f"Set fallback voice to: {voice.name} for {current_lang}")
                     return
             
             # Final fallback: use first available voice
-            self.tts_engine.setProperty('voice', voices[0].id)
+            engine.setProperty('voice', voices[0].id)
             print(f"Using default voice: {voices[0].name}")
             
         except Exception as e:
@@ -5137,7 +5542,7 @@ Need help with something specific? Just ask!"""
     def stop_speech(self):
         """Stop speech playback."""
         try:
-            self.speaking = False
+            self.stop_speaking()
             # Only try to stop pygame mixer if it's initialized
             try:
                 pygame.mixer.music.stop()
@@ -5212,33 +5617,46 @@ Need help with something specific? Just ask!"""
 
     def clear_chat(self):
         """Clear the chat area."""
-        # Clear all widgets in the scrollable frame
-        for widget in self.chat_scrollable_frame.winfo_children():
-            widget.destroy()
+        # Clear the chat bubbles and any typing indicator
+        self.chat_view.clear()
+        self.hide_typing_indicator()
         
-        # Clear conversation history
-        self.conversation_history.clear()
-        self.save_profile()
+        # Start a new session; the old one stays searchable and can be paged back in
+        self.conversation.new_session()
+        self._history_cursor = self.conversation.session_start_id
         
         # Add welcome message
         self.add_to_chat("SAM", "Chat cleared. How can I help you today?", "info")
 
+    def _load_earlier_chat(self, limit):
+        """Older stored messages for the chat view, walking back from the current session."""
+        page = self.conversation.page("*", before_id=self._history_cursor, limit=limit)
+        if page:
+            self._history_cursor = page[0]["id"]
+        return [
+            (m["sender"], m["content"], datetime.datetime.fromisoformat(m["timestamp"]).strftime("%d %b %H:%M"))
+            for m in page
+        ]
+
     def export_chat(self):
         try:
-            if not self.conversation_history:
+            if not self.conversation.count():
                 self.add_to_chat("System", "No conversation to export.", "system")
                 return
             filename = filedialog.asksaveasfilename(
                 defaultextension=".txt",
-                filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+                filetypes=[("Text files", "*.txt"), ("JSON lines", "*.jsonl"), ("All files", "*.*")],
                 title="Export Chat History"
             )
             if filename:
+                # Streamed from the store in batches, never loaded whole
                 with open(filename, 'w', encoding='utf-8') as f:
-                    f.write("SAM Chat History\n")
-                    f.write("=" * 50 + "\n\n")
-                    for entry in self.conversation_history:
-                        f.write(f"[{entry['timestamp']}] {entry['sender']}: {entry['message']}\n\n")
+                    if filename.endswith(".jsonl"):
+                        self.conversation.export(f, fmt="jsonl")
+                    else:
+                        f.write("SAM Chat History\n")
+                        f.write("=" * 50 + "\n\n")
+                        self.conversation.export(f)
                 self.add_to_chat("System", f"Chat exported to {filename}", "system")
         except Exception as e:
             print(f"Error in export_chat: {e}")
@@ -5709,22 +6127,26 @@ Created with ❤️ using Python and Tkinter
         voice_select_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
         voice_select_frame.pack(fill="x", pady=(0, 10))
         
-        # Get available voices
-        voices = self.tts_engine.getProperty('voices')
-        self.voice_var = tk.StringVar(value=self.tts_engine.getProperty('voice'))
+        # Get available voices (id, name) from the TTS service's engine
+        try:
+            voices = self.tts.voices()
+        except Exception as e:
+            print(f"Could not list TTS voices: {e}")
+            voices = []
+        self.voice_var = tk.StringVar(value=getattr(self, 'tts_voice_id', None) or "")
         
         # Create voice options with preview
-        for voice in voices:
+        for voice_id, voice_name in voices:
             voice_option_frame = ctk.CTkFrame(voice_select_frame, fg_color="transparent")
             voice_option_frame.pack(fill="x", pady=2)
             
             # Radio button
             radio_btn = ctk.CTkRadioButton(
                 voice_option_frame,
-                text=voice.name,
+                text=voice_name,
                 variable=self.voice_var,
-                value=voice.id,
-                command=lambda vid=voice.id: self.set_tts_voice(vid),
+                value=voice_id,
+                command=lambda vid=voice_id: self.set_tts_voice(vid),
                 fg_color=THEMES[self.theme]["accent"],
                 hover_color=THEMES[self.theme]["accent_hover"],
                 font=("Segoe UI", 10)
@@ -5737,7 +6159,7 @@ Created with ❤️ using Python and Tkinter
                 text="🔊 Preview",
                 width=80,
                 height=25,
-                command=lambda vid=voice.id: self._preview_voice(vid),
+                command=lambda vid=voice_id: self._preview_voice(vid),
                 fg_color=THEMES[self.theme]["btnbg"],
                 hover_color=THEMES[self.theme]["btnbg_hover"],
                 font=("Segoe UI", 9)
@@ -5835,6 +6257,19 @@ Created with ❤️ using Python and Tkinter
         )
         save_hotword_btn.pack(side="right")
 
+        # Record the wake word so it can be detected without the network
+        train_hotword_btn = ctk.CTkButton(
+            hotword_frame,
+            text="🎤 Train Wake Word (offline detection)",
+            command=self._train_hotword,
+            fg_color=THEMES[self.theme]["accent"],
+            hover_color=THEMES[self.theme]["accent_hover"],
+            font=("Segoe UI", 10)
+        )
+        train_hotword_btn.pack(fill="x", pady=(5, 0))
+        if self.keyword_spotter is None:
+            train_hotword_btn.configure(state="disabled")
+
     def _create_email_section(self, parent):
         """Create email settings section."""
         # Email section frame
@@ -6152,9 +6587,9 @@ Created with ❤️ using Python and Tkinter
     def _preview_voice(self, voice_id):
         """Preview selected voice."""
         try:
-            self.tts_engine.setProperty('voice', voice_id)
-            self.tts_engine.say("This is a preview of the selected voice.")
-            self.tts_engine.runAndWait()
+            # Applied after the saved settings for this one utterance
+            self.tts.configure(voice=voice_id)
+            self.tts.speak("This is a preview of the selected voice.", interrupt=True)
         except Exception as e:
             messagebox.showerror("Voice Preview Error", f"Could not preview voice: {str(e)}")
 
@@ -6168,6 +6603,36 @@ Created with ❤️ using Python and Tkinter
         else:
             messagebox.showerror("Error", "Please enter a wake word.")
 
+    def _train_hotword(self):
+        """Record the current wake word a few times for offline detection."""
+        keyword = self.hotword_var.get().strip().lower()
+        if not keyword:
+            messagebox.showerror("Error", "Please enter a wake word.")
+            return
+        if self.keyword_spotter is None:
+            messagebox.showerror("Error", "Offline wake word detection is unavailable (numpy is required).")
+            return
+        if self.hotword_enabled:
+            messagebox.showinfo("Train Wake Word", "Turn hotword detection off before training.")
+            return
+        samples = KWS_CONFIG.get("enroll_samples", 3)
+        self.add_to_chat("System", f"Say '{keyword}' {samples} times, pausing after each one.", "system")
+        threading.Thread(target=self._record_hotword_samples, args=(keyword, samples), daemon=True).start()
+
+    def _record_hotword_samples(self, keyword, samples):
+        try:
+            mic = VADMicrophone(max_segment_ms=3000)
+            self.keyword_spotter.remove(keyword)
+            recorded = 0
+            for audio in mic.segments(lambda: False):
+                recorded = self.keyword_spotter.enroll(keyword, audio.frame_data, audio.sample_rate)
+                self.root.after(0, lambda n=recorded: self.add_to_chat("System", f"Got it ({n}/{samples}).", "system"))
+                if recorded >= samples:
+                    break
+            self.root.after(0, lambda: self.add_to_chat("System", f"Wake word '{keyword}' will now be detected offline.", "success"))
+        except Exception as e:
+            self.root.after(0, lambda err=e: self.add_to_chat("System", f"Wake word training failed: {err}", "error"))
+
     def _test_gmail_connection(self):
         """Test Gmail connection."""
         addr = self.gmail_addr_var.get().strip()
@@ -6319,6 +6784,59 @@ Created with ❤️ using Python and Tkinter
         self.hotword_thread.start()
 
     def hotword_listener(self):
+        """Listen for a hotword, sending only locally detected speech to STT."""
+        try:
+            if getattr(self, 'hotword_mic', None) is None:
+                # Kept across toggles so the ambient calibration is reused
+                self.hotword_mic = VADMicrophone(max_segment_ms=3000)
+        except Exception as e:
+            print(f"VAD front end unavailable, using timed clips: {e}")
+            return self._hotword_listener_clips()
+
+        missed_count = 0
+        while self.hotword_enabled:
+            detected = False
+            try:
+                # The stream stays open (no per-clip noise adjustment) until a
+                # hotword is heard or detection is turned off
+                for audio in self.hotword_mic.segments(lambda: not self.hotword_enabled):
+                    spotter = self.keyword_spotter
+                    if spotter is not None:
+                        # Hotwords may change in settings or with the profile
+                        spotter.set_keywords(self.hotwords)
+                        if spotter.detect(audio.frame_data, audio.sample_rate):
+                            detected = True
+                            break
+                    if spotter is not None and all(spotter.can_detect(hw) for hw in self.hotwords):
+                        # Every hotword is enrolled: no need to ask the cloud
+                        text = ""
+                    else:
+                        try:
+                            text = self._transcribe(audio)
+                        except STTError:
+                            continue
+                    if text and any(hw in text.strip().lower() for hw in self.hotwords):
+                        detected = True
+                        break
+                    missed_count += 1
+                    if missed_count >= 3:
+                        self.root.after(0, lambda: self.add_to_chat("System", f"Didn't catch any hotword. Please say one of: {', '.join(self.hotwords)}", "warning"))
+                        missed_count = 0
+            except Exception as e:
+                print(f"Hotword audio error: {e}")
+                time.sleep(1)
+                continue
+            if detected:
+                # The microphone is released above, so command capture can open it.
+                # Mark listening now so this loop cannot reopen it first.
+                self.is_listening = True
+                self.root.after(0, self.on_hotword_detected)
+                missed_count = 0
+                while self.is_listening and self.hotword_enabled:
+                    time.sleep(0.5)
+
+    def _hotword_listener_clips(self):
+        """Fallback without numpy: recognize fixed-length clips."""
         recognizer = sr.Recognizer()
         missed_count = 0
         while self.hotword_enabled:
@@ -6327,7 +6845,7 @@ Created with ❤️ using Python and Tkinter
                     recognizer.adjust_for_ambient_noise(source, duration=0.3)
                     audio = recognizer.listen(source, timeout=4, phrase_time_limit=3)
                 try:
-                    text = recognizer.recognize_google(audio, language=self.sr_code)
+                    text = self._transcribe(audio)
                     # --- Multiple hotwords support ---
                     if any(hw in text.strip().lower() for hw in self.hotwords):
                         self.root.after(0, self.on_hotword_detected)
@@ -6340,13 +6858,7 @@ Created with ❤️ using Python and Tkinter
                         if missed_count >= 3:
                             self.root.after(0, lambda: self.add_to_chat("System", f"Didn't catch any hotword. Please say one of: {', '.join(self.hotwords)}", "warning"))
                             missed_count = 0
-                except sr.UnknownValueError:
-                    missed_count += 1
-                    if missed_count >= 3:
-                        self.root.after(0, lambda: self.add_to_chat("System", f"Didn't catch any hotword. Please say one of: {', '.join(self.hotwords)}", "warning"))
-                        missed_count = 0
-                    continue
-                except sr.RequestError:
+                except STTError:
                     continue
             except Exception:
                 continue
@@ -6400,6 +6912,11 @@ Created with ❤️ using Python and Tkinter
                 self.stop_speech()
             except:
                 pass
+            try:
+                self.pipeline.stop()
+                self.tts.stop()
+            except:
+                pass
                 
             for file in os.listdir():
                 if file.startswith("temp_audio_") and file.endswith(".mp3"):
@@ -6451,45 +6968,13 @@ Created with ❤️ using Python and Tkinter
             return f"❌ Error executing code: {str(e)}\n⚠️ Only simple Python code is allowed."
 
     def update_tts_settings(self):
-        """Update TTS engine settings, prioritizing language-specific voices."""
+        """Apply changed speech settings from the next utterance on.
+
+        The TTS worker re-applies rate, volume and voice (the chosen one, else
+        one for the current language) to its engine before each utterance.
+        """
         try:
-            if hasattr(self, 'tts_engine') and self.tts_engine:
-                voices = self.tts_engine.getProperty('voices')
-                
-                # Try to find a voice matching the current speech recognition language code
-                # For example, if sr_code is 'en-US', look for voices with 'en-us' in their ID or name
-                target_lang_code = self.sr_code.lower()  # e.g., 'en-us', 'hi-in'
-                
-                found_voice_id = None
-                # First, try to find an exact match for the current tts_voice_id if it's set
-                if hasattr(self, 'tts_voice_id') and self.tts_voice_id:
-                    for v in voices:
-                        if v.id == self.tts_voice_id:
-                            found_voice_id = v.id
-                            break
-                
-                # If no specific voice was set or found, try to find one matching the language
-                if not found_voice_id:
-                    for v in voices:
-                        # Check if language info is in the voice ID or name
-                        if target_lang_code in v.id.lower() or target_lang_code.split('-')[0] in v.id.lower():
-                            found_voice_id = v.id
-                            break
-                
-                # Fallback to the first available voice if no language-specific voice is found
-                if not found_voice_id and voices:
-                    found_voice_id = voices[0].id
-                
-                if found_voice_id:
-                    self.tts_engine.setProperty('voice', found_voice_id)
-                    self.tts_voice_id = found_voice_id  # Update the stored voice ID
-                else:
-                    print("No TTS voices found or selected.")
-                
-                if hasattr(self, 'tts_rate'):
-                    self.tts_engine.setProperty('rate', self.tts_rate)
-                if hasattr(self, 'tts_volume'):
-                    self.tts_engine.setProperty('volume', self.tts_volume)
+            self.tts.configure(rate=self.tts_rate, volume=self.tts_volume)
         except Exception as e:
             print(f"Error updating TTS settings: {e}")
 
@@ -6858,51 +7343,47 @@ Try asking for one of these specific topics, or ask me to explain any of these c
     def load_or_prompt_profile(self):
         """Load or prompt for user profile."""
         try:
-            # Try to load existing profile
-            profile_files = glob.glob("profile_*.json")
-            if profile_files:
-                # Load the most recent profile
-                latest_profile = max(profile_files, key=os.path.getctime)
-                with open(latest_profile, 'r') as f:
-                    profile_data = json.load(f)
-                    self.username = profile_data.get('username', 'Default')
-                    self.profile_picture_path = profile_data.get('profile_picture', None)
-                    
-                    # Load Gmail credentials if available
-                    self.gmail_address = profile_data.get('gmail_address', None)
-                    self.gmail_app_password = profile_data.get('gmail_app_password', None)
-                    
-                    # Load other settings
-                    if 'theme' in profile_data:
-                        self.theme = profile_data.get('theme', 'copilot_dark')
-                    if 'language' in profile_data:
-                        self.language = profile_data.get('language', 'English')
-                        self.lang_code = LANGUAGES[self.language]["code"]
-                        self.sr_code = LANGUAGES[self.language]["sr_code"]
-                    if 'chat_font_size' in profile_data:
-                        self.chat_font_size = profile_data.get('chat_font_size', 13)
-                    if 'hotwords' in profile_data:
-                        self.hotwords = profile_data.get('hotwords', ['sam', 'jarvis'])
-                    if 'tts_voice_id' in profile_data:
-                        self.tts_voice_id = profile_data.get('tts_voice_id', None)
-                    # Planner settings
-                    if 'planner_enabled' in profile_data:
-                        self.planner_enabled = bool(profile_data.get('planner_enabled', True))
-                    if 'planning_strategy' in profile_data:
-                        self.planning_strategy = profile_data.get('planning_strategy', 'simple')
-                    # Automation settings
-                    if 'automation_strategy' in profile_data:
-                        self.automation_strategy = profile_data.get('automation_strategy', 'direct')
-                    
-                    # Update Gmail status if UI is available
-                    if hasattr(self, 'update_gmail_status'):
-                        self.update_gmail_status()
-                    
-                    # Update TTS settings after loading profile
-                    if hasattr(self, 'update_tts_settings'):
-                        self.update_tts_settings()
-                    
-                    return
+            # Load the last used profile named in the profile index
+            profile_data = self.profiles.load()
+            if profile_data is not None:
+                self.username = profile_data.get('username', 'Default')
+                self.profile_picture_path = profile_data.get('profile_picture', None)
+                
+                # Load Gmail credentials if available
+                self.gmail_address = profile_data.get('gmail_address', None)
+                self.gmail_app_password = profile_data.get('gmail_app_password', None)
+                
+                # Load other settings
+                if 'theme' in profile_data:
+                    self.theme = profile_data.get('theme', 'copilot_dark')
+                if 'language' in profile_data:
+                    self.language = profile_data.get('language', 'English')
+                    self.lang_code = LANGUAGES[self.language]["code"]
+                    self.sr_code = LANGUAGES[self.language]["sr_code"]
+                if 'chat_font_size' in profile_data:
+                    self.chat_font_size = profile_data.get('chat_font_size', 13)
+                if 'hotwords' in profile_data:
+                    self.hotwords = profile_data.get('hotwords', ['sam', 'jarvis'])
+                if 'tts_voice_id' in profile_data:
+                    self.tts_voice_id = profile_data.get('tts_voice_id', None)
+                # Planner settings
+                if 'planner_enabled' in profile_data:
+                    self.planner_enabled = bool(profile_data.get('planner_enabled', True))
+                if 'planning_strategy' in profile_data:
+                    self.planning_strategy = profile_data.get('planning_strategy', 'simple')
+                # Automation settings
+                if 'automation_strategy' in profile_data:
+                    self.automation_strategy = profile_data.get('automation_strategy', 'direct')
+                
+                # Update Gmail status if UI is available
+                if hasattr(self, 'update_gmail_status'):
+                    self.update_gmail_status()
+                
+                # Update TTS settings after loading profile
+                if hasattr(self, 'update_tts_settings'):
+                    self.update_tts_settings()
+                
+                return
             
             # If no profile exists, prompt for one
             self.username, self.profile_picture_path = self.prompt_for_profile()
@@ -6911,8 +7392,24 @@ Try asking for one of these specific topics, or ask me to explain any of these c
             self.username = "Default"
             self.profile_picture_path = None
 
+    def schedule_profile_save(self):
+        """Save the profile once changes stop arriving for PROFILE_CONFIG["save_delay_ms"]."""
+        try:
+            if self._save_profile_after_id:
+                self.root.after_cancel(self._save_profile_after_id)
+            self._save_profile_after_id = self.root.after(PROFILE_CONFIG["save_delay_ms"], self.save_profile)
+        except Exception:
+            # fallback in rare headless cases
+            self.save_profile()
+
     def save_profile(self):
-        """Save current profile settings to file."""
+        """Save current profile settings to file if they changed."""
+        if self._save_profile_after_id:
+            try:
+                self.root.after_cancel(self._save_profile_after_id)
+            except Exception:
+                pass
+            self._save_profile_after_id = None
         # Ensure username is set
         if not hasattr(self, 'username') or self.username is None:
             self.username = "User"
@@ -6929,15 +7426,11 @@ Try asking for one of these specific topics, or ask me to explain any of these c
             'planner_enabled': getattr(self, 'planner_enabled', True),
             'planning_strategy': getattr(self, 'planning_strategy', 'simple'),
             'automation_strategy': getattr(self, 'automation_strategy', 'direct'),
-            'last_updated': datetime.datetime.now().isoformat()
         }
         try:
-            # Clean username for filename
-            clean_username = str(self.username).replace(' ', '_').replace('/', '_').replace('\\', '_')
-            filename = f"profile_{clean_username}.json"
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, indent=2, ensure_ascii=False)
-            print(f"Profile saved to {filename}")
+            # Skipped when nothing changed; otherwise written atomically
+            if self.profiles.save(self.username, profile_data):
+                print(f"Profile saved to {self.profiles.filename(self.username)}")
         except Exception as e:
             print(f"Could not save profile: {e}")
             try:
@@ -7011,9 +7504,12 @@ Try asking for one of these specific topics, or ask me to explain any of these c
             return True
         return False
 
+    def _serpapi_search(self, params):
+        """Run a SerpAPI query over the pooled client; returns the JSON result."""
+        response = self.http.get("https://serpapi.com/search.json", params=params, timeout=10)
+        return response.json()
+
     def google_search(self, query):
-        if not GoogleSearch:
-            return "SerpAPI is not installed. Please run: pip install google-search-results"
         params = {
             "engine": "google",
             "q": query,
@@ -7021,8 +7517,7 @@ Try asking for one of these specific topics, or ask me to explain any of these c
             "num": 3
         }
         try:
-            search = GoogleSearch(params)
-            results = search.get_dict()
+            results = self._serpapi_search(params)
             if "error" in results:
                 return f"SerpAPI error: {results['error']}"
             answer = ""
@@ -7036,8 +7531,6 @@ Try asking for one of these specific topics, or ask me to explain any of these c
             return f"Error using SerpAPI: {e}"
 
     def google_image_search(self, query):
-        if not GoogleSearch:
-            return "SerpAPI is not installed. Please run: pip install google-search-results"
         params = {
             "engine": "google_images",
             "q": query,
@@ -7045,8 +7538,7 @@ Try asking for one of these specific topics, or ask me to explain any of these c
             "num": 3
         }
         try:
-            search = GoogleSearch(params)
-            results = search.get_dict()
+            results = self._serpapi_search(params)
             if "error" in results:
                 return f"SerpAPI error: {results['error']}"
             images = results.get("images_results", [])
@@ -7064,8 +7556,6 @@ Try asking for one of these specific topics, or ask me to explain any of these c
             return f"Error using SerpAPI for images: {e}"
 
     def google_news_search(self, query):
-        if not GoogleSearch:
-            return "SerpAPI is not installed. Please run: pip install google-search-results"
         params = {
             "engine": "google_news",
             "q": query,
@@ -7073,8 +7563,7 @@ Try asking for one of these specific topics, or ask me to explain any of these c
             "num": 5
         }
         try:
-            search = GoogleSearch(params)
-            results = search.get_dict()
+            results = self._serpapi_search(params)
             if "error" in results:
                 return f"SerpAPI error: {results['error']}"
             news = results.get("news_results", [])
@@ -7087,8 +7576,8 @@ Try asking for one of these specific topics, or ask me to explain any of these c
         except Exception as e:
             return f"Error using SerpAPI for news: {e}"
 
-    def mistral_chat(self, prompt, model="mistral-medium"):
-        """Human-like AI responses with natural conversation flow"""
+    def _build_mistral_request(self, prompt, model, stream=False):
+        """Build the Mistral chat completion URL, headers and payload."""
         url = "https://api.mistral.ai/v1/chat/completions"
         headers = {
             "Authorization": f"Bearer {MISTRAL_API_KEY}",
@@ -7099,13 +7588,11 @@ Try asking for one of these specific topics, or ask me to explain any of these c
         conversation_context = []
         
         # Add recent conversation history for context (last 5 messages)
-        if hasattr(self, 'conversation_history') and len(self.conversation_history) > 0:
-            recent_messages = self.conversation_history[-5:]
-            for msg in recent_messages:
-                if msg['sender'] == 'User':
-                    conversation_context.append({"role": "user", "content": msg['message']})
-                elif msg['sender'] == 'SAM':
-                    conversation_context.append({"role": "assistant", "content": msg['message']})
+        for msg in self.conversation.recent(5):
+            if msg['sender'] == 'User':
+                conversation_context.append({"role": "user", "content": msg['content']})
+            elif msg['sender'] == 'SAM':
+                conversation_context.append({"role": "assistant", "content": msg['content']})
         
         # Add current prompt with language context
         current_lang = getattr(self, 'language', 'English')
@@ -7159,17 +7646,140 @@ Try asking for one of these specific topics, or ask me to explain any of these c
             "max_tokens": 300,  # Allow for more natural responses
             "temperature": 0.7,  # More creative and human-like
             "top_p": 0.9,
-            "stream": False
+            "stream": stream
+        }
+        return url, headers, data
+
+    def _mistral_cache_args(self, prompt, data, intent):
+        """Cache key parts for a Mistral request: the system prompt is the
+        persona and every message before the current prompt is the context."""
+        messages = data["messages"]
+        return {
+            "prompt": prompt,
+            "persona": messages[0]["content"],
+            "language": getattr(self, 'language', 'English'),
+            "context": json.dumps(messages[1:-1], ensure_ascii=False),
+            "model": data["model"],
+            "intent": intent,
         }
+
+    def mistral_chat(self, prompt, model="mistral-medium", intent="chat"):
+        """Human-like AI responses with natural conversation flow"""
+        url, headers, data = self._build_mistral_request(prompt, model)
+        cache = getattr(self, 'response_cache', None)
+        cache_args = self._mistral_cache_args(prompt, data, intent)
+        if cache is not None:
+            cached = cache.get(**cache_args)
+            if cached is not None:
+                return cached
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=15)
+            response = self.http.post(url, headers=headers, json=data, timeout=15, retry=True)
             response.raise_for_status()
             result = response.json()
-            return result['choices'][0]['message']['content'].strip()
+            reply = result['choices'][0]['message']['content'].strip()
+            if cache is not None:
+                cache.put(response=reply, **cache_args)
+            return reply
         except Exception as e:
             # Enhanced fallback with more personality
             print(f"Mistral API error: {e}")
             return self._get_fallback_response(prompt)
+
+    def mistral_chat_stream(self, prompt, model="mistral-medium", intent="chat"):
+        """Stream a Mistral reply as text chunks (server-sent events)."""
+        url, headers, data = self._build_mistral_request(prompt, model, stream=True)
+        cache = getattr(self, 'response_cache', None)
+        cache_args = self._mistral_cache_args(prompt, data, intent)
+        if cache is not None:
+            cached = cache.get(**cache_args)
+            if cached is not None:
+                yield cached
+                return
+        emitted = False
+        parts = []
+        try:
+            with self.http.post(url, headers=headers, json=data, timeout=15, stream=True, retry=True) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        break
+                    delta = json.loads(payload)['choices'][0].get('delta', {})
+                    chunk = delta.get('content') or ""
+                    if chunk:
+                        emitted = True
+                        parts.append(chunk)
+                        yield chunk
+        except Exception as e:
+            print(f"Mistral API error: {e}")
+            # Only fall back if nothing reached the user yet
+            if not emitted:
+                yield self._get_fallback_response(prompt)
+            return
+        # Only cache replies that streamed to completion
+        reply = "".join(parts).strip()
+        if cache is not None and reply:
+            cache.put(response=reply, **cache_args)
+
+    def _stream_ai_response(self, prompt):
+        """Stream an AI reply into one growing chat bubble and speak it by sentence.
+
+        Runs on the command worker thread; widget updates are marshalled to
+        the Tk thread and coalesced so a fast stream cannot flood the loop.
+        Returns the full reply text.
+        """
+        timestamp = datetime.datetime.now().strftime("%H:%M")
+        state = {"index": None, "text": "", "pending": False}
+        ready = threading.Event()
+
+        def create_bubble():
+            try:
+                self.hide_typing_indicator()
+                state["index"] = self.chat_view.append("SAM", "…", timestamp)
+            finally:
+                ready.set()
+
+        def refresh():
+            state["pending"] = False
+            if state["index"] is not None:
+                self.chat_view.update(state["index"], state["text"] or "…")
+
+        self.root.after(0, create_bubble)
+        ready.wait(timeout=2.0)
+
+        sentences = SentenceBuffer()
+        parts = []
+        job = current_job()
+        for chunk in self.mistral_chat_stream(prompt):
+            if job is not None and job.cancelled:
+                break  # superseded by a newer command
+            parts.append(chunk)
+            state["text"] = "".join(parts)
+            if not state["pending"]:
+                state["pending"] = True
+                self.root.after(0, refresh)
+            # Hand each finished sentence to TTS while the rest streams in
+            for sentence in sentences.feed(chunk):
+                self.speak_text(sentence)
+        tail = sentences.flush()
+        if tail:
+            self.speak_text(tail)
+
+        text = "".join(parts).strip()
+        if not text:
+            text = "🤖 I'm not sure how to respond to that. Could you try rephrasing your question or ask me something else?"
+            self.speak_text(text)
+        state["text"] = text
+
+        def finish():
+            refresh()
+            self._record_chat_message("SAM", text, "jarvis", timestamp)
+            self.update_status("Ready")
+        # Scheduled directly: the bubble already exists even if superseded
+        self.root.after(0, finish)
+        return text
     
     def _get_fallback_response(self, prompt):
         """Provide helpful fallback responses when AI API is unavailable"""
@@ -7283,10 +7893,9 @@ Try asking for one of these specific topics, or ask me to explain any of these c
 
     def insert_image_to_chat(self, image_url):
         try:
-            import requests
             from PIL import Image
             from io import BytesIO
-            response = requests.get(image_url, timeout=10)
+            response = self.http.get(image_url, timeout=10)
             img = Image.open(BytesIO(response.content))
             img.thumbnail((200, 200))  # Resize for chat
             photo = ImageTk.PhotoImage(img)
@@ -22,6 +22,7 @@ from features.security import SecurityController
 from ui.main_window import MainWindow
 from config.settings import *
 from core.llm.gemini_provider import GeminiProvider
+from core.llm_cache import ResponseCache
 
 class EnhancedSAMAssistant(BaseAssistant):
     """Enhanced SAM AI Assistant with all features"""
@@ -83,9 +84,20 @@ class EnhancedSAMAssistant(BaseAssistant):
 
     def initialize_ai(self):
         """Initialize the LLM provider based on configuration"""
+        # One cache outlives provider re-creation on API key changes
+        if getattr(self, "response_cache", None) is None and LLM_CACHE_CONFIG.get("enabled"):
+            try:
+                self.response_cache = ResponseCache(CACHE_DIR / "llm_cache.db", **LLM_CACHE_CONFIG)
+            except Exception as e:
+                self.logger.error(f"Error opening LLM response cache: {e}")
+                self.response_cache = None
         try:
             if AI_CONFIG.get("provider") == "gemini" and API_KEYS.get("gemini"):
-                self.llm = GeminiProvider(api_key=API_KEYS.get("gemini"), model_name=AI_CONFIG.get("model_name"))
+                self.llm = GeminiProvider(
+                    api_key=API_KEYS.get("gemini"),
+                    model_name=AI_CONFIG.get("model_name"),
+                    cache=getattr(self, "response_cache", None),
+                )
                 self.logger.info("Gemini LLM provider initialized")
             else:
                 self.llm = None
@@ -0,0 +1,149 @@
+"""
+Benchmark: per-day stats queries before and after the epoch-column migrations
+
+Builds synthetic productivity tables (and fitness_activities when the
+health module's dependencies are installed), times the original
+``DATE(col) = ?`` queries, applies the schema migrations and times the
+range-scan rewrites on the same data.
+
+    python benchmarks/bench_date_queries.py --rows 1000000
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.db import Database, day_bounds
+from features.productivity import PRODUCTIVITY_MIGRATIONS
+
+try:
+    from features.health_wellness import HEALTH_MIGRATIONS
+except ImportError:
+    HEALTH_MIGRATIONS = None
+
+
+def _timestamps(rows: int, days: int):
+    now = datetime.now()
+    rng = random.Random(42)
+    for _ in range(rows):
+        yield (now - timedelta(seconds=rng.randrange(days * 86400))).isoformat()
+
+
+def _time_query(db: Database, sql: str, params, repeat: int) -> float:
+    conn = db.connection()
+    conn.execute(sql, params).fetchall()  # warm the page cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+CASES = [
+    # (label, db, create, insert, old query, new query)
+    (
+        "tasks completed today", "productivity",
+        "CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, description TEXT, "
+        "priority INTEGER DEFAULT 1, status TEXT DEFAULT 'pending', due_date TEXT, created_at TEXT, "
+        "completed_at TEXT, category TEXT, tags TEXT)",
+        "INSERT INTO tasks (title, status, created_at, completed_at) VALUES ('t', 'completed', ?, ?)",
+        "SELECT COUNT(*) FROM tasks WHERE status = 'completed' AND DATE(completed_at) = ?",
+        "SELECT COUNT(*) FROM tasks WHERE status = 'completed' AND completed_epoch >= ? AND completed_epoch < ?",
+    ),
+    (
+        "hours tracked today", "productivity",
+        "CREATE TABLE time_entries (id INTEGER PRIMARY KEY AUTOINCREMENT, task_id INTEGER, project TEXT, "
+        "description TEXT, start_time TEXT, end_time TEXT, duration INTEGER, created_at TEXT)",
+        "INSERT INTO time_entries (project, duration, created_at, start_time) VALUES ('p', 1800, ?, ?)",
+        "SELECT SUM(duration) FROM time_entries WHERE DATE(start_time) = ?",
+        "SELECT SUM(duration) FROM time_entries WHERE start_epoch >= ? AND start_epoch < ?",
+    ),
+    (
+        "activities today", "health",
+        "CREATE TABLE fitness_activities (id INTEGER PRIMARY KEY AUTOINCREMENT, activity_type TEXT NOT NULL, "
+        "duration INTEGER, calories_burned INTEGER, distance REAL, intensity TEXT, notes TEXT, created_at TEXT)",
+        "INSERT INTO fitness_activities (activity_type, duration, notes, created_at) VALUES ('walking', 30, ?, ?)",
+        "SELECT COUNT(*) FROM fitness_activities WHERE DATE(created_at) = ?",
+        "SELECT COUNT(*) FROM fitness_activities WHERE created_epoch >= ? AND created_epoch < ?",
+    ),
+]
+
+# Tables the migrations touch but the benchmark does not fill; they need
+# every column a migration reads, including the daily rollup value columns
+EXTRA_TABLES = {
+    "productivity": [
+        "CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, description TEXT, "
+        "start_time TEXT, end_time TEXT, location TEXT, attendees TEXT, reminder_time TEXT, created_at TEXT)",
+    ],
+    "health": [
+        "CREATE TABLE meditation_sessions (id INTEGER PRIMARY KEY, duration INTEGER, created_at TEXT)",
+        "CREATE TABLE sleep_data (id INTEGER PRIMARY KEY, quality_score INTEGER, created_at TEXT)",
+        "CREATE TABLE mental_health_entries (id INTEGER PRIMARY KEY, mood_score INTEGER, created_at TEXT)",
+        "CREATE TABLE health_metrics (id INTEGER PRIMARY KEY, metric_type TEXT, recorded_at TEXT)",
+    ],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows per table")
+    parser.add_argument("--days", type=int, default=3 * 365, help="history spread in days")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per query")
+    args = parser.parse_args()
+
+    migrations = {"productivity": PRODUCTIVITY_MIGRATIONS, "health": HEALTH_MIGRATIONS}
+    workdir = Path(tempfile.mkdtemp(prefix="sam_bench_"))
+    databases = {}
+    for name, db_migrations in migrations.items():
+        if db_migrations is None:
+            print(f"[skip] {name}: module dependencies not installed")
+            continue
+        db = Database(workdir / f"{name}.db")
+        conn = db.connection()
+        for ddl in EXTRA_TABLES[name]:
+            conn.execute(ddl)
+        databases[name] = db
+
+    today = datetime.now().date().isoformat()
+    day_start, day_end = day_bounds()
+    results = []
+    for label, name, create, insert, old_sql, new_sql in CASES:
+        db = databases.get(name)
+        if db is None:
+            continue
+        conn = db.connection()
+        conn.execute(create)
+        t0 = time.perf_counter()
+        with db.cursor() as cursor:
+            cursor.executemany(insert, ((ts, ts) for ts in _timestamps(args.rows, args.days)))
+        print(f"[load] {label}: {args.rows:,} rows in {time.perf_counter() - t0:.1f}s")
+        old_ms = _time_query(db, old_sql, (today,), args.repeat)
+        old_value = conn.execute(old_sql, (today,)).fetchone()[0]
+        results.append({"label": label, "db": db, "sql": new_sql, "old_ms": old_ms, "old_value": old_value})
+
+    for name, db in databases.items():
+        t0 = time.perf_counter()
+        db.migrate(migrations[name])
+        print(f"[migrate] {name}: {time.perf_counter() - t0:.1f}s")
+
+    for result in results:
+        db, new_sql = result["db"], result["sql"]
+        result["new_ms"] = _time_query(db, new_sql, (day_start, day_end), args.repeat)
+        result["new_value"] = db.connection().execute(new_sql, (day_start, day_end)).fetchone()[0]
+
+    print()
+    print(f"{'query':<24}{'DATE() ms':>12}{'range ms':>12}{'speedup':>10}  rows match")
+    for r in results:
+        print(f"{r['label']:<24}{r['old_ms']:>12.2f}{r['new_ms']:>12.3f}"
+              f"{r['old_ms'] / r['new_ms']:>9.0f}x  {r['old_value'] == r['new_value']}")
+
+    for db in databases.values():
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: offline keyword spotter accuracy and latency on a WAV corpus
+
+Expects one folder per keyword plus a folder of background clips
+(speech without any keyword, TV, music, room noise):
+
+    corpus/
+        hey_sam/*.wav       # underscores become spaces in the keyword
+        jarvis/*.wav
+        _negative/*.wav
+
+The first ``--enroll`` recordings of each keyword are enrolled into a
+temporary model directory; the rest are scored. With ``--tune`` the
+thresholds are fitted on half of the negatives and false accepts are
+counted on the other half.
+
+    python benchmarks/bench_kws.py corpus --enroll 3 --sensitivity 0.3 0.5 0.7
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.kws import MfccDtwSpotter
+
+NEGATIVE_DIR = "_negative"
+
+
+def _read_wav(path: Path):
+    """(pcm bytes, sample rate, seconds) of a 16-bit WAV, first channel only."""
+    with wave.open(str(path), "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        channels, rate, frames = w.getnchannels(), w.getframerate(), w.getnframes()
+        pcm = w.readframes(frames)
+    if channels > 1:
+        samples = memoryview(pcm).cast("h")[::channels]
+        pcm = samples.tobytes()
+    return pcm, rate, frames / rate
+
+
+def _load_corpus(root: Path):
+    positives, negatives = {}, []
+    for folder in sorted(p for p in root.iterdir() if p.is_dir()):
+        clips = [_read_wav(p) for p in sorted(folder.glob("*.wav"))]
+        if folder.name == NEGATIVE_DIR:
+            negatives = clips
+        elif clips:
+            positives[folder.name.replace("_", " ").lower()] = clips
+    return positives, negatives
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+
+def run(corpus: Path, enroll: int, sensitivities, tune: bool, max_far: float):
+    positives, negatives = _load_corpus(corpus)
+    if not positives:
+        sys.exit(f"No keyword folders with WAVs under {corpus}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spotter = MfccDtwSpotter(Path(tmp) / "kws", keywords=positives)
+        tests = {}
+        for keyword, clips in positives.items():
+            for pcm, rate, _ in clips[:enroll]:
+                spotter.enroll(keyword, pcm, rate)
+            tests[keyword] = clips[enroll:]
+            print(f"{keyword!r}: enrolled {min(enroll, len(clips))}, testing {len(tests[keyword])}")
+
+        if tune and len(negatives) >= 2:
+            half = len(negatives) // 2
+            thresholds = spotter.tune_false_accepts(
+                [pcm for pcm, _, _ in negatives[:half]],
+                max_false_accept_rate=max_far,
+                sample_rate=negatives[0][1],
+            )
+            negatives = negatives[half:]
+            print("Tuned thresholds: " + ", ".join(f"{k}={v:.2f}" for k, v in thresholds.items()))
+        hours = sum(seconds for _, _, seconds in negatives) / 3600
+
+        # Score every clip once; sensitivity only moves the threshold
+        latencies = []
+
+        def scored(pcm, rate):
+            start = time.perf_counter()
+            scores = spotter.scores(pcm, rate)
+            latencies.append((time.perf_counter() - start) * 1000)
+            return scores
+
+        positive_scores = {k: [scored(pcm, rate) for pcm, rate, _ in clips] for k, clips in tests.items()}
+        negative_scores = [scored(pcm, rate) for pcm, rate, _ in negatives]
+
+        for sensitivity in sensitivities:
+            spotter.set_sensitivity(sensitivity)
+
+            def fired(scores):
+                hits = [(k, d) for k, d in scores.items() if d <= spotter.threshold(k)]
+                return min(hits, key=lambda h: h[1] / spotter.threshold(h[0]))[0] if hits else None
+
+            print(f"\nsensitivity {sensitivity:.2f}")
+            for keyword, all_scores in positive_scores.items():
+                if not all_scores:
+                    continue
+                correct = sum(fired(s) == keyword for s in all_scores)
+                print(f"  {keyword:<20} detected {correct}/{len(all_scores)} ({correct / len(all_scores):.0%})")
+            false_accepts = sum(fired(s) is not None for s in negative_scores)
+            rate = f", {false_accepts / hours:.1f}/hour" if hours else ""
+            print(f"  false accepts        {false_accepts}/{len(negative_scores)}{rate}")
+
+        if latencies:
+            print(f"\nLatency per clip: mean {statistics.mean(latencies):.1f} ms, "
+                  f"p95 {_percentile(latencies, 0.95):.1f} ms, max {max(latencies):.1f} ms "
+                  f"({len(positives)} keyword(s))")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=Path)
+    parser.add_argument("--enroll", type=int, default=3, help="recordings per keyword used as templates")
+    parser.add_argument("--sensitivity", type=float, nargs="+", default=[0.5])
+    parser.add_argument("--tune", action="store_true", help="fit thresholds on half of the negatives")
+    parser.add_argument("--max-far", type=float, default=0.01, help="target false-accept rate for --tune")
+    args = parser.parse_args()
+    run(args.corpus, args.enroll, args.sensitivity, args.tune, args.max_far)
+
+
+if __name__ == "__main__":
+    main()
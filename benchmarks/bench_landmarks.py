@@ -0,0 +1,137 @@
+"""
+Benchmark: gesture and posture classifiers on recorded landmarks
+
+``record`` runs the hand or pose detector over a recording (video file
+or image directory) and saves one landmark array per detection, labelled
+with what the current classifiers say, to .npz. That file is the
+baseline for later runs.
+
+``run`` classifies a landmark file (.npz, .npy or hand-written .jsonl;
+see features.landmarks.load_landmarks) one sample at a time, as the
+vision stages do, and as a single batch. It reports the time per sample
+and the label counts, and how many commands the gesture smoother would
+fire. When the file has labels it also reports agreement with them, and
+``--min-accuracy`` turns that into an exit code for CI.
+
+    python benchmarks/bench_landmarks.py record recording.mp4 hands.npz --kind hands
+    python benchmarks/bench_landmarks.py run hands.npz --min-accuracy 0.98
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import CV_CONFIG
+from core.frame_sources import create_source
+from core.vision_pipeline import VideoFrame
+from features.landmarks import (
+    GestureSmoother, analyze_postures, classify_gesture, classify_gestures, classify_pose, classify_poses,
+    load_landmarks, save_landmarks,
+)
+from features.vision_workers import DETECTORS
+
+CLASSIFIERS = {
+    # kind: (points, one sample, whole batch)
+    "hands": (21, classify_gesture, classify_gestures),
+    "pose": (33, classify_pose, classify_poses),
+}
+
+
+def record(source: Path, out: Path, kind: str, limit: int):
+    capture = create_source(source, realtime=False)
+    if not capture.open():
+        sys.exit(f"Could not read {source}")
+    detect = DETECTORS[kind]()
+    width = CV_CONFIG.get("stages", {}).get(kind, {}).get("width")
+    samples, frames = [], 0
+    while frames < limit:
+        ok, image = capture.read()
+        if not ok:
+            break
+        frames += 1
+        landmarks = detect(VideoFrame(image, frames, time.time()).view(width, "rgb"))
+        # Hands come as (n, 21, 3), a pose as (33, 4) or (0, 4)
+        samples.extend(landmarks if kind == "hands" else [landmarks] if len(landmarks) else [])
+    capture.release()
+    if not samples:
+        sys.exit(f"No {kind} found in {frames} frames")
+    labels = CLASSIFIERS[kind][2](samples)
+    save_landmarks(out, samples, labels)
+    print(f"{len(samples)} {kind} landmark sets from {frames} frames -> {out}")
+    print(dict(Counter(labels)))
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(path: Path, repeat: int, min_accuracy: float):
+    landmarks, labels = load_landmarks(path)
+    kinds = [kind for kind, (points, _, _) in CLASSIFIERS.items() if landmarks.shape[1:2] == (points,)]
+    if not len(landmarks) or not kinds:
+        sys.exit(f"{path}: expected (n, 21, 3) hand or (n, 33, 4) pose landmarks, got {landmarks.shape}")
+    kind = kinds[0]
+    _, one, batch = CLASSIFIERS[kind]
+    n = len(landmarks)
+
+    per_sample = _time(lambda: [one(sample) for sample in landmarks], repeat)
+    batched = _time(lambda: batch(landmarks), repeat)
+    predicted = batch(landmarks)
+    print(f"{n} {kind} samples from {path.name}")
+    print(f"per sample: {per_sample / n * 1e6:8.1f} us/sample")
+    print(f"batched:    {batched / n * 1e6:8.1f} us/sample")
+    if kind == "pose":
+        postures = _time(lambda: analyze_postures(landmarks), repeat)
+        print(f"posture:    {postures / n * 1e6:8.1f} us/sample")
+    print(f"\nlabels: {dict(Counter(predicted))}")
+
+    if kind == "hands":
+        # Treat the samples as consecutive frames of one hand
+        smoothing = CV_CONFIG.get("gesture_smoothing", {})
+        smoother = GestureSmoother(smoothing.get("window", 5), smoothing.get("min_votes", 3))
+        fired = [g for g in (smoother.update(label) for label in predicted) if g]
+        print(f"smoothing: {sum(1 for g in predicted if g)} frames with a gesture -> {len(fired)} commands")
+
+    if labels is None:
+        return 0
+    mismatches = [i for i, (p, l) in enumerate(zip(predicted, labels)) if p != l]
+    accuracy = 1 - len(mismatches) / n
+    print(f"agreement with recorded labels: {accuracy:.1%} ({len(mismatches)} of {n} differ)")
+    for i in mismatches[:10]:
+        print(f"  #{i}: expected {labels[i]}, got {predicted[i]}")
+    if accuracy < min_accuracy:
+        print(f"FAIL agreement below {min_accuracy:.1%}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record", help="detect landmarks in a recording and save them")
+    rec.add_argument("source", type=Path, help="video file or directory of images")
+    rec.add_argument("out", type=Path, help=".npz file to write")
+    rec.add_argument("--kind", choices=list(CLASSIFIERS), default="hands")
+    rec.add_argument("--frames", type=int, default=1000)
+    bench = commands.add_parser("run", help="time and check the classifiers on a landmark file")
+    bench.add_argument("landmarks", type=Path)
+    bench.add_argument("--repeat", type=int, default=5)
+    bench.add_argument("--min-accuracy", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.source, args.out, args.kind, args.frames)
+    else:
+        sys.exit(run(args.landmarks, args.repeat, args.min_accuracy))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark: the whole vision pipeline on a recording, without a camera
+
+Replays a video file or a directory of images through the shared capture
+service into ComputerVisionController, exactly as live frames would
+flow, and reports per-stage latency percentiles, achieved FPS and
+dropped frames, capture FPS and process memory (RSS). By default the
+recording plays as fast as it decodes; ``--realtime`` plays it at its
+own frame rate, like a camera.
+
+For CI, ``--min-fps`` and ``--max-p95`` turn the numbers into a pass/fail
+exit code and ``--json`` keeps them for comparison between runs:
+
+    python benchmarks/bench_pipeline.py recording.mp4 --min-fps faces=8 --max-p95 hands=60 --json vision.json
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import psutil
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import CV_CONFIG
+from features.computer_vision import ComputerVisionController
+
+
+class _Assistant:
+    """The controller only needs somewhere to send gesture events."""
+
+    def emit_event(self, event, data):
+        pass
+
+
+def _sample_memory(stop: threading.Event, samples: list, interval: float = 0.1):
+    process = psutil.Process()
+    while not stop.wait(interval):
+        samples.append(process.memory_info().rss)
+
+
+def _limits(pairs, flag):
+    limits = {}
+    for pair in pairs or []:
+        stage, _, value = pair.partition("=")
+        try:
+            limits[stage] = float(value)
+        except ValueError:
+            sys.exit(f"{flag} expects STAGE=NUMBER, got {pair!r}")
+    return limits
+
+
+def run(source: Path, realtime: bool, workers: bool, duration: float):
+    CV_CONFIG["capture"].update(source=str(source), realtime=realtime, loop=False)
+    CV_CONFIG["worker_processes"] = workers
+    controller = ComputerVisionController(_Assistant())
+    camera = controller.camera
+    memory = [psutil.Process().memory_info().rss]
+    stop = threading.Event()
+    sampler = threading.Thread(target=_sample_memory, args=(stop, memory), daemon=True)
+    sampler.start()
+
+    if not controller.start_camera():
+        sys.exit(f"Could not replay {source}")
+    start = time.perf_counter()
+    camera.finished.wait(duration)
+    wall = time.perf_counter() - start
+    stages = controller.pipeline.stats()
+    capture = camera.stats()
+    controller.stop_camera()
+    stop.set()
+    sampler.join()
+
+    return {
+        "source": str(source),
+        "realtime": realtime,
+        "worker_processes": workers,
+        "wall_s": wall,
+        "frames": capture["frames"],
+        "capture_fps": capture["frames"] / wall if wall else 0.0,
+        "completed": capture["finished"],
+        "stages": stages,
+        "rss_mb": {
+            "start": memory[0] / 2**20,
+            "peak": max(memory) / 2**20,
+            "end": memory[-1] / 2**20,
+        },
+    }
+
+
+def report(result):
+    print(f"{result['frames']} frames from {Path(result['source']).name} in {result['wall_s']:.1f}s "
+          f"({result['capture_fps']:.1f} fps captured, "
+          f"{'realtime' if result['realtime'] else 'unthrottled'}"
+          f"{', worker processes' if result['worker_processes'] else ''})")
+    if not result["completed"]:
+        print("Stopped at --duration before the end of the recording")
+    print()
+    print(f"{'stage':<10}{'fps':>7}{'processed':>11}{'dropped':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, s in result["stages"].items():
+        print(f"{name:<10}{s['fps']:>7.1f}{s['processed']:>11}{s['dropped']:>9}"
+              f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}")
+    rss = result["rss_mb"]
+    print(f"\nRSS: {rss['start']:.0f} MB at start, {rss['peak']:.0f} MB peak, {rss['end']:.0f} MB at end")
+
+
+def check(result, min_fps, max_p95):
+    failures = []
+    stages = result["stages"]
+    for stage, limit in min_fps.items():
+        if stage not in stages:
+            failures.append(f"unknown stage {stage!r}")
+        elif stages[stage]["fps"] < limit:
+            failures.append(f"{stage}: {stages[stage]['fps']:.1f} fps < {limit:g}")
+    for stage, limit in max_p95.items():
+        if stage not in stages:
+            failures.append(f"unknown stage {stage!r}")
+        elif stages[stage]["p95_ms"] > limit:
+            failures.append(f"{stage}: p95 {stages[stage]['p95_ms']:.1f} ms > {limit:g}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", type=Path, help="video file or directory of images")
+    parser.add_argument("--realtime", action="store_true", help="play at the recording's frame rate")
+    parser.add_argument("--workers", action="store_true", help="run detectors in worker processes")
+    parser.add_argument("--duration", type=float, default=600.0, help="stop after this many seconds")
+    parser.add_argument("--min-fps", nargs="+", metavar="STAGE=FPS")
+    parser.add_argument("--max-p95", nargs="+", metavar="STAGE=MS")
+    parser.add_argument("--json", type=Path, help="write the results here")
+    args = parser.parse_args()
+
+    min_fps = _limits(args.min_fps, "--min-fps")
+    max_p95 = _limits(args.max_p95, "--max-p95")
+    if not args.source.exists():
+        sys.exit(f"{args.source} does not exist")
+
+    result = run(args.source, args.realtime, args.workers, args.duration)
+    report(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+    failures = check(result, min_fps, max_p95)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: speech-to-text engines on a WAV corpus
+
+Each ``clip.wav`` (16-bit PCM) needs a reference transcript next to it
+in ``clip.txt``. Every engine transcribes every clip; the report gives
+word error rate over the whole corpus, real-time factor (processing
+time / audio duration) and per-clip latency.
+
+    python benchmarks/bench_stt.py corpus --engines google vosk whisper --language en-US
+"""
+import argparse
+import re
+import statistics
+import sys
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import STT_CONFIG
+from core.interfaces import STTError
+from core.stt.router import ENGINES, STTRouter
+
+
+def normalize(text: str):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis) -> int:
+    """Substitutions + deletions + insertions between two word lists."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def _read_wav(path: Path):
+    with wave.open(str(path), "rb") as w:
+        if w.getsampwidth() != 2 or w.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono PCM")
+        rate, frames = w.getframerate(), w.getnframes()
+        return w.readframes(frames), rate, frames / rate
+
+
+def _load_corpus(root: Path):
+    clips = []
+    for wav in sorted(root.rglob("*.wav")):
+        ref = wav.with_suffix(".txt")
+        if not ref.exists():
+            print(f"skipping {wav.name}: no {ref.name}")
+            continue
+        clips.append((wav.name, *_read_wav(wav), ref.read_text(encoding="utf-8").strip()))
+    return clips
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+
+def bench(provider, clips, language: str, verbose: bool):
+    errors = words = failures = 0
+    audio_seconds = busy_seconds = 0.0
+    latencies = []
+    for name, pcm, rate, seconds, reference in clips:
+        start = time.perf_counter()
+        try:
+            hypothesis = provider.transcribe(pcm, rate, language)
+        except STTError as e:
+            failures += 1
+            print(f"  {name}: {e}")
+            continue
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed * 1000)
+        busy_seconds += elapsed
+        audio_seconds += seconds
+        ref_words = normalize(reference)
+        clip_errors = word_errors(ref_words, normalize(hypothesis))
+        errors += clip_errors
+        words += len(ref_words)
+        if verbose and clip_errors:
+            print(f"  {name}: {hypothesis!r} (expected {reference!r})")
+    return {
+        "wer": errors / words if words else 0.0,
+        "rtf": busy_seconds / audio_seconds if audio_seconds else 0.0,
+        "mean_ms": statistics.mean(latencies) if latencies else 0.0,
+        "p95_ms": _percentile(latencies, 0.95),
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=Path)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--language", default="en-US")
+    parser.add_argument("--verbose", action="store_true", help="print every mis-transcribed clip")
+    args = parser.parse_args()
+
+    clips = _load_corpus(args.corpus)
+    if not clips:
+        sys.exit(f"No WAV files with reference transcripts under {args.corpus}")
+    total = sum(clip[3] for clip in clips)
+    print(f"{len(clips)} clips, {total:.1f}s of audio, language {args.language}\n")
+
+    # No fallback: each engine is measured on its own
+    router = STTRouter(fallback=None, engines=STT_CONFIG.get("engines"))
+    print(f"{'engine':<10}{'WER':>8}{'RTF':>8}{'mean ms':>10}{'p95 ms':>10}{'failed':>8}")
+    for name in args.engines:
+        provider = router.provider(name)
+        if provider is None or not provider.supports(args.language):
+            print(f"{name:<10}  unavailable for {args.language}")
+            continue
+        try:
+            provider.transcribe(clips[0][1], clips[0][2], args.language)  # load the model outside the timings
+        except STTError:
+            pass
+        r = bench(provider, clips, args.language, args.verbose)
+        print(f"{name:<10}{r['wer']:>8.1%}{r['rtf']:>8.2f}{r['mean_ms']:>10.0f}{r['p95_ms']:>10.0f}{r['failures']:>8}")
+
+
+if __name__ == "__main__":
+    main()
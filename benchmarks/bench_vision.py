@@ -0,0 +1,123 @@
+"""
+Benchmark: vision detectors in-process vs. in worker processes
+
+Decodes the first ``--frames`` frames of a recorded video (or a directory
+of images) up front and
+prepares each detector's input at its configured width (CV_CONFIG
+"stages"), so only inference and hand-off are timed. In each mode every
+detector runs flat out on its own thread, as the vision pipeline stages
+do, while a stand-in for the Tk/audio threads wakes every 5 ms to do a
+little Python work; its lateness shows how much the detectors hold the
+GIL.
+
+    python benchmarks/bench_vision.py recording.mp4 --frames 300 --modes inprocess processes
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import CV_CONFIG
+from core.frame_sources import create_source
+from core.vision_pipeline import VideoFrame
+from features.vision_workers import DETECTORS, close_detectors, create_detectors
+
+COLORS = {"faces": "gray", "hands": "rgb", "pose": "rgb"}
+
+
+def _load_frames(path: Path, count: int):
+    source = create_source(path, realtime=False)
+    frames = []
+    if not source.open():
+        return frames
+    while len(frames) < count:
+        ok, image = source.read()
+        if not ok:
+            break
+        frames.append(VideoFrame(image, len(frames) + 1, time.time()))
+    source.release()
+    return frames
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+
+def _ui_probe(stop: threading.Event, lateness: list):
+    """Wake every 5 ms, do a bit of interpreter work, record how late each tick finished."""
+    interval = 0.005
+    while not stop.is_set():
+        due = time.perf_counter() + interval
+        time.sleep(interval)
+        sum(range(2000))
+        lateness.append((time.perf_counter() - due) * 1000)
+
+
+def bench(mode: str, names, inputs, max_bytes: int):
+    detectors = create_detectors(names, processes=(mode == "processes"), max_frame_bytes=max_bytes)
+    try:
+        for name in names:
+            detectors[name](inputs[name][0])  # load models outside the timings
+        timings = {name: [] for name in names}
+
+        def run(name):
+            detect = detectors[name]
+            for image in inputs[name]:
+                start = time.perf_counter()
+                detect(image)
+                timings[name].append((time.perf_counter() - start) * 1000)
+
+        stop, lateness = threading.Event(), []
+        probe = threading.Thread(target=_ui_probe, args=(stop, lateness), daemon=True)
+        probe.start()
+        workers = [threading.Thread(target=run, args=(name,)) for name in names]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        wall = time.perf_counter() - start
+        stop.set()
+        probe.join()
+    finally:
+        close_detectors(detectors)
+    return wall, timings, lateness
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", type=Path)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--detectors", nargs="+", default=list(DETECTORS), choices=list(DETECTORS))
+    parser.add_argument("--modes", nargs="+", default=["inprocess", "processes"], choices=["inprocess", "processes"])
+    args = parser.parse_args()
+
+    frames = _load_frames(args.video, args.frames)
+    if not frames:
+        sys.exit(f"Could not read frames from {args.video}")
+    stages = CV_CONFIG.get("stages", {})
+    inputs = {
+        name: [f.view(stages.get(name, {}).get("width"), COLORS[name]) for f in frames]
+        for name in args.detectors
+    }
+    max_bytes = max(frames[0].image.nbytes, 1)
+    print(f"{len(frames)} frames of {frames[0].width}x{frames[0].height} from {args.video.name}\n")
+
+    print(f"{'mode':<11}{'detector':<9}{'fps':>8}{'mean ms':>10}{'p95 ms':>9}")
+    for mode in args.modes:
+        wall, timings, lateness = bench(mode, args.detectors, inputs, max_bytes)
+        for name, values in timings.items():
+            print(f"{mode:<11}{name:<9}{len(values) / wall:>8.1f}"
+                  f"{statistics.mean(values):>10.1f}{_percentile(values, 0.95):>9.1f}")
+        print(f"{mode:<11}{'UI tick':<9}  late p50 {_percentile(lateness, 0.5):.1f} ms, "
+              f"p95 {_percentile(lateness, 0.95):.1f} ms, max {max(lateness, default=0.0):.1f} ms, "
+              f"wall {wall:.1f}s\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -38,7 +38,52 @@ VOICE_CONFIG = {
     "tts_volume": 0.8,
     "wake_word": "sam",
     "language": "en-US",
-    "voice_id": 0
+    "voice_id": 0,
+    # Speech-to-text engine: "google" (online), "vosk" or "whisper" (offline)
+    "stt_engine": "google"
+}
+
+# Text-to-Speech Service Configuration
+TTS_CONFIG = {
+    "cache_enabled": True,
+    "cache_dir": CACHE_DIR / "tts",
+    "cache_max_entries": 200,
+    "cache_max_bytes": 50 * 1024 * 1024,
+    # A phrase is cached once it has been spoken this many times...
+    "cache_min_uses": 2,
+    "cache_max_chars": 120,
+    # ...or on first use for these
+    "always_cache": [
+        "Yes?",
+        "Voice recognition activated",
+        "Voice recognition deactivated",
+        "I didn't understand that. Could you repeat?",
+    ],
+}
+
+# Speech-to-Text Engine Configuration
+STT_CONFIG = {
+    # Engine per recognizer language code, overriding VOICE_CONFIG["stt_engine"],
+    # e.g. {"en-US": "vosk", "hi-IN": "google"}
+    "engine_by_language": {},
+    # Used when the selected engine lacks its package/model for a language or fails
+    "fallback": "google",
+    # Show partial transcripts while the user speaks (engines that support it)
+    "partials": True,
+    # Run short reversible commands ("mute", "volume up") once the partial
+    # transcript has held steady this long; the final transcript confirms or undoes them
+    "speculative_dispatch": True,
+    "speculative_stable_ms": 250,
+    "engines": {
+        # One unpacked Vosk model per language: models/vosk/en-US, models/vosk/hi, ...
+        "vosk": {"model_dir": MODELS_DIR / "vosk"},
+        # whisper.cpp command-line binary and a ggml model file
+        "whisper": {
+            "model_path": MODELS_DIR / "whisper" / "ggml-base.bin",
+            "binary": "whisper-cli",
+            "threads": 4,
+        },
+    },
 }
 
 # AI Configuration
@@ -55,6 +100,59 @@ AI_CONFIG = {
     "personality": "You are SAM, a friendly, empathetic, and highly capable personal AI assistant. Speak naturally like a human, be concise unless asked for details, and adapt to the user's preferences."
 }
 
+# User Profile Configuration
+PROFILE_CONFIG = {
+    # profile_<name>.json files and their profiles.json index live here
+    "directory": BASE_DIR,
+    # Settings changes within this window are written once
+    "save_delay_ms": 1000,
+}
+
+# Conversation History Configuration
+CONVERSATION_CONFIG = {
+    "path": DATA_DIR / "conversations.db",
+    # Recent messages of the current session kept in memory for prompt context
+    "tail_size": 50,
+    # Messages per page when the chat view loads older history
+    "page_size": 50,
+}
+
+# LLM Response Cache Configuration
+LLM_CACHE_CONFIG = {
+    "enabled": True,
+    "max_entries": 2000,
+    # Seconds a reply stays fresh, by intent; 0 disables caching for that intent
+    "ttl_by_intent": {
+        "default": 6 * 3600,
+        "chat": 6 * 3600,
+        "plan": 7 * 24 * 3600,
+        "vision": 0,
+    },
+    # Word-bigram similarity for reusing a reply to a reworded prompt; None disables
+    "near_duplicate_threshold": None,
+}
+
+# Outbound HTTP Configuration
+HTTP_CONFIG = {
+    "per_host_limit": 4,
+    "max_retries": 2,
+    "backoff_base": 0.25,  # seconds; full-jitter exponential backoff
+    "backoff_max": 2.0,
+    "default_timeout": 15.0,
+    "http2": False,  # needs: pip install "httpx[http2]"
+    # End-to-end budget for all network calls made while handling one command
+    "turn_deadline": 25.0,
+}
+
+# On-device Keyword Spotting Configuration
+KWS_CONFIG = {
+    "enabled": True,
+    "model_dir": MODELS_DIR / "kws",  # enrolled templates and thresholds
+    "enroll_samples": 3,  # recordings taken when training a wake word
+    # 0.0 = fewest false wakes, 1.0 = fewest missed wakes
+    "sensitivity": 0.5,
+}
+
 # Computer Vision Configuration
 CV_CONFIG = {
     "camera_index": 0,
@@ -62,7 +160,32 @@ CV_CONFIG = {
     "object_detection_confidence": 0.5,
     "gesture_recognition": True,
     "emotion_detection": True,
-    "ocr_language": "eng"
+    "ocr_language": "eng",
+    # One capture thread owns the camera and decodes into a ring of this many buffers.
+    # "source" replays a video file or an image directory instead of the camera,
+    # at its own frame rate ("realtime") or unthrottled; "loop" restarts it at the end
+    "capture": {"width": 1280, "height": 720, "fps": 30, "ring_size": 6,
+                "source": None, "realtime": True, "loop": False},
+    # Full face detection every N face-stage frames (or sooner when a track
+    # loses confidence); faces are followed by optical flow in between
+    "face_tracking": {"detect_every": 5, "min_confidence": 0.5},
+    # Run face/hand/pose detection in worker processes fed through shared
+    # memory, so inference does not hold this process's GIL
+    "worker_processes": False,
+    # A gesture triggers its command once it wins min_votes of the last
+    # window hand-stage frames, and only again after a different gesture
+    "gesture_smoothing": {"window": 5, "min_votes": 3},
+    # Refresh rate of the GUI camera preview
+    "preview_hz": 15,
+    # Each detector runs on its own thread at its own rate and input width,
+    # always on the newest frame; frames it has no time for are skipped.
+    # Emotion analysis reuses the face stage's detections instead of a frame.
+    "stages": {
+        "faces": {"rate_hz": 10, "width": 480},
+        "emotions": {"rate_hz": 5},
+        "hands": {"rate_hz": 15, "width": 640},
+        "pose": {"rate_hz": 8, "width": 480},
+    },
 }
 
 # System Configuration
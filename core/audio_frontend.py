@@ -0,0 +1,282 @@
+"""
+Continuous microphone front end with local voice-activity detection
+"""
+from __future__ import annotations
+
+import collections
+import logging
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    import speech_recognition as sr
+    SR_AVAILABLE = True
+except ImportError:
+    sr = None
+    SR_AVAILABLE = False
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # int16
+FRAME_MS = 30
+
+
+class RingBuffer:
+    """Fixed-capacity int16 sample buffer that overwrites the oldest audio."""
+
+    def __init__(self, capacity: int):
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._capacity = capacity
+        self._end = 0  # total samples ever written
+
+    def __len__(self) -> int:
+        return min(self._end, self._capacity)
+
+    def write(self, samples) -> None:
+        samples = samples[-self._capacity:]
+        start = self._end % self._capacity
+        first = min(len(samples), self._capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:len(samples) - first] = samples[first:]
+        self._end += len(samples)
+
+    def latest(self, count: int):
+        """The most recent ``count`` samples, oldest first."""
+        count = min(count, len(self))
+        start = (self._end - count) % self._capacity
+        if start + count <= self._capacity:
+            return self._data[start:start + count].copy()
+        return np.concatenate((self._data[start:], self._data[:(start + count) % self._capacity]))
+
+    def clear(self) -> None:
+        self._end = 0
+
+
+class EnergyZcrVAD:
+    """Frame classifier using RMS energy against an adaptive noise floor,
+    gated by zero-crossing rate.
+
+    The noise floor is measured once over the first ``calibration_frames``
+    frames, then tracked with an exponential moving average over frames
+    judged to be silence, so a fan switching on or off is absorbed
+    without recalibrating from scratch.
+    """
+
+    def __init__(
+        self,
+        threshold_ratio: float = 3.0,
+        min_rms: float = 120.0,
+        zcr_range=(0.01, 0.45),
+        adapt_rate: float = 0.05,
+        calibration_frames: int = 15,
+    ):
+        self.threshold_ratio = threshold_ratio
+        self.min_rms = min_rms
+        self.zcr_range = zcr_range
+        self.adapt_rate = adapt_rate
+        self.calibration_frames = calibration_frames
+        self.noise_floor: Optional[float] = None
+        self._calibration: List[float] = []
+
+    @property
+    def calibrated(self) -> bool:
+        return self.noise_floor is not None
+
+    @staticmethod
+    def frame_features(frame):
+        """(rms, zero-crossing rate) of one int16 frame."""
+        x = frame.astype(np.float32)
+        rms = float(np.sqrt(np.mean(x * x))) if x.size else 0.0
+        signs = np.signbit(frame)
+        zcr = float(np.count_nonzero(signs[1:] != signs[:-1])) / max(1, frame.size - 1)
+        return rms, zcr
+
+    def threshold(self) -> float:
+        return max(self.min_rms, (self.noise_floor or 0.0) * self.threshold_ratio)
+
+    def is_speech(self, frame) -> bool:
+        rms, zcr = self.frame_features(frame)
+        if self.noise_floor is None:
+            self._calibration.append(rms)
+            if len(self._calibration) >= self.calibration_frames:
+                # Median ignores a stray click during calibration
+                self.noise_floor = float(np.median(self._calibration))
+                self._calibration = []
+            return False
+        speech = rms >= self.threshold() and self.zcr_range[0] <= zcr <= self.zcr_range[1]
+        if not speech:
+            self.noise_floor += self.adapt_rate * (rms - self.noise_floor)
+        return speech
+
+    def raise_floor(self, level: float) -> None:
+        """Lift the floor after sustained "speech" that was really steady noise."""
+        if self.noise_floor is not None:
+            self.noise_floor = max(self.noise_floor, level / self.threshold_ratio)
+
+
+class SpeechSegmenter:
+    """Turns a stream of frames into speech segments.
+
+    A segment opens when ``start_frames`` of the last ``start_window``
+    frames are voiced, includes ``pre_roll_ms`` of audio from before the
+    onset, and closes after ``hangover_ms`` of silence or at
+    ``max_segment_ms``. Segments shorter than ``min_speech_ms`` of voiced
+    audio (clicks, door slams) are dropped.
+    """
+
+    def __init__(
+        self,
+        vad: EnergyZcrVAD,
+        frame_samples: int,
+        pre_roll_ms: int = 300,
+        start_frames: int = 3,
+        start_window: int = 5,
+        hangover_ms: int = 450,
+        min_speech_ms: int = 150,
+        max_segment_ms: int = 4000,
+    ):
+        self.vad = vad
+        self.frame_samples = frame_samples
+        self.start_frames = start_frames
+        self.start_window = start_window
+        self.hangover_frames = max(1, hangover_ms // FRAME_MS)
+        self.min_speech_frames = max(1, min_speech_ms // FRAME_MS)
+        self.max_frames = max(1, max_segment_ms // FRAME_MS)
+        self._pre_roll = RingBuffer(max(1, pre_roll_ms // FRAME_MS) * frame_samples)
+        self._recent: Deque[bool] = collections.deque(maxlen=start_window)
+        self._frames: List = []
+        self._levels: List[float] = []
+        self._voiced = 0
+        self._silent_run = 0
+        self.active = False
+
+    def reset(self) -> None:
+        self._pre_roll.clear()
+        self._recent.clear()
+        self._frames, self._levels = [], []
+        self._voiced = self._silent_run = 0
+        self.active = False
+
+    def pending(self) -> bytes:
+        """Audio of the open segment so far (pre-roll included)."""
+        return np.concatenate(self._frames).tobytes() if self._frames else b""
+
+    def feed(self, frame) -> Optional[bytes]:
+        """Add one frame; return a finished segment as int16 PCM bytes, if any."""
+        speech = self.vad.is_speech(frame)
+        if not self.active:
+            self._recent.append(speech)
+            self._pre_roll.write(frame)
+            if sum(self._recent) >= self.start_frames:
+                self.active = True
+                self._frames = [self._pre_roll.latest(len(self._pre_roll))]
+                self._levels = []
+                self._voiced = sum(self._recent)
+                self._silent_run = 0
+                self._recent.clear()
+                self._pre_roll.clear()
+            return None
+
+        self._frames.append(frame)
+        if speech:
+            self._voiced += 1
+            self._silent_run = 0
+            self._levels.append(EnergyZcrVAD.frame_features(frame)[0])
+        else:
+            self._silent_run += 1
+        forced = len(self._frames) >= self.max_frames
+        if self._silent_run < self.hangover_frames and not forced:
+            return None
+
+        if forced and self._silent_run == 0 and self._levels:
+            # Voiced from start to cut-off: likely a new steady noise source
+            self.vad.raise_floor(float(np.median(self._levels)))
+        audio = np.concatenate(self._frames)
+        voiced = self._voiced
+        self.active = False
+        self._frames, self._levels = [], []
+        self._voiced = self._silent_run = 0
+        if voiced < self.min_speech_frames:
+            return None
+        return audio.tobytes()
+
+
+class VADMicrophone:
+    """Continuous 16 kHz microphone stream that yields only speech.
+
+    The stream stays open while ``segments`` is iterated; ambient noise is
+    calibrated on the first open and then tracked adaptively, instead of
+    re-running ``adjust_for_ambient_noise`` before every capture. Each
+    segment is an ``sr.AudioData`` ready for any recognizer.
+    """
+
+    def __init__(self, device_index: Optional[int] = None, **segmenter_options):
+        if not (NUMPY_AVAILABLE and SR_AVAILABLE):
+            raise RuntimeError("numpy and SpeechRecognition are required for the VAD front end")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.device_index = device_index
+        self.frame_samples = SAMPLE_RATE * FRAME_MS // 1000
+        self.vad = EnergyZcrVAD()
+        self.segmenter = SpeechSegmenter(self.vad, self.frame_samples, **segmenter_options)
+        self.metrics = {"frames": 0, "speech_frames": 0, "segments": 0}
+
+    def segments(self, should_stop: Callable[[], bool]) -> Iterator["sr.AudioData"]:
+        """Yield speech segments until ``should_stop()`` or the consumer stops iterating."""
+        microphone = sr.Microphone(
+            device_index=self.device_index, sample_rate=SAMPLE_RATE, chunk_size=self.frame_samples
+        )
+        self.segmenter.reset()
+        with microphone as source:
+            while not should_stop():
+                raw = source.stream.read(self.frame_samples)
+                frame = np.frombuffer(raw, dtype=np.int16)
+                self.metrics["frames"] += 1
+                pcm = self.segmenter.feed(frame)
+                if self.segmenter.active:
+                    self.metrics["speech_frames"] += 1
+                if pcm is not None:
+                    self.metrics["segments"] += 1
+                    yield sr.AudioData(pcm, SAMPLE_RATE, SAMPLE_WIDTH)
+
+    def utterance(self, should_stop: Callable[[], bool], start_timeout: float = 5.0) -> Iterator[bytes]:
+        """Yield one utterance as int16 PCM chunks while it is being spoken.
+
+        Nothing is yielded until speech starts; then the pre-roll and onset
+        come as one chunk, followed by every frame until the segment
+        closes. Gives up if no speech starts within ``start_timeout``.
+        """
+        microphone = sr.Microphone(
+            device_index=self.device_index, sample_rate=SAMPLE_RATE, chunk_size=self.frame_samples
+        )
+        self.segmenter.reset()
+        idle_frames = 0
+        with microphone as source:
+            while not should_stop():
+                frame = np.frombuffer(source.stream.read(self.frame_samples), dtype=np.int16)
+                self.metrics["frames"] += 1
+                was_active = self.segmenter.active
+                pcm = self.segmenter.feed(frame)
+                if not was_active:
+                    if self.segmenter.active:
+                        yield self.segmenter.pending()
+                    else:
+                        idle_frames += 1
+                        if idle_frames * FRAME_MS >= start_timeout * 1000:
+                            return
+                    continue
+                self.metrics["speech_frames"] += 1
+                if not self.segmenter.active:
+                    if pcm is not None:
+                        self.metrics["segments"] += 1
+                    return
+                yield frame.tobytes()
+
+    def stats(self) -> Dict[str, float]:
+        stats: Dict[str, float] = dict(self.metrics)
+        stats["noise_floor"] = self.vad.noise_floor or 0.0
+        return stats
@@ -14,6 +14,8 @@ from config.settings import *
 from pathlib import Path
 import importlib
 from core.memory import MemoryService
+from core.conversation_store import ConversationStore
+from core import db
 
 @dataclass
 class AssistantState:
@@ -43,7 +45,9 @@ class BaseAssistant:
         self.running = False
         
         # Memory and context
-        self.conversation_history: List[Dict] = []
+        self.conversation = ConversationStore(
+            CONVERSATION_CONFIG["path"], source="assistant", tail_size=AI_CONFIG["context_window"] * 2
+        )
         self.user_preferences: Dict = {}
         self.learned_patterns: Dict = {}
         self.memory = MemoryService(DATA_DIR)
@@ -186,20 +190,12 @@ class BaseAssistant:
     
     def add_to_conversation(self, role: str, content: str):
         """Add message to conversation history"""
-        self.conversation_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "role": role,
-            "content": content
-        })
-        
-        # Keep only recent conversation
-        if len(self.conversation_history) > AI_CONFIG["context_window"] * 2:
-            self.conversation_history = self.conversation_history[-AI_CONFIG["context_window"] * 2:]
+        self.conversation.append(role, content)
     
     def get_context(self) -> str:
         """Get conversation context"""
         context = []
-        for msg in self.conversation_history[-AI_CONFIG["context_window"]:]:
+        for msg in self.conversation.recent(AI_CONFIG["context_window"]):
             context.append(f"{msg['role']}: {msg['content']}")
         return "\n".join(context)
     
@@ -268,12 +264,13 @@ class BaseAssistant:
         self.save_user_data()
         # Persist memory on shutdown
         try:
-            # MemoryService persists on each add; nothing to do here.
-            pass
+            self.memory.close()
         except Exception as e:
             self.logger.error(f"Error saving memory: {e}")
         self.logger.info("Assistant stopped")
         self.emit_event("assistant_stopped")
+        # Release pooled feature database connections
+        db.close_all()
     
     def get_status(self) -> Dict:
         """Get current assistant status"""
@@ -0,0 +1,305 @@
+"""
+Single owner of the camera (or a replayed recording), publishing frames through a preallocated ring
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from config.settings import CV_CONFIG
+from core.frame_sources import FrameSource, create_source
+from core.vision_pipeline import LatestSlot
+
+try:
+    import cv2
+    import numpy as np
+    CV2_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    np = None
+    CV2_AVAILABLE = False
+
+
+class FrameRef:
+    """A published frame: its sequence number, capture time and a read-only view of its ring slot.
+
+    The view aliases the ring, so it stays intact only until the capture
+    thread comes round to the same slot again, ``ring_size - 1`` frames
+    later. Check ``valid`` after slow work, or ``copy()`` to keep a frame.
+    """
+
+    __slots__ = ("seq", "timestamp", "image", "_camera")
+
+    def __init__(self, seq: int, timestamp: float, image, camera: "CameraService"):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.image = image
+        self._camera = camera
+
+    @property
+    def valid(self) -> bool:
+        return self._camera.seq - self.seq < self._camera.ring_size - 1
+
+    def copy(self):
+        return self.image.copy()
+
+
+class Subscription:
+    """Delivers the newest frame to ``callback`` at most ``rate_hz`` times a second.
+
+    Runs on its own thread; frames that arrive while the callback is busy
+    are skipped, never queued.
+    """
+
+    def __init__(self, camera: "CameraService", callback: Callable[[FrameRef], Any], rate_hz: float, name: str):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.camera = camera
+        self.callback = callback
+        self.period = 1.0 / rate_hz if rate_hz > 0 else 0.0
+        self.name = name
+        self.delivered = 0
+        self.dropped = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"camera-{name}", daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._running = False
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        seen = self.camera.seq
+        next_due = time.monotonic()
+        while self._running:
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            frame = self.camera.wait_newer(seen, timeout=0.5)
+            if frame is None:
+                continue
+            if seen:
+                self.dropped += frame.seq - seen - 1
+            seen = frame.seq
+            try:
+                self.callback(frame)
+            except Exception as e:
+                self.logger.error(f"Error in camera subscriber {self.name}: {e}")
+            self.delivered += 1
+            next_due = max(next_due + self.period, time.monotonic())
+
+
+class CameraService:
+    """Opens the camera once and shares every frame with all consumers.
+
+    Frames are decoded straight into a ring of preallocated buffers and
+    published with increasing sequence numbers; consumers get read-only
+    views of those buffers rather than copies. ``acquire``/``release``
+    are reference counted, so the device opens for the first user and
+    closes after the last one.
+
+    Consumers either poll ``latest()``, block in ``wait_newer()``,
+    ``subscribe()`` at their own rate on a thread of their own, or, for
+    cheap hand-offs only, subscribe with ``rate_hz=None`` to be called on
+    the capture thread for every frame.
+
+    ``source`` replaces the camera with a video file or a directory of
+    images (see core.frame_sources), replayed at its own frame rate or,
+    with ``realtime=False``, as fast as it decodes. Capture stops by
+    itself at the end of a replay; ``finished`` is set whenever the
+    capture thread exits.
+    """
+
+    def __init__(self, index: int = 0, width: int = 1280, height: int = 720, fps: int = 30, ring_size: int = 6,
+                 source: Union[str, Path, FrameSource, None] = None, realtime: bool = True, loop: bool = False):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.index = index
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.ring_size = max(3, ring_size)
+        self.source = source
+        self.realtime = realtime
+        self.loop = loop
+        self.finished = threading.Event()
+        self.metrics = {"frames": 0, "read_failures": 0, "reallocations": 0}
+
+        self._lock = threading.Lock()
+        self._users = 0
+        self._capture = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._slot = LatestSlot()
+        self._buffers: List[Any] = []
+        self._views: List[Any] = []
+        self._inline: List[Callable[[FrameRef], Any]] = []
+        self._subscriptions: List[Subscription] = []
+
+    # ----- lifecycle -----
+
+    @property
+    def active(self) -> bool:
+        return self._running
+
+    @property
+    def seq(self) -> int:
+        return self._slot.seq
+
+    def acquire(self) -> bool:
+        """Start (or join) capture; returns False if the camera cannot be opened."""
+        with self._lock:
+            if self._users == 0 and not self._open():
+                return False
+            self._users += 1
+            return True
+
+    def release(self) -> None:
+        """Drop one user; the camera closes when none are left."""
+        with self._lock:
+            if self._users == 0:
+                return
+            self._users -= 1
+            if self._users == 0:
+                self._close()
+
+    def _open(self) -> bool:
+        if not CV2_AVAILABLE:
+            self.logger.error("OpenCV is not installed (pip install opencv-python)")
+            return False
+        if isinstance(self.source, FrameSource):
+            capture = self.source
+        else:
+            capture = create_source(
+                self.source if self.source is not None else self.index,
+                self.width, self.height, self.fps, realtime=self.realtime, loop=self.loop,
+            )
+        if not capture.open():
+            return False
+        self._capture = capture
+        self.finished.clear()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="camera", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Capturing from {capture}")
+        return True
+
+    def _close(self) -> None:
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        if self._capture is not None:
+            self.logger.info(f"Released {self._capture}")
+            self._capture.release()
+            self._capture = None
+
+    # ----- capture -----
+
+    def _allocate(self, shape, dtype) -> None:
+        self._buffers = [np.empty(shape, dtype) for _ in range(self.ring_size)]
+        self._views = []
+        for buffer in self._buffers:
+            view = buffer.view()
+            view.flags.writeable = False
+            self._views.append(view)
+        self.metrics["reallocations"] += 1
+
+    def _run(self) -> None:
+        failures = 0
+        while self._running:
+            seq = self._slot.seq + 1
+            slot = seq % self.ring_size
+            target = self._buffers[slot] if self._buffers else None
+            ok, frame = self._capture.read(target)
+            if not ok or frame is None:
+                if self._capture.exhausted:
+                    break
+                failures += 1
+                self.metrics["read_failures"] += 1
+                if failures >= 10:
+                    self.logger.error("Camera stopped delivering frames")
+                    failures = 0
+                time.sleep(0.05)
+                continue
+            failures = 0
+            if frame is not target:
+                # First frame, or the driver changed the frame size
+                self._allocate(frame.shape, frame.dtype)
+                self._buffers[slot][...] = frame
+            ref = FrameRef(seq, time.time(), self._views[slot], self)
+            self._slot.publish(ref)
+            self.metrics["frames"] += 1
+            for callback in list(self._inline):
+                try:
+                    callback(ref)
+                except Exception as e:
+                    self.logger.error(f"Error in frame callback: {e}")
+        self._running = False
+        self.finished.set()
+
+    # ----- consumers -----
+
+    def latest(self) -> Optional[FrameRef]:
+        return self._slot.latest()
+
+    def wait_newer(self, seq: int, timeout: float = 1.0) -> Optional[FrameRef]:
+        """The first frame published after ``seq``, or None on timeout."""
+        return self._slot.wait_newer(seq, timeout)[1]
+
+    def subscribe(self, callback: Callable[[FrameRef], Any], rate_hz: Optional[float] = None,
+                  name: str = "subscriber") -> Optional[Subscription]:
+        """Deliver frames to ``callback``; ``rate_hz=None`` calls it inline for every frame."""
+        if rate_hz is None:
+            self._inline.append(callback)
+            return None
+        subscription = Subscription(self, callback, rate_hz, name)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Any) -> None:
+        """Stop a Subscription, or remove an inline callback."""
+        if isinstance(subscription, Subscription):
+            subscription.cancel()
+            with self._lock:
+                if subscription in self._subscriptions:
+                    self._subscriptions.remove(subscription)
+        elif subscription in self._inline:
+            self._inline.remove(subscription)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscriptions = {
+                s.name: {"delivered": s.delivered, "dropped": s.dropped} for s in self._subscriptions
+            }
+        stats: Dict[str, Any] = dict(self.metrics)
+        stats["users"] = self._users
+        stats["finished"] = self.finished.is_set()
+        stats["subscriptions"] = subscriptions
+        return stats
+
+
+_camera: Optional[CameraService] = None
+_camera_lock = threading.Lock()
+
+
+def get_camera_service() -> CameraService:
+    """Return the process-wide camera, configured from CV_CONFIG."""
+    global _camera
+    with _camera_lock:
+        if _camera is None:
+            capture = CV_CONFIG.get("capture", {})
+            _camera = CameraService(
+                index=CV_CONFIG.get("camera_index", 0),
+                width=capture.get("width", 1280),
+                height=capture.get("height", 720),
+                fps=capture.get("fps", 30),
+                ring_size=capture.get("ring_size", 6),
+                source=capture.get("source"),
+                realtime=capture.get("realtime", True),
+                loop=capture.get("loop", False),
+            )
+        return _camera
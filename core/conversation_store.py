@@ -0,0 +1,304 @@
+"""
+Persistent, searchable conversation history backed by SQLite
+"""
+from __future__ import annotations
+
+import collections
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, TextIO, Union
+
+from core.db import get_database
+
+
+def _create_search_index(cursor: sqlite3.Cursor) -> None:
+    # External-content FTS5 index: the text lives once, in ``messages``.
+    # Builds without FTS5 skip it and search falls back to LIKE.
+    try:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+            "content, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+    except sqlite3.OperationalError:
+        return
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, content) VALUES (NEW.id, NEW.content);
+        END
+        """
+    )
+    cursor.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+
+MIGRATIONS = (
+    (
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            started_at REAL NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY,
+            session_id TEXT NOT NULL REFERENCES sessions(id),
+            created_at REAL NOT NULL,
+            role TEXT NOT NULL,
+            sender TEXT NOT NULL,
+            content TEXT NOT NULL,
+            kind TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions(started_at)",
+    ),
+    _create_search_index,
+)
+
+_COLUMNS = "id, session_id, created_at, role, sender, content, kind"
+
+
+def _row_to_message(row) -> Dict:
+    id_, session_id, created_at, role, sender, content, kind = row[:7]
+    return {
+        "id": id_,
+        "session_id": session_id,
+        "timestamp": datetime.fromtimestamp(created_at).isoformat(timespec="seconds"),
+        "role": role,
+        "sender": sender,
+        "content": content,
+        "type": kind,
+    }
+
+
+def _match_expression(query: str) -> str:
+    """FTS5 query matching every word of ``query``, the last one as a prefix."""
+    terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+class ConversationStore:
+    """Append-only conversation log grouped into sessions.
+
+    Each process run (or cleared chat) is a session. Messages are written
+    behind the caller through a batch writer, and only the last
+    ``tail_size`` messages of the current session stay in memory for
+    prompt context; older history is read a page at a time, searched
+    through the full-text index, or streamed out by ``export``.
+    """
+
+    def __init__(self, path: Union[str, Path], source: str = "gui", tail_size: int = 50):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.source = source
+        self.db = get_database(path)
+        self.db.migrate(MIGRATIONS)
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'")
+            self.full_text = cursor.fetchone() is not None
+        if not self.full_text:
+            self.logger.warning("SQLite has no FTS5; conversation search uses LIKE")
+        self._writer = self.db.writer(
+            f"INSERT INTO messages ({_COLUMNS.split(', ', 1)[1]}) VALUES (?, ?, ?, ?, ?, ?)",
+            flush_interval=0.25,
+        )
+        self._lock = threading.Lock()
+        self._tail: Deque[Dict] = collections.deque(maxlen=tail_size)
+        self.session_id = ""
+        self.session_start_id = 1
+        self.new_session()
+
+    # ----- writing -----
+
+    def new_session(self) -> str:
+        """Start a new session; earlier ones stay searchable and exportable."""
+        session_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.flush()
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM messages")
+            start_id = cursor.fetchone()[0]
+            cursor.execute(
+                "INSERT INTO sessions (id, source, started_at) VALUES (?, ?, ?)",
+                (session_id, self.source, time.time()),
+            )
+        with self._lock:
+            self.session_id = session_id
+            # Messages below this id were written before the session began
+            self.session_start_id = start_id
+            self._tail.clear()
+        return session_id
+
+    def append(self, role: str, content: str, sender: Optional[str] = None, kind: Optional[str] = None) -> Dict:
+        """Record one message in the current session; returns it as a dict."""
+        now = time.time()
+        with self._lock:
+            session_id = self.session_id
+            message = {
+                "id": None,
+                "session_id": session_id,
+                "timestamp": datetime.fromtimestamp(now).isoformat(timespec="seconds"),
+                "role": role,
+                "sender": sender or role,
+                "content": content,
+                "type": kind,
+            }
+            self._tail.append(message)
+        self._writer.put((session_id, now, role, message["sender"], content, kind))
+        return message
+
+    def flush(self) -> None:
+        """Block until every appended message is on disk."""
+        self._writer.flush()
+
+    # ----- reading -----
+
+    def recent(self, limit: Optional[int] = None, role: Optional[str] = None) -> List[Dict]:
+        """Last ``limit`` messages of the current session, oldest first, from memory."""
+        with self._lock:
+            messages = [m for m in self._tail if role is None or m["role"] == role]
+        return messages[-limit:] if limit else messages
+
+    def page(self, session_id: Optional[str] = None, before_id: Optional[int] = None,
+             limit: int = 50) -> List[Dict]:
+        """Up to ``limit`` messages older than ``before_id``, oldest first.
+
+        Pass the ``id`` of the first message of a page to get the one
+        before it; the query walks the (session_id, id) index, so every
+        page costs the same however deep it is. A ``session_id`` of "*"
+        pages across all sessions.
+        """
+        # Rows before this session were all written when it started
+        if before_id is None or before_id > self.session_start_id:
+            self.flush()
+        sql = f"SELECT {_COLUMNS} FROM messages WHERE 1"
+        params: List = []
+        session_id = session_id or self.session_id
+        if session_id != "*":
+            sql += " AND session_id = ?"
+            params.append(session_id)
+        if before_id is not None:
+            sql += " AND id < ?"
+            params.append(before_id)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self.db.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [_row_to_message(row) for row in reversed(rows)]
+
+    def count(self, session_id: Optional[str] = None) -> int:
+        self.flush()
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id or self.session_id,))
+            return cursor.fetchone()[0]
+
+    def sessions(self, limit: int = 20, before: Optional[float] = None) -> List[Dict]:
+        """Most recent sessions first, with their message counts."""
+        self.flush()
+        sql = (
+            "SELECT s.id, s.source, s.started_at, "
+            "(SELECT COUNT(*) FROM messages m WHERE m.session_id = s.id) "
+            "FROM sessions s"
+        )
+        params: List = []
+        if before is not None:
+            sql += " WHERE s.started_at < ?"
+            params.append(before)
+        sql += " ORDER BY s.started_at DESC LIMIT ?"
+        params.append(limit)
+        with self.db.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            {"id": id_, "source": source, "started_at": started_at, "messages": count}
+            for id_, source, started_at, count in rows
+        ]
+
+    def search(self, query: str, limit: int = 20, session_id: Optional[str] = None) -> List[Dict]:
+        """Messages from any session matching every word of ``query``, best first.
+
+        Each result carries a ``snippet`` with the matched words in [brackets].
+        """
+        if not query or not query.strip():
+            return []
+        self.flush()
+        params: List = []
+        if self.full_text:
+            sql = (
+                f"SELECT {', '.join('m.' + c for c in _COLUMNS.split(', '))}, "
+                "snippet(messages_fts, 0, '[', ']', '…', 12) "
+                "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+                "WHERE messages_fts MATCH ?"
+            )
+            params.append(_match_expression(query))
+            order = "ORDER BY bm25(messages_fts)"
+        else:
+            sql = f"SELECT {_COLUMNS}, content FROM messages m WHERE 1"
+            for term in query.split():
+                sql += " AND content LIKE ? ESCAPE '\\'"
+                params.append("%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+            order = "ORDER BY id DESC"
+        if session_id is not None:
+            sql += " AND m.session_id = ?"
+            params.append(session_id)
+        sql += f" {order} LIMIT ?"
+        params.append(limit)
+        with self.db.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        results = []
+        for row in rows:
+            message = _row_to_message(row)
+            message["snippet"] = row[7]
+            results.append(message)
+        return results
+
+    def iter_messages(self, session_id: Optional[str] = None, batch_size: int = 500) -> Iterator[Dict]:
+        """Every message of a session (all sessions if ``session_id`` is "*"), oldest first.
+
+        Rows are fetched ``batch_size`` at a time, so exporting a long
+        history never holds more than one batch in memory.
+        """
+        self.flush()
+        session_id = session_id or self.session_id
+        last_id = 0
+        while True:
+            sql = f"SELECT {_COLUMNS} FROM messages WHERE id > ?"
+            params: List = [last_id]
+            if session_id != "*":
+                sql += " AND session_id = ?"
+                params.append(session_id)
+            with self.db.cursor() as cursor:
+                cursor.execute(sql + " ORDER BY id LIMIT ?", params + [batch_size])
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _row_to_message(row)
+            last_id = rows[-1][0]
+
+    def export(self, out: TextIO, session_id: Optional[str] = None, fmt: str = "text") -> int:
+        """Stream a session (or "*" for all) to ``out`` as text or JSON lines.
+
+        Returns the number of messages written.
+        """
+        written = 0
+        for message in self.iter_messages(session_id):
+            if fmt == "jsonl":
+                out.write(json.dumps(message, ensure_ascii=False) + "\n")
+            else:
+                out.write(f"[{message['timestamp'].replace('T', ' ')}] {message['sender']}: {message['content']}\n\n")
+            written += 1
+        return written
+
+    def close(self) -> None:
+        self._writer.close()
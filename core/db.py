@@ -0,0 +1,436 @@
+"""
+Shared SQLite access layer for SAM Assistant feature controllers
+"""
+from __future__ import annotations
+
+import atexit
+import calendar
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Prepared statements kept per connection, keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+# A migration is a tuple of SQL statements or a callable taking a cursor
+Migration = Union[Sequence[str], Callable[[sqlite3.Cursor], None]]
+
+
+def to_epoch(value: Union[str, datetime, date, None]) -> Optional[int]:
+    """Seconds since 1970 for a naive local timestamp, read as wall-clock time.
+
+    This matches SQLite's ``strftime('%s', ...)`` on the ISO strings the
+    controllers store, so ``DATE(col) = day`` becomes a range check on
+    the epoch column. Unparseable values map to None, like DATE() does.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return calendar.timegm(value.timetuple())
+
+
+def day_bounds(day: Optional[date] = None) -> Tuple[int, int]:
+    """Half-open epoch range [start, end) covering one calendar day."""
+    day = day or datetime.now().date()
+    start = to_epoch(day)
+    return start, start + int(timedelta(days=1).total_seconds())
+
+
+class Database:
+    """One SQLite database file with a connection per thread.
+
+    Connections are opened lazily on first use in each thread, reused
+    for the thread's lifetime and closed when the thread exits, in WAL mode with synchronous=NORMAL so
+    readers never block the writer and commits skip the per-transaction
+    fsync of the rollback journal.
+    """
+
+    def __init__(self, path: Union[str, Path], timeout: float = 30.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._writers: List[BatchWriter] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # check_same_thread is off only so close() can run from the
+        # shutdown thread; each connection is otherwise thread-confined.
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = _ConnectionHolder(self._connect())
+            # Thread-local values are dropped when their thread exits
+            weakref.finalize(holder, self._release, holder.conn)
+            self._local.holder = holder
+        return holder.conn
+
+    def _release(self, conn: sqlite3.Connection):
+        with self._lock:
+            if conn not in self._connections:
+                return  # already closed by close()
+            self._connections.remove(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def cursor(self) -> Iterator[sqlite3.Cursor]:
+        """Yield a cursor; commit on success, roll back on error."""
+        conn = self.connection()
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def migrate(self, migrations: Sequence[Migration]) -> int:
+        """Apply pending migrations, tracked by PRAGMA user_version.
+
+        Migration ``n`` (1-based) runs once, inside its own transaction,
+        when the stored version is below ``n``. Returns the new version.
+        """
+        conn = self.connection()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(migrations, start=1):
+            if number <= version:
+                continue
+            cursor = conn.cursor()
+            # DDL does not open an implicit transaction, so begin explicitly
+            cursor.execute("BEGIN")
+            try:
+                if callable(migration):
+                    migration(cursor)
+                else:
+                    for statement in migration:
+                        cursor.execute(statement)
+                cursor.execute(f"PRAGMA user_version = {number}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            version = number
+        return version
+
+    def writer(self, sql: str, **kwargs) -> "BatchWriter":
+        """Create a write-behind queue for one INSERT statement."""
+        writer = BatchWriter(self, sql, **kwargs)
+        with self._lock:
+            self._writers.append(writer)
+        return writer
+
+    def close(self):
+        """Flush pending writes, then close every connection for this database."""
+        with self._lock:
+            writers, self._writers = self._writers, []
+        for writer in writers:
+            writer.close()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+
+class _ConnectionHolder:
+    """Per-thread owner of a connection; closing follows its lifetime."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+# Queued by flush() so the writer commits what it holds without waiting out flush_interval
+_FLUSH = object()
+
+
+class BatchWriter:
+    """Write-behind queue that inserts rows in single-transaction batches.
+
+    Callers enqueue parameter tuples and return immediately; a background
+    thread writes them with executemany once ``batch_size`` rows are
+    pending or ``flush_interval`` seconds have passed. The queue is
+    bounded, so a producer blocks rather than growing memory without limit
+    when the disk falls behind.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        sql: str,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_pending: int = 10000,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.db = db
+        self.sql = sql
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        # Orders put() against close(), so no row is queued behind the stop sentinel
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, params: Sequence):
+        """Enqueue one row; blocks while the queue is full."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchWriter is closed")
+            self._queue.put(tuple(params))
+
+    def _write(self, batch: List[tuple]):
+        try:
+            with self.db.cursor() as cursor:
+                cursor.executemany(self.sql, batch)
+        except Exception as e:
+            self.logger.error(f"Error writing batch of {len(batch)} rows: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            if item is _FLUSH:
+                self._queue.task_done()
+                continue
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                if item is _FLUSH:
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+            self._write(batch)
+            if stop:
+                self._queue.task_done()
+                return
+
+    def flush(self):
+        """Block until every row queued so far has been written.
+
+        The writer is woken to commit its current batch at once, so this
+        costs one write rather than up to ``flush_interval``.
+        """
+        with self._lock:
+            if self._queue.unfinished_tasks and not self._closed:
+                self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self):
+        """Write remaining rows and stop the background thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        # The writer keeps draining, so a full queue frees up unless it has died
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        self._thread.join()
+        # Write whatever the writer left behind, so flush() never waits on it
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None or item is _FLUSH:
+                self._queue.task_done()
+            else:
+                leftovers.append(item)
+        if leftovers:
+            self._write(leftovers)
+
+
+@dataclass(frozen=True)
+class RollupSpec:
+    """A per-day aggregate of one column, keyed by the day of a timestamp column."""
+    metric: str
+    table: str
+    value_column: str
+    time_column: str = "created_at"
+
+
+ROLLUP_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS daily_rollups (
+        metric TEXT NOT NULL,
+        day TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        total REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (metric, day)
+    ) WITHOUT ROWID
+"""
+
+
+def rollup_migration(specs: Sequence[RollupSpec]) -> Tuple[str, ...]:
+    """SQL that creates the rollup table, its triggers and the backfill.
+
+    Triggers keep ``daily_rollups`` current on every insert and delete,
+    so callers never have to remember to update it. ``count`` counts
+    non-NULL values and ``total`` sums them, which is enough for SUM,
+    COUNT and AVG over any set of days.
+    """
+    statements = [ROLLUP_TABLE_SQL]
+    for spec in specs:
+        value, day = spec.value_column, f"DATE({{row}}.{spec.time_column})"
+        new_day, old_day = day.format(row="NEW"), day.format(row="OLD")
+        statements += [
+            f"""
+            CREATE TRIGGER IF NOT EXISTS rollup_{spec.metric}_insert AFTER INSERT ON {spec.table}
+            WHEN NEW.{value} IS NOT NULL AND {new_day} IS NOT NULL
+            BEGIN
+                INSERT INTO daily_rollups (metric, day, count, total)
+                VALUES ('{spec.metric}', {new_day}, 1, NEW.{value})
+                ON CONFLICT (metric, day) DO UPDATE
+                SET count = count + 1, total = total + excluded.total;
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS rollup_{spec.metric}_delete AFTER DELETE ON {spec.table}
+            WHEN OLD.{value} IS NOT NULL AND {old_day} IS NOT NULL
+            BEGIN
+                UPDATE daily_rollups SET count = count - 1, total = total - OLD.{value}
+                WHERE metric = '{spec.metric}' AND day = {old_day};
+            END
+            """,
+            f"""
+            INSERT INTO daily_rollups (metric, day, count, total)
+            SELECT '{spec.metric}', DATE({spec.time_column}), COUNT({value}), TOTAL({value})
+            FROM {spec.table}
+            WHERE {value} IS NOT NULL AND DATE({spec.time_column}) IS NOT NULL
+            GROUP BY DATE({spec.time_column})
+            """,
+        ]
+    return tuple(statements)
+
+
+class DailyRollups:
+    """Windowed aggregates served from ``daily_rollups``.
+
+    Whole days come from the rollup rows; only the partial first day of a
+    window is read from the raw table, through its timestamp index, so
+    results match a direct ``WHERE time_column >= since`` aggregate.
+    """
+
+    def __init__(self, db: Database, specs: Sequence[RollupSpec]):
+        self.db = db
+        self.specs = {spec.metric: spec for spec in specs}
+
+    def window(self, metric: str, since: Optional[datetime] = None) -> Tuple[int, float]:
+        """Return (count, total) of values at or after ``since`` (all time if None)."""
+        spec = self.specs[metric]
+        with self.db.cursor() as cursor:
+            if since is None:
+                cursor.execute(
+                    "SELECT COALESCE(SUM(count), 0), COALESCE(SUM(total), 0) "
+                    "FROM daily_rollups WHERE metric = ?",
+                    (metric,),
+                )
+                count, total = cursor.fetchone()
+                return int(count), float(total)
+
+            next_day = (since.date() + timedelta(days=1)).isoformat()
+            cursor.execute(
+                "SELECT COALESCE(SUM(count), 0), COALESCE(SUM(total), 0) "
+                "FROM daily_rollups WHERE metric = ? AND day >= ?",
+                (metric, next_day),
+            )
+            count, total = cursor.fetchone()
+            cursor.execute(
+                f"SELECT COUNT({spec.value_column}), TOTAL({spec.value_column}) FROM {spec.table} "
+                f"WHERE {spec.time_column} >= ? AND {spec.time_column} < ?",
+                (since.isoformat(), next_day),
+            )
+            head_count, head_total = cursor.fetchone()
+        return int(count + head_count), float(total + head_total)
+
+    def total(self, metric: str, since: Optional[datetime] = None) -> float:
+        return self.window(metric, since)[1]
+
+    def average(self, metric: str, since: Optional[datetime] = None) -> Optional[float]:
+        count, total = self.window(metric, since)
+        return total / count if count else None
+
+
+_databases: Dict[str, Database] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path: Union[str, Path]) -> Database:
+    """Return the shared Database for a file path."""
+    key = str(Path(path).resolve())
+    with _databases_lock:
+        db = _databases.get(key)
+        if db is None:
+            db = Database(path)
+            _databases[key] = db
+        return db
+
+
+def close_all():
+    """Close every shared database; used on assistant shutdown."""
+    with _databases_lock:
+        databases = list(_databases.values())
+        _databases.clear()
+    for db in databases:
+        db.close()
+
+
+# Pending write-behind rows are flushed even if stop() is never reached
+atexit.register(close_all)
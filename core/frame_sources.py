@@ -0,0 +1,207 @@
+"""
+Frame sources for the capture service: a live camera, or a recording replayed offline
+"""
+from __future__ import annotations
+
+import logging
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Tuple, Union
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    CV2_AVAILABLE = False
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+
+
+class FrameSource:
+    """Something CameraService can read BGR frames from.
+
+    ``read(target)`` follows ``cv2.VideoCapture.read``: it returns
+    ``(ok, frame)`` and decodes into ``target`` when given a buffer of the
+    right shape. A source that has nothing more to give sets
+    ``exhausted``, so the capture thread stops instead of retrying.
+    """
+
+    exhausted = False
+    fps = 30.0
+
+    def open(self) -> bool:
+        raise NotImplementedError
+
+    def read(self, target=None) -> Tuple[bool, Any]:
+        raise NotImplementedError
+
+    def release(self) -> None:
+        pass
+
+
+class CameraSource(FrameSource):
+    """A live device through ``cv2.VideoCapture(index)``."""
+
+    def __init__(self, index: int = 0, width: int = 1280, height: int = 720, fps: int = 30):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.index = index
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self._capture = None
+
+    def __str__(self) -> str:
+        return f"camera {self.index}"
+
+    def open(self) -> bool:
+        capture = cv2.VideoCapture(self.index)
+        if not capture.isOpened():
+            self.logger.error(f"Failed to open camera {self.index}")
+            return False
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        capture.set(cv2.CAP_PROP_FPS, self.fps)
+        # Keep the driver from buffering stale frames behind the newest one
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self._capture = capture
+        return True
+
+    def read(self, target=None):
+        return self._capture.read(target) if target is not None else self._capture.read()
+
+    def release(self) -> None:
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
+
+class ReplaySource(FrameSource):
+    """Base for recordings: delivers frames at their own frame rate, or as fast as they decode.
+
+    With ``realtime`` off nothing is throttled, which is what benchmarks
+    want; ``loop`` starts over at the end instead of finishing.
+    """
+
+    def __init__(self, path: Union[str, Path], fps: Optional[float] = None,
+                 realtime: bool = True, loop: bool = False):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = Path(path)
+        self.fps = fps or 30.0
+        self.realtime = realtime
+        self.loop = loop
+        self.exhausted = False
+        self.frames_read = 0
+        self._next_due = 0.0
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+    def read(self, target=None):
+        if self.exhausted:
+            return False, None
+        ok, frame = self._next(target)
+        if not ok and self.loop and self.frames_read:
+            self._rewind()
+            ok, frame = self._next(target)
+        if not ok:
+            self.exhausted = True
+            self.logger.info(f"Replay of {self.path.name} finished after {self.frames_read} frames")
+            return False, None
+        self.frames_read += 1
+        if self.realtime:
+            self._pace()
+        return True, frame
+
+    def _pace(self) -> None:
+        now = time.monotonic()
+        if self._next_due > now:
+            time.sleep(self._next_due - now)
+        # Hold the cadence, but never burst to catch up after a stall
+        self._next_due = max(self._next_due, now) + 1.0 / self.fps
+
+    def _next(self, target) -> Tuple[bool, Any]:
+        raise NotImplementedError
+
+    def _rewind(self) -> None:
+        raise NotImplementedError
+
+
+class VideoFileSource(ReplaySource):
+    """Replays a video file (MP4, AVI, ...) at the frame rate stored in it."""
+
+    def __init__(self, path: Union[str, Path], fps: Optional[float] = None,
+                 realtime: bool = True, loop: bool = False):
+        super().__init__(path, fps, realtime, loop)
+        self._requested_fps = fps
+        self._capture = None
+
+    def open(self) -> bool:
+        capture = cv2.VideoCapture(str(self.path))
+        if not capture.isOpened():
+            self.logger.error(f"Failed to open video {self.path}")
+            return False
+        self._capture = capture
+        self.fps = self._requested_fps or capture.get(cv2.CAP_PROP_FPS) or 30.0
+        return True
+
+    def _next(self, target):
+        return self._capture.read(target) if target is not None else self._capture.read()
+
+    def _rewind(self) -> None:
+        self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def release(self) -> None:
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
+
+class ImageDirectorySource(ReplaySource):
+    """Replays the images in a directory, in file-name order."""
+
+    def __init__(self, path: Union[str, Path], fps: Optional[float] = None,
+                 realtime: bool = True, loop: bool = False):
+        super().__init__(path, fps, realtime, loop)
+        self.files: List[Path] = []
+        self._position = 0
+
+    def open(self) -> bool:
+        self.files = sorted(p for p in self.path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+        if not self.files:
+            self.logger.error(f"No images in {self.path}")
+            return False
+        self._position = 0
+        return True
+
+    def _next(self, target):
+        while self._position < len(self.files):
+            path = self.files[self._position]
+            self._position += 1
+            image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+            if image is None:
+                self.logger.warning(f"Skipping unreadable image {path.name}")
+                continue
+            if target is not None and target.shape == image.shape and target.dtype == image.dtype:
+                target[...] = image
+                return True, target
+            return True, image
+        return False, None
+
+    def _rewind(self) -> None:
+        self._position = 0
+
+
+def create_source(source: Union[int, str, Path, None] = None, width: int = 1280, height: int = 720,
+                  fps: int = 30, realtime: bool = True, loop: bool = False) -> FrameSource:
+    """Build a source from a camera index, a video file or a directory of images.
+
+    ``width``/``height``/``fps`` configure a camera; replays keep their
+    own size and frame rate.
+    """
+    if source is None or isinstance(source, int) or str(source).isdigit():
+        return CameraSource(int(source or 0), width, height, fps)
+    path = Path(source).expanduser()
+    if path.is_dir():
+        return ImageDirectorySource(path, realtime=realtime, loop=loop)
+    return VideoFileSource(path, realtime=realtime, loop=loop)
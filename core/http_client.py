@@ -0,0 +1,335 @@
+"""
+Shared HTTP client for outbound API calls
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import HTTP_CONFIG
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx only negotiates HTTP/2 when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTP2_AVAILABLE = False
+
+# Statuses that mean the request was not processed and may be sent again
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("http_deadline", default=None)
+
+
+class DeadlineExceeded(requests.Timeout):
+    """The turn's time budget ran out before the request could be sent."""
+
+
+@contextmanager
+def turn_deadline(seconds: Optional[float]):
+    """Bound every request made inside the block by one end-to-end budget.
+
+    Nested blocks can only tighten the deadline, never extend it.
+    """
+    if not seconds:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current turn, or None when no deadline is set."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class _HttpxResponse:
+    """The subset of the requests.Response API the assistant uses."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+
+    @property
+    def content(self) -> bytes:
+        return self._response.read()
+
+    @property
+    def text(self) -> str:
+        self._response.read()
+        return self._response.text
+
+    def json(self):
+        self._response.read()
+        return self._response.json()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error for url: {self.url}", response=self)
+
+    def iter_lines(self, decode_unicode: bool = False) -> Iterator:
+        for line in self._response.iter_lines():
+            yield line if decode_unicode else line.encode("utf-8")
+
+    def close(self):
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _StreamedResponse:
+    """A streamed response that holds its per-host slot until it is consumed.
+
+    The slot is released once: when the body has been iterated to the end
+    or read whole, or when the response is closed (``with`` closes it).
+    Everything else is passed through to the wrapped response.
+    """
+
+    def __init__(self, response, release):
+        self._response = response
+        self._release = release
+        self._released = False
+        self._release_lock = threading.Lock()
+
+    def _done(self):
+        with self._release_lock:
+            if self._released:
+                return
+            self._released = True
+        self._release()
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    @property
+    def content(self) -> bytes:
+        try:
+            return self._response.content
+        finally:
+            self._done()
+
+    @property
+    def text(self) -> str:
+        try:
+            return self._response.text
+        finally:
+            self._done()
+
+    def json(self, **kwargs):
+        try:
+            return self._response.json(**kwargs)
+        finally:
+            self._done()
+
+    def iter_lines(self, *args, **kwargs) -> Iterator:
+        try:
+            yield from self._response.iter_lines(*args, **kwargs)
+        finally:
+            self._done()
+
+    def iter_content(self, *args, **kwargs) -> Iterator:
+        try:
+            yield from self._response.iter_content(*args, **kwargs)
+        finally:
+            self._done()
+
+    def close(self):
+        try:
+            self._response.close()
+        finally:
+            self._done()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # A caller that drops the response unread must not leak the slot
+        if not self._released:
+            self._done()
+
+
+class HttpClient:
+    """Keep-alive connection pool with per-host limits, retries and deadlines.
+
+    One session is shared by every caller, so repeated calls to the same
+    API reuse warm TLS connections instead of handshaking each time. A
+    per-host semaphore caps how many requests to one service are being
+    sent at once (a streamed response keeps its slot until it is read
+    or closed), and transient failures are retried with full-jitter
+    exponential backoff, all within the remaining budget of the current
+    turn (see ``turn_deadline``). With ``http2`` set and httpx/h2
+    installed, requests are multiplexed over HTTP/2 instead.
+    """
+
+    def __init__(
+        self,
+        per_host_limit: int = 4,
+        max_retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 2.0,
+        default_timeout: float = 15.0,
+        http2: bool = False,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.default_timeout = default_timeout
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+        self.http2 = bool(http2 and HTTP2_AVAILABLE)
+        if http2 and not HTTP2_AVAILABLE:
+            self.logger.info("HTTP/2 requested but httpx[http2] is not installed; using HTTP/1.1")
+        if self.http2:
+            self._httpx = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=None),
+            )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=per_host_limit)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+    def _timeout(self, requested: Optional[float]) -> float:
+        timeout = requested or self.default_timeout
+        budget = remaining_budget()
+        if budget is not None:
+            if budget <= 0:
+                raise DeadlineExceeded("Turn deadline exceeded")
+            timeout = min(timeout, budget)
+        return timeout
+
+    def _send(self, method: str, url: str, timeout: float, stream: bool, **kwargs):
+        if self.http2:
+            request = self._httpx.build_request(method, url, timeout=timeout, **kwargs)
+            response = _HttpxResponse(self._httpx.send(request, stream=True))
+            if not stream:
+                response.content  # read the body before the slot is released
+            return response
+        return self.session.request(method, url, timeout=timeout, stream=stream, **kwargs)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[float] = None,
+        stream: bool = False,
+        retry: Optional[bool] = None,
+        **kwargs,
+    ):
+        """Send a request; returns a requests.Response (or a compatible wrapper).
+
+        Connection failures and retryable statuses are retried for
+        idempotent methods, or for any method when ``retry`` is True.
+        Read timeouts are only retried for idempotent methods, since the
+        server may already have acted on the request.
+        """
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS
+        may_retry = idempotent if retry is None else retry
+        slot = self._slot(url)
+
+        attempt = 0
+        while True:
+            timeout_s = self._timeout(timeout)
+            if not slot.acquire(timeout=timeout_s):
+                raise DeadlineExceeded(f"No free connection slot for {urlsplit(url).netloc}")
+            response = None
+            try:
+                response = self._send(method, url, timeout_s, stream, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retryable = may_retry and (idempotent or not isinstance(e, requests.ReadTimeout))
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                response, error = None, e
+            except Exception as e:
+                # httpx transport errors map onto the same retry rules
+                if httpx is None or not isinstance(e, httpx.TransportError):
+                    raise
+                retryable = may_retry and (idempotent or not isinstance(e, httpx.ReadTimeout))
+                if not retryable or attempt >= self.max_retries:
+                    raise requests.ConnectionError(str(e)) from e
+                response, error = None, e
+            finally:
+                # A streamed body is still on the connection; its slot goes with it
+                if response is None or not stream:
+                    slot.release()
+
+            if response is not None:
+                if (response.status_code not in RETRYABLE_STATUSES
+                        or not may_retry or attempt >= self.max_retries):
+                    return _StreamedResponse(response, slot.release) if stream else response
+                error = f"HTTP {response.status_code}"
+                response.close()
+                if stream:
+                    slot.release()
+
+            attempt += 1
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            budget = remaining_budget()
+            if budget is not None and delay >= budget:
+                raise DeadlineExceeded(f"Turn deadline exceeded while retrying {url}")
+            self.logger.debug(f"Retrying {method} {url} in {delay:.2f}s after {error}")
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+        if self.http2:
+            self._httpx.close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Return the process-wide HTTP client, configured from HTTP_CONFIG."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            options = {k: v for k, v in HTTP_CONFIG.items() if k != "turn_deadline"}
+            _client = HttpClient(**options)
+        return _client
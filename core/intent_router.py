@@ -0,0 +1,258 @@
+"""
+Compiled intent router for SAM Assistant
+
+Commands are matched against a declarative intent table in a single pass
+over one trie-shaped regex compiled once at startup.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+
+@dataclass(frozen=True)
+class IntentRule:
+    """One row of the intent table.
+
+    Every condition that is set must hold for the rule to match:
+    ``any_of`` needs one substring, ``all_of`` needs every substring,
+    ``words`` needs one whole-word match and ``exact`` needs the stripped
+    text to equal one of the phrases. Rules are tried in table order.
+    """
+    intent: str
+    any_of: Tuple[str, ...] = ()
+    all_of: Tuple[str, ...] = ()
+    words: Tuple[str, ...] = ()
+    exact: Tuple[str, ...] = ()
+
+
+@dataclass
+class Route:
+    """Result of routing a command."""
+    category: str
+    quick: Optional[str] = None
+    slots: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_quick(self) -> bool:
+        return self.quick is not None
+
+
+# --- Intent table -------------------------------------------------------
+
+EMAIL_KEYWORDS = ("send gmail", "send email", "gmail", "email")
+
+QUICK_TRIGGERS = (
+    "help", "clear", "weather", "time", "date", "system", "screenshot",
+    "music", "notes", "calc", "web", "news", "ascii", "hello", "hi",
+    "thanks", "thank you", "bye", "goodbye", "what can you do", "who are you",
+    "open", "play", "generate", "code", "3d", "model", "viewer",
+)
+
+# Quick intents, in dispatch priority. Anything that passes the quick
+# trigger check but matches none of these routes to "task".
+QUICK_RULES = (
+    IntentRule("help", any_of=("help",)),
+    IntentRule("clear", any_of=("clear",)),
+    IntentRule("weather", any_of=("weather",)),
+    IntentRule("time", any_of=("time",)),
+    IntentRule("date", any_of=("date",)),
+    IntentRule("system", any_of=("system",)),
+    IntentRule("screenshot", any_of=("screenshot",)),
+    IntentRule("music", any_of=("music",)),
+    IntentRule("notes", any_of=("notes",)),
+    IntentRule("calculator", words=("calc", "calculator"), any_of=("open", "launch", "start")),
+    IntentRule("calculator", exact=("calc", "calculator")),
+    IntentRule("web", any_of=("web",)),
+    IntentRule("news", any_of=("news",)),
+    IntentRule("ascii", any_of=("ascii",)),
+    IntentRule("generate", any_of=("generate", "code")),
+    IntentRule("3d_model", any_of=("3d", "model", "viewer")),
+    IntentRule("greeting", any_of=("hello", "hi", "hey")),
+    IntentRule("thanks", any_of=("thanks", "thank you")),
+    IntentRule("goodbye", any_of=("bye", "goodbye")),
+    IntentRule("about", any_of=("what can you do", "who are you")),
+    IntentRule("open", any_of=("open",)),
+)
+
+# Full command categories, in routing priority. "user_defined" is resolved
+# against the caller's custom commands between 3d_model and system.
+CATEGORY_RULES = (
+    IntentRule("multi_intent", words=("and", "then", "after that", "next")),
+    IntentRule("multi_intent", any_of=(",",)),
+    IntentRule("media", all_of=("play", "youtube")),
+    IntentRule("vision", any_of=("what is this", "what do you see", "analyze", "camera", "vision", "see")),
+    IntentRule("3d_model", any_of=("3d", "model", "viewer", "cube", "sphere", "cylinder", "pyramid",
+                                   "load", "stl", "obj", "ply")),
+    IntentRule("user_defined"),
+    IntentRule("system", any_of=(
+        "system", "cpu", "memory", "battery", "screenshot", "open", "close", "kill",
+        "volume", "mute", "unmute", "brightness", "display", "screen", "extend", "duplicate",
+        "second screen", "pc screen", "shutdown", "restart", "sleep", "hibernate", "lock", "power",
+    )),
+    IntentRule("search", any_of=("search", "google", "find", "look up", "wikipedia", "news")),
+    IntentRule("navigation", any_of=(
+        "desktop", "window", "tab", "switch", "minimize", "maximize", "restore",
+        "scroll", "back", "forward", "settings", "wifi", "bluetooth", "display", "sound", "network",
+        "battery", "storage", "downloads", "documents", "pictures", "photos", "music", "videos",
+    )),
+    IntentRule("navigation", words=("go to",)),
+    IntentRule("calculation", any_of=("calculate", "compute", "math", "+", "-", "*", "/", "=")),
+    IntentRule("file", any_of=("file", "folder", "directory", "create", "delete", "move", "copy")),
+    IntentRule("media", any_of=("play", "music", "video", "song", "volume")),
+    IntentRule("email", any_of=("email", "gmail", "send", "mail")),
+)
+
+# Slot extractors, applied only to the winning intent. The first pattern
+# that matches fills the slots from its named groups.
+SLOT_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "media": (
+        r"play\s+(?P<query>.+?)\s+(?:on|in|from)\s+youtube\b",
+        r"play\s+(?:on|in|from)\s+youtube\s+(?P<query>.+)$",
+        r"play\s+(?P<query>.+?)\s+youtube\b",
+        r"\bplay\s+(?P<query>.+)$",
+    ),
+    "search": (
+        r"^(?P<kind>google|search|images?|news)\s+(?P<query>.+)$",
+    ),
+    "generate": (
+        r"generate(?P<prompt>.*)",
+        r"code(?P<prompt>.*)",
+    ),
+    "open": (
+        r"open(?P<target>.*)",
+    ),
+}
+
+
+def _trie_regex(keywords: Iterable[str]) -> str:
+    """Build a regex alternation shaped like a trie over the keywords.
+
+    Shared prefixes are factored out so the regex engine does a single
+    walk per text position instead of trying every keyword in turn.
+    """
+    trie: Dict[str, dict] = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        alts = [re.escape(ch) + build(node[ch]) for ch in sorted(k for k in node if k)]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class IntentRouter:
+    """Routes a command to a category, a quick intent and its slots in one pass."""
+
+    def __init__(
+        self,
+        category_rules: Tuple[IntentRule, ...] = CATEGORY_RULES,
+        quick_rules: Tuple[IntentRule, ...] = QUICK_RULES,
+        quick_triggers: Tuple[str, ...] = QUICK_TRIGGERS,
+        quick_excludes: Tuple[str, ...] = EMAIL_KEYWORDS,
+        slot_patterns: Optional[Dict[str, Tuple[str, ...]]] = None,
+    ):
+        self.category_rules = category_rules
+        self.quick_rules = quick_rules
+        self.quick_triggers = frozenset(quick_triggers)
+        self.quick_excludes = frozenset(quick_excludes)
+
+        keywords: Set[str] = set(quick_triggers) | set(quick_excludes)
+        for rule in category_rules + quick_rules:
+            keywords.update(rule.any_of, rule.all_of, rule.words)
+        # The scanner reports the longest keyword starting at each position;
+        # every shorter keyword that is a prefix of it also matched there.
+        self._scanner = re.compile("(?=(" + _trie_regex(keywords) + "))")
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            kw: tuple(p for p in keywords if kw.startswith(p)) for kw in keywords
+        }
+
+        patterns = SLOT_PATTERNS if slot_patterns is None else slot_patterns
+        self._slot_patterns: Dict[str, List[Pattern]] = {
+            intent: [re.compile(p, re.IGNORECASE | re.DOTALL) for p in pats]
+            for intent, pats in patterns.items()
+        }
+
+    def _scan(self, text: str) -> Tuple[Set[str], Set[str]]:
+        """Return (substring hits, whole-word hits) from a single scanner pass."""
+        hits: Set[str] = set()
+        word_hits: Set[str] = set()
+        n = len(text)
+        for m in self._scanner.finditer(text):
+            start = m.start()
+            left_ok = start == 0 or not _is_word_char(text[start - 1])
+            for kw in self._prefixes[m.group(1)]:
+                hits.add(kw)
+                end = start + len(kw)
+                if left_ok and (end == n or not _is_word_char(text[end])):
+                    word_hits.add(kw)
+        return hits, word_hits
+
+    @staticmethod
+    def _rule_matches(rule: IntentRule, text: str, hits: Set[str], word_hits: Set[str]) -> bool:
+        if rule.any_of and hits.isdisjoint(rule.any_of):
+            return False
+        if rule.all_of and not hits.issuperset(rule.all_of):
+            return False
+        if rule.words and word_hits.isdisjoint(rule.words):
+            return False
+        if rule.exact and text.strip() not in rule.exact:
+            return False
+        return bool(rule.any_of or rule.all_of or rule.words or rule.exact)
+
+    def extract_slots(self, intent: str, text: str) -> Dict[str, str]:
+        """Fill slots for an intent from its first matching slot pattern."""
+        for pattern in self._slot_patterns.get(intent, ()):
+            m = pattern.search(text)
+            if m:
+                return {k: v.strip() for k, v in m.groupdict().items() if v is not None}
+        return {}
+
+    def route(self, command: str, user_commands: Optional[Dict] = None) -> Route:
+        """Route a command.
+
+        ``user_commands`` is checked by exact (case-sensitive) lookup, as
+        custom commands are stored verbatim.
+        """
+        text = command.lower()
+        hits, word_hits = self._scan(text)
+
+        category = "ai"
+        for rule in self.category_rules:
+            if rule.intent == "user_defined":
+                if user_commands and command in user_commands:
+                    category = "user_defined"
+                    break
+                continue
+            if self._rule_matches(rule, text, hits, word_hits):
+                category = rule.intent
+                break
+
+        quick = None
+        if not hits.isdisjoint(self.quick_triggers) and hits.isdisjoint(self.quick_excludes):
+            quick = "task"
+            for rule in self.quick_rules:
+                if self._rule_matches(rule, text, hits, word_hits):
+                    quick = rule.intent
+                    break
+
+        slots = self.extract_slots(quick or category, text)
+        return Route(category=category, quick=quick, slots=slots)
+
+    def categorize(self, command: str, user_commands: Optional[Dict] = None) -> str:
+        """Return only the routing category for a command."""
+        return self.route(command, user_commands).category
@@ -1,7 +1,7 @@
 """
 Core interfaces and protocols for modular design
 """
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 
 class LLMProvider:
@@ -20,4 +20,109 @@ class LLMProvider:
 
         Implementations should return a plain text response.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def stream_response(
+        self,
+        user_text: str,
+        context: Optional[str] = None,
+        persona: Optional[str] = None,
+        memories: Optional[List[str]] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+    ) -> Iterator[str]:
+        """Generate a response as a stream of text chunks.
+
+        Providers with native streaming should override this; the default
+        yields the complete response as a single chunk.
+        """
+        yield self.generate_response(
+            user_text,
+            context=context,
+            persona=persona,
+            memories=memories,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+
+
+class KeywordSpotter:
+    """Interface for on-device wake word / keyword spotting engines"""
+
+    def set_keywords(self, keywords: List[str]) -> None:
+        """Replace the set of keywords to listen for."""
+        raise NotImplementedError
+
+    def can_detect(self, keyword: str) -> bool:
+        """Whether the engine has what it needs (templates, model) for a keyword."""
+        raise NotImplementedError
+
+    def detect(self, pcm: bytes, sample_rate: int = 16000) -> Optional[Tuple[str, float]]:
+        """Return (keyword, confidence in 0..1) if a keyword occurs in the
+        16-bit mono PCM audio, else None."""
+        raise NotImplementedError
+
+    def set_sensitivity(self, sensitivity: float, keyword: Optional[str] = None) -> None:
+        """0.0 (fewest false accepts) .. 1.0 (fewest misses); all keywords if None."""
+        raise NotImplementedError
+
+
+class STTError(RuntimeError):
+    """A speech-to-text engine could not process the audio (network, model, binary)."""
+
+
+class STTStream:
+    """Incremental recognition of one utterance"""
+
+    def accept(self, pcm: bytes) -> str:
+        """Add 16-bit mono PCM audio; return the current partial hypothesis ("" if none yet)."""
+        raise NotImplementedError
+
+    def finish(self) -> str:
+        """End the utterance and return the final transcript."""
+        raise NotImplementedError
+
+
+class BufferedSTTStream(STTStream):
+    """Stream for engines without partial results: transcribes once, at the end."""
+
+    def __init__(self, provider: "STTProvider", sample_rate: int, language: str):
+        self.provider = provider
+        self.sample_rate = sample_rate
+        self.language = language
+        self._chunks: List[bytes] = []
+
+    def accept(self, pcm: bytes) -> str:
+        self._chunks.append(pcm)
+        return ""
+
+    def finish(self) -> str:
+        return self.provider.transcribe(b"".join(self._chunks), self.sample_rate, self.language)
+
+
+class STTProvider:
+    """Interface for speech-to-text engines"""
+
+    name = "stt"
+    # Whether open_stream() yields partial hypotheses while audio arrives
+    streaming = False
+
+    def supports(self, language: str) -> bool:
+        """Whether the engine can transcribe ``language`` (e.g. "en-US")."""
+        return True
+
+    def transcribe(self, pcm: bytes, sample_rate: int = 16000, language: str = "en-US") -> str:
+        """Return the transcript of 16-bit mono PCM audio.
+
+        Returns an empty string when no speech was recognized and raises
+        STTError when the engine itself failed.
+        """
+        raise NotImplementedError
+
+    def open_stream(self, sample_rate: int = 16000, language: str = "en-US") -> STTStream:
+        """Start incremental recognition of one utterance.
+
+        Engines with native partial results should override this; the
+        default buffers the audio and transcribes it in ``finish``.
+        """
+        return BufferedSTTStream(self, sample_rate, language)
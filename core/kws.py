@@ -0,0 +1,292 @@
+"""
+On-device keyword spotting with MFCC features and template matching (DTW)
+"""
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from core.interfaces import KeywordSpotter
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+SAMPLE_RATE = 16000
+
+# Mean per-frame DTW distance accepted when a keyword has a single
+# template and has not been tuned against background audio
+DEFAULT_THRESHOLD = 6.0
+
+# Cepstral means are taken over this many frames (10 ms hop) around each
+# frame, so a frame's features depend only on audio within half a second
+# of it, not on how much silence or noise the segment carries
+CMN_FRAMES = 101
+
+# Bumped whenever mfcc() output changes; templates stored with another
+# version cannot be compared and have to be enrolled again
+FEATURE_VERSION = 2
+
+
+@functools.lru_cache(maxsize=4)
+def _mel_filterbank(n_filters: int, n_fft: int, sample_rate: int):
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    mels = np.linspace(hz_to_mel(20.0), hz_to_mel(sample_rate / 2.0), n_filters + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / sample_rate).astype(int)
+    bank = np.zeros((n_filters, n_fft // 2 + 1), dtype=np.float32)
+    for i in range(1, n_filters + 1):
+        left, center, right = bins[i - 1], bins[i], bins[i + 1]
+        if center > left:
+            bank[i - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            bank[i - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return bank
+
+
+@functools.lru_cache(maxsize=4)
+def _dct_matrix(n_out: int, n_in: int):
+    # Orthonormal DCT-II, as used for MFCCs
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    m = np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)
+    m[0] /= np.sqrt(2.0)
+    return m.astype(np.float32)
+
+
+def pcm_to_samples(pcm: Union[bytes, "np.ndarray"], sample_rate: int = SAMPLE_RATE):
+    """16-bit mono PCM as float32 in [-1, 1], resampled to 16 kHz."""
+    x = np.frombuffer(pcm, dtype=np.int16) if isinstance(pcm, (bytes, bytearray)) else np.asarray(pcm)
+    x = x.astype(np.float32) / 32768.0
+    if sample_rate != SAMPLE_RATE and x.size:
+        n_out = int(round(x.size * SAMPLE_RATE / sample_rate))
+        x = np.interp(np.linspace(0, x.size - 1, n_out), np.arange(x.size), x).astype(np.float32)
+    return x
+
+
+def sliding_cmn(ceps, window: int = CMN_FRAMES):
+    """Subtract from each frame the mean of the ``window`` frames centred on it.
+
+    Near the ends the window is cut short rather than padded.
+    """
+    half = window // 2
+    totals = np.concatenate((np.zeros((1, ceps.shape[1]), np.float64), np.cumsum(ceps, axis=0, dtype=np.float64)))
+    index = np.arange(ceps.shape[0])
+    lo = np.maximum(index - half, 0)
+    hi = np.minimum(index + half + 1, ceps.shape[0])
+    means = (totals[hi] - totals[lo]) / (hi - lo)[:, None]
+    return ceps - means
+
+
+def mfcc(samples, sample_rate: int = SAMPLE_RATE, n_mfcc: int = 13, n_filters: int = 26,
+         frame_ms: int = 25, hop_ms: int = 10, n_fft: int = 512):
+    """MFCC matrix (frames x coefficients 1..n_mfcc-1) with sliding cepstral mean removal.
+
+    c0 (overall loudness) is dropped so matching does not depend on how
+    close the speaker is to the microphone. The mean is local (see
+    ``sliding_cmn``) so a query scores the same however long the audio
+    around the keyword is.
+    """
+    frame_len = sample_rate * frame_ms // 1000
+    hop = sample_rate * hop_ms // 1000
+    x = np.append(samples[:1], samples[1:] - 0.97 * samples[:-1])
+    if x.size < frame_len:
+        x = np.pad(x, (0, frame_len - x.size))
+    frames = np.lib.stride_tricks.sliding_window_view(x, frame_len)[::hop] * np.hamming(frame_len)
+    power = np.abs(np.fft.rfft(frames, n_fft)) ** 2 / n_fft
+    energies = np.log(np.maximum(power @ _mel_filterbank(n_filters, n_fft, sample_rate).T, 1e-10))
+    ceps = energies @ _dct_matrix(n_mfcc, n_filters).T
+    ceps = ceps[:, 1:]
+    return sliding_cmn(ceps).astype(np.float32)
+
+
+def subsequence_dtw(template, query) -> float:
+    """Mean per-frame distance of the best match of ``template`` anywhere in ``query``.
+
+    The match may start and end at any query frame. Each template frame
+    advances the query by 0, 1 or 2 frames, so every row depends only on
+    the previous one and is computed as a single vector operation.
+    """
+    cost = np.sqrt(((template[:, None, :] - query[None, :, :]) ** 2).sum(axis=-1))
+    inf = np.float32(np.inf)
+    row = cost[0].copy()
+    for i in range(1, cost.shape[0]):
+        stay = row
+        step = np.concatenate(([inf], row[:-1]))
+        skip = np.concatenate(([inf, inf], row[:-2]))
+        row = cost[i] + np.minimum(np.minimum(stay, step), skip)
+    return float(row.min()) / cost.shape[0]
+
+
+def _slug(keyword: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", keyword.lower()).strip("_") or "keyword"
+
+
+class MfccDtwSpotter(KeywordSpotter):
+    """Keyword spotter that matches enrolled recordings by DTW over MFCCs.
+
+    Each keyword needs a few enrolled utterances; they are stored under
+    ``model_dir`` with one ``.npz`` of templates per keyword and an
+    ``index.json`` holding thresholds and sensitivities. A keyword fires
+    when its best template distance is below
+    ``threshold * (0.7 + 0.6 * sensitivity)``, so sensitivity 0.5 uses
+    the threshold as is.
+    """
+
+    def __init__(self, model_dir: Union[str, Path], keywords: Iterable[str] = (), sensitivity: float = 0.5):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("numpy is required for keyword spotting")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.model_dir = Path(model_dir)
+        self.default_sensitivity = sensitivity
+        self.keywords: List[str] = []
+        self._templates: Dict[str, List] = {}
+        self._settings: Dict[str, Dict] = {}
+        self._load()
+        self.set_keywords(keywords)
+
+    # ----- persistence -----
+
+    @property
+    def _index_path(self) -> Path:
+        return self.model_dir / "index.json"
+
+    def _load(self):
+        try:
+            if self._index_path.exists():
+                with open(self._index_path, "r", encoding="utf-8") as f:
+                    self._settings = json.load(f)
+            for keyword, settings in list(self._settings.items()):
+                if settings.get("features") != FEATURE_VERSION:
+                    self.logger.warning(f"Templates for '{keyword}' use old features; enroll it again")
+                    settings["threshold"] = None
+                    settings.pop("tuned", None)
+                    continue
+                with np.load(self.model_dir / settings["file"]) as data:
+                    self._templates[keyword] = [data[name] for name in data.files]
+        except Exception as e:
+            self.logger.error(f"Error loading keyword templates: {e}")
+
+    def _save(self, keyword: str):
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        settings = self._settings[keyword]
+        templates = self._templates.get(keyword, [])
+        np.savez(self.model_dir / settings["file"], *templates)
+        tmp = self._index_path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._settings, f, indent=2)
+        tmp.replace(self._index_path)
+
+    # ----- keywords and enrollment -----
+
+    def set_keywords(self, keywords: Iterable[str]) -> None:
+        self.keywords = [k.strip().lower() for k in keywords if k and k.strip()]
+
+    def can_detect(self, keyword: str) -> bool:
+        return bool(self._templates.get(keyword.strip().lower()))
+
+    def enroll(self, keyword: str, pcm: bytes, sample_rate: int = SAMPLE_RATE) -> int:
+        """Add one recorded utterance of ``keyword``; returns the template count."""
+        keyword = keyword.strip().lower()
+        features = mfcc(pcm_to_samples(pcm, sample_rate))
+        templates = self._templates.setdefault(keyword, [])
+        templates.append(features)
+        settings = self._settings.setdefault(
+            keyword, {"file": f"{_slug(keyword)}.npz", "threshold": None, "sensitivity": self.default_sensitivity}
+        )
+        settings["features"] = FEATURE_VERSION
+        if len(templates) >= 2 and not settings.get("tuned"):
+            # Accept anything about as close as the enrolled takes are to each other
+            pairwise = [
+                subsequence_dtw(a, b)
+                for i, a in enumerate(templates) for j, b in enumerate(templates) if i != j
+            ]
+            settings["threshold"] = float(max(pairwise)) * 1.1
+        self._save(keyword)
+        return len(templates)
+
+    def remove(self, keyword: str) -> None:
+        keyword = keyword.strip().lower()
+        self._templates.pop(keyword, None)
+        settings = self._settings.pop(keyword, None)
+        if settings:
+            (self.model_dir / settings["file"]).unlink(missing_ok=True)
+            with open(self._index_path, "w", encoding="utf-8") as f:
+                json.dump(self._settings, f, indent=2)
+
+    # ----- detection -----
+
+    def threshold(self, keyword: str) -> float:
+        settings = self._settings.get(keyword, {})
+        base = settings.get("threshold") or DEFAULT_THRESHOLD
+        sensitivity = settings.get("sensitivity", self.default_sensitivity)
+        return base * (0.7 + 0.6 * sensitivity)
+
+    def scores(self, pcm: bytes, sample_rate: int = SAMPLE_RATE) -> Dict[str, float]:
+        """Best template distance per active keyword (lower is closer)."""
+        query = mfcc(pcm_to_samples(pcm, sample_rate))
+        result = {}
+        for keyword in self.keywords:
+            templates = self._templates.get(keyword)
+            if templates:
+                result[keyword] = min(subsequence_dtw(t, query) for t in templates)
+        return result
+
+    def detect(self, pcm: bytes, sample_rate: int = SAMPLE_RATE) -> Optional[Tuple[str, float]]:
+        best = None
+        for keyword, distance in self.scores(pcm, sample_rate).items():
+            threshold = self.threshold(keyword)
+            if distance <= threshold:
+                confidence = max(0.0, min(1.0, 1.0 - distance / (2.0 * threshold)))
+                if best is None or confidence > best[1]:
+                    best = (keyword, confidence)
+        return best
+
+    # ----- tuning -----
+
+    def set_sensitivity(self, sensitivity: float, keyword: Optional[str] = None) -> None:
+        sensitivity = max(0.0, min(1.0, float(sensitivity)))
+        targets = [keyword.strip().lower()] if keyword else list(self._settings)
+        if keyword is None:
+            self.default_sensitivity = sensitivity
+        for target in targets:
+            if target in self._settings:
+                self._settings[target]["sensitivity"] = sensitivity
+                self._save(target)
+
+    def tune_false_accepts(
+        self,
+        negatives: Iterable[bytes],
+        max_false_accept_rate: float = 0.01,
+        sample_rate: int = SAMPLE_RATE,
+    ) -> Dict[str, float]:
+        """Set each keyword's threshold from background (non-keyword) clips.
+
+        The threshold is placed at the ``max_false_accept_rate`` quantile of
+        the keyword's distances to the negatives, so at sensitivity 0.5 at
+        most that fraction of similar clips would fire. Returns the new
+        thresholds.
+        """
+        distances: Dict[str, List[float]] = {}
+        for pcm in negatives:
+            for keyword, distance in self.scores(pcm, sample_rate).items():
+                distances.setdefault(keyword, []).append(distance)
+        tuned = {}
+        for keyword, values in distances.items():
+            threshold = float(np.quantile(values, max_false_accept_rate))
+            self._settings[keyword]["threshold"] = threshold
+            self._settings[keyword]["tuned"] = True
+            self._save(keyword)
+            tuned[keyword] = threshold
+        return tuned
@@ -4,14 +4,20 @@ Gemini LLM provider implementation
 from __future__ import annotations
 
 import google.generativeai as genai
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from config.settings import AI_CONFIG, API_KEYS
 from core.interfaces import LLMProvider
+from core.llm_cache import ResponseCache
 
 
 class GeminiProvider(LLMProvider):
-    def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model_name: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
         key = api_key or API_KEYS.get("gemini")
         if not key:
             raise ValueError("GEMINI_API_KEY is not set. Please configure it in your environment.")
@@ -19,15 +25,14 @@ class GeminiProvider(LLMProvider):
         genai.configure(api_key=key)
         self.model_name = model_name or AI_CONFIG.get("model_name", "gemini-1.5-flash")
         self.model = genai.GenerativeModel(self.model_name)
+        self.cache = cache
 
-    def generate_response(
+    def _build_prompt(
         self,
         user_text: str,
-        context: Optional[str] = None,
-        persona: Optional[str] = None,
-        memories: Optional[List[str]] = None,
-        max_tokens: int = 512,
-        temperature: float = 0.7,
+        context: Optional[str],
+        persona: Optional[str],
+        memories: Optional[List[str]],
     ) -> str:
         system_instruction = persona or AI_CONFIG.get("personality")
 
@@ -41,7 +46,41 @@ class GeminiProvider(LLMProvider):
             parts.append(f"Relevant memories:\n{mem_text}")
         parts.append(f"User: {user_text}")
 
-        prompt = "\n\n".join(parts)
+        return "\n\n".join(parts)
+
+    def _cache_args(
+        self,
+        user_text: str,
+        context: Optional[str],
+        persona: Optional[str],
+        memories: Optional[List[str]],
+    ) -> dict:
+        # Recalled memories shape the reply just like context does
+        if memories:
+            context = "\n".join([context or ""] + list(memories))
+        return {
+            "prompt": user_text,
+            "persona": persona or AI_CONFIG.get("personality"),
+            "context": context,
+            "model": self.model_name,
+            "intent": "chat",
+        }
+
+    def generate_response(
+        self,
+        user_text: str,
+        context: Optional[str] = None,
+        persona: Optional[str] = None,
+        memories: Optional[List[str]] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+    ) -> str:
+        cache_args = self._cache_args(user_text, context, persona, memories)
+        if self.cache is not None:
+            cached = self.cache.get(**cache_args)
+            if cached is not None:
+                return cached
+        prompt = self._build_prompt(user_text, context, persona, memories)
 
         try:
             result = self.model.generate_content(
@@ -51,7 +90,59 @@ class GeminiProvider(LLMProvider):
                     "max_output_tokens": max_tokens,
                 },
             )
-            return (result.text or "")[:4096]
+            text = (result.text or "")[:4096]
+            if self.cache is not None:
+                cache_args["response"] = text
+                self.cache.put(**cache_args)
+            return text
         except Exception as e:
             # Fallback minimal response
-            return f"I'm sorry, I couldn't process that request right now. ({e})"
\ No newline at end of file
+            return f"I'm sorry, I couldn't process that request right now. ({e})"
+
+    def stream_response(
+        self,
+        user_text: str,
+        context: Optional[str] = None,
+        persona: Optional[str] = None,
+        memories: Optional[List[str]] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+    ) -> Iterator[str]:
+        cache_args = self._cache_args(user_text, context, persona, memories)
+        if self.cache is not None:
+            cached = self.cache.get(**cache_args)
+            if cached is not None:
+                yield cached
+                return
+        prompt = self._build_prompt(user_text, context, persona, memories)
+
+        emitted = 0
+        parts = []
+        try:
+            result = self.model.generate_content(
+                prompt,
+                generation_config={
+                    "temperature": temperature,
+                    "max_output_tokens": max_tokens,
+                },
+                stream=True,
+            )
+            for chunk in result:
+                text = getattr(chunk, "text", "") or ""
+                if not text:
+                    continue
+                # Keep the same 4096-character cap as generate_response
+                text = text[: 4096 - emitted]
+                emitted += len(text)
+                parts.append(text)
+                yield text
+                if emitted >= 4096:
+                    break
+        except Exception as e:
+            if not emitted:
+                yield f"I'm sorry, I couldn't process that request right now. ({e})"
+            return
+        # Only a stream that finished without error is worth replaying
+        if self.cache is not None and parts:
+            cache_args["response"] = "".join(parts)
+            self.cache.put(**cache_args)
@@ -0,0 +1,278 @@
+"""
+Persistent response cache for LLM calls
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Optional, Union
+
+from core.db import get_database
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"\w+")
+
+# Filler words ignored when comparing prompts for near-duplicates. Negations
+# and words such as "on"/"off" are deliberately kept, since they flip meaning.
+_FILLER_WORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "what", "whats", "s", "of",
+    "please", "can", "could", "would", "you", "me", "tell", "i", "hey", "sam",
+})
+
+MIGRATIONS = (
+    (
+        """
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            scope TEXT NOT NULL,
+            prompt TEXT NOT NULL,
+            response TEXT NOT NULL,
+            intent TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used)",
+    ),
+)
+
+
+def normalize_prompt(text: str) -> str:
+    """Canonical form of a prompt: NFKC, lowercase, collapsed whitespace, no trailing punctuation."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return _WHITESPACE_RE.sub(" ", text).strip().rstrip("?!.。？！ ")
+
+
+def _digest(*parts: Optional[str]) -> str:
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _shingles(normalized: str) -> FrozenSet[str]:
+    """Word bigrams of the prompt, without filler words, with its start and end marked.
+
+    Bigrams keep word order, so "convert usd to eur" and "convert eur to
+    usd" share almost nothing even though they use the same words.
+    """
+    words = ["^"] + [t for t in _TOKEN_RE.findall(normalized) if t not in _FILLER_WORDS] + ["$"]
+    if len(words) == 2:
+        return frozenset()
+    return frozenset(f"{a} {b}" for a, b in zip(words, words[1:]))
+
+
+@dataclass
+class _Entry:
+    scope: str
+    tokens: FrozenSet[str]
+    response: str
+    expires_at: float
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of LLM replies with per-intent TTLs, backed by SQLite.
+
+    The key covers the normalized prompt plus a scope hash of persona,
+    language, context and model, so a reply is only reused when the model
+    would have seen the same conversation. Entries live in memory in LRU
+    order and are written through to disk, so the cache survives restarts.
+    With ``near_duplicate_threshold`` set, a miss falls back to the most
+    similar prompt in the same scope by Jaccard similarity of word bigrams.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = 2000,
+        ttl_by_intent: Optional[Dict[str, float]] = None,
+        near_duplicate_threshold: Optional[float] = None,
+        enabled: bool = True,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_by_intent = dict(ttl_by_intent or {"default": 3600})
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.metrics = {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0}
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._scopes: Dict[str, Dict[str, FrozenSet[str]]] = {}
+
+        self.db = get_database(path)
+        self.db.migrate(MIGRATIONS)
+        # Recency updates are frequent and only matter for eviction order
+        self._touch_writer = self.db.writer(
+            "UPDATE llm_cache SET last_used = ?, hits = hits + 1 WHERE key = ?"
+        )
+        self._load()
+
+    def _load(self):
+        now = time.time()
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+                cursor.execute(
+                    "SELECT key, scope, prompt, response, expires_at FROM llm_cache "
+                    "ORDER BY last_used DESC LIMIT ?",
+                    (self.max_entries,),
+                )
+                rows = cursor.fetchall()
+            for key, scope, prompt, response, expires_at in reversed(rows):
+                self._add(key, _Entry(scope, _shingles(prompt), response, expires_at))
+        except Exception as e:
+            self.logger.error(f"Error loading LLM response cache: {e}")
+
+    def _add(self, key: str, entry: _Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._scopes.setdefault(entry.scope, {})[key] = entry.tokens
+
+    def _drop(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            scope = self._scopes.get(entry.scope)
+            if scope is not None:
+                scope.pop(key, None)
+                if not scope:
+                    del self._scopes[entry.scope]
+        return entry
+
+    def ttl_for(self, intent: Optional[str]) -> float:
+        return self.ttl_by_intent.get(intent or "default", self.ttl_by_intent.get("default", 0))
+
+    @staticmethod
+    def scope_for(
+        persona: Optional[str] = None,
+        language: Optional[str] = None,
+        context: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        return _digest(
+            hashlib.sha256((persona or "").encode("utf-8")).hexdigest(),
+            language or "",
+            hashlib.sha256((context or "").encode("utf-8")).hexdigest(),
+            model or "",
+        )
+
+    def get(
+        self,
+        prompt: str,
+        persona: Optional[str] = None,
+        language: Optional[str] = None,
+        context: Optional[str] = None,
+        model: Optional[str] = None,
+        intent: Optional[str] = None,
+    ) -> Optional[str]:
+        """Return a cached reply, or None on a miss."""
+        if not self.enabled or self.ttl_for(intent) <= 0:
+            return None
+        normalized = normalize_prompt(prompt)
+        scope = self.scope_for(persona, language, context, model)
+        key = _digest(scope, normalized)
+        now = time.time()
+
+        with self._lock:
+            entry = self._lookup(key, now)
+            if entry is not None:
+                self.metrics["hits"] += 1
+            elif self.near_duplicate_threshold:
+                key = self._nearest(scope, _shingles(normalized))
+                entry = self._lookup(key, now) if key else None
+                if entry is not None:
+                    self.metrics["near_hits"] += 1
+            if entry is None:
+                self.metrics["misses"] += 1
+                return None
+        self._touch_writer.put((now, key))
+        return entry.response
+
+    def _lookup(self, key: str, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._drop(key)
+            self.metrics["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, scope: str, tokens: FrozenSet[str]) -> Optional[str]:
+        candidates = self._scopes.get(scope)
+        if not candidates or not tokens:
+            return None
+        best_key, best_score = None, 0.0
+        for key, other in candidates.items():
+            union = len(tokens | other)
+            score = len(tokens & other) / union if union else 0.0
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key if best_score >= self.near_duplicate_threshold else None
+
+    def put(
+        self,
+        prompt: str,
+        response: str,
+        persona: Optional[str] = None,
+        language: Optional[str] = None,
+        context: Optional[str] = None,
+        model: Optional[str] = None,
+        intent: Optional[str] = None,
+    ):
+        """Store a reply under the intent's TTL; a zero TTL stores nothing."""
+        ttl = self.ttl_for(intent)
+        if not self.enabled or ttl <= 0 or not response:
+            return
+        normalized = normalize_prompt(prompt)
+        scope = self.scope_for(persona, language, context, model)
+        key = _digest(scope, normalized)
+        now = time.time()
+
+        with self._lock:
+            self._drop(key)
+            self._add(key, _Entry(scope, _shingles(normalized), response, now + ttl))
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                old_key = next(iter(self._entries))
+                self._drop(old_key)
+                evicted.append((old_key,))
+            self.metrics["stores"] += 1
+            self.metrics["evictions"] += len(evicted)
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO llm_cache "
+                    "(key, scope, prompt, response, intent, created_at, expires_at, last_used, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                    (key, scope, normalized, response, intent or "default", now, now + ttl, now),
+                )
+                if evicted:
+                    cursor.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+        except Exception as e:
+            self.logger.error(f"Error storing LLM response: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+        self._touch_writer.flush()
+        with self.db.cursor() as cursor:
+            cursor.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus current size and hit rate."""
+        with self._lock:
+            stats = dict(self.metrics)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["near_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["near_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -3,38 +3,87 @@ Simple persistent memory service for SAM Assistant
 """
 from __future__ import annotations
 
-import json
+import logging
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Sequence
 from datetime import datetime
 
+from core.memory_index import InvertedIndex, VectorIndex, NUMPY_AVAILABLE
+from core.memory_journal import MemoryJournal
+
 
 class MemoryService:
     """Persistent memory storage to remember user facts and preferences."""
 
-    def __init__(self, data_dir: Path, filename: str = "memory.json"):
+    def __init__(
+        self,
+        data_dir: Path,
+        filename: str = "memory.json",
+        embedder: Optional[Callable[[str], Sequence[float]]] = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
         self.data_dir = data_dir
         self.filepath = self.data_dir / filename
         self.memories: List[Dict] = []
+        self.journal = MemoryJournal(self.filepath)
+        self.index = InvertedIndex()
+        self.tag_index: Dict[str, List[int]] = {}
+        # Embedding search is only enabled when an embedder is supplied
+        self.vectors: Optional[VectorIndex] = None
+        if embedder is not None and NUMPY_AVAILABLE:
+            self.vectors = VectorIndex(embedder, self.filepath.with_suffix(".vectors.f32"))
         self._load()
+        self._build_indexes()
 
     def _load(self):
         try:
-            if self.filepath.exists():
-                with open(self.filepath, "r") as f:
-                    self.memories = json.load(f)
-            else:
-                self.memories = []
-        except Exception:
-            # Start fresh if memory file is corrupted
+            self.memories = self.journal.load()
+        except Exception as e:
+            self.logger.error(f"Error loading memories: {e}")
             self.memories = []
 
-    def _save(self):
+    def _index_entry(self, doc_id: int, entry: Dict):
+        self.index.add(doc_id, entry.get("text", ""))
+        for tag in entry.get("tags", []):
+            self.tag_index.setdefault(tag, []).append(doc_id)
+
+    def _build_indexes(self):
+        """Build the in-memory indexes once from the loaded memories."""
+        self.index = InvertedIndex()
+        self.tag_index = {}
+        for doc_id, entry in enumerate(self.memories):
+            self._index_entry(doc_id, entry)
+        if self.vectors is not None:
+            try:
+                if not self.vectors.load(len(self.memories)):
+                    self.vectors.rebuild([m.get("text", "") for m in self.memories])
+            except Exception as e:
+                self.logger.error(f"Disabling vector memory search: {e}")
+                self.vectors = None
+
+    def _save(self, doc_id: int, entry: Dict):
+        try:
+            self.journal.append(doc_id, entry)
+            if self.journal.needs_compaction():
+                self.journal.compact(self.memories)
+        except Exception as e:
+            self.logger.error(f"Error saving memory: {e}")
+
+    def flush(self):
+        """Force any batched journal writes to disk."""
         try:
-            with open(self.filepath, "w") as f:
-                json.dump(self.memories, f, indent=2)
-        except Exception:
-            pass
+            self.journal.sync()
+        except Exception as e:
+            self.logger.error(f"Error flushing memory journal: {e}")
+
+    def close(self):
+        """Compact pending journal entries into the snapshot and close it."""
+        try:
+            if self.journal.pending:
+                self.journal.compact(self.memories)
+            self.journal.close()
+        except Exception as e:
+            self.logger.error(f"Error closing memory journal: {e}")
 
     def add_memory(self, text: str, tags: Optional[List[str]] = None):
         entry = {
@@ -42,23 +91,36 @@ class MemoryService:
             "tags": tags or [],
             "created_at": datetime.now().isoformat(),
         }
+        doc_id = len(self.memories)
         self.memories.append(entry)
-        # Keep memory bounded
-        if len(self.memories) > 1000:
-            self.memories = self.memories[-1000:]
-        self._save()
+        self._index_entry(doc_id, entry)
+        if self.vectors is not None:
+            try:
+                self.vectors.add(entry["text"])
+            except Exception as e:
+                # A missing row would misalign every later vector
+                self.logger.error(f"Disabling vector memory search: {e}")
+                self.vectors = None
+        self._save(doc_id, entry)
 
     def get_memories_by_tag(self, tag: str) -> List[Dict]:
-        return [m for m in self.memories if tag in m.get("tags", [])]
+        return [self.memories[i] for i in self.tag_index.get(tag, [])]
 
     def get_relevant_memories(self, query: str, top_k: int = 5) -> List[str]:
-        """Very simple keyword-based retrieval for now."""
-        q = set(query.lower().split())
-        scored = []
-        for m in self.memories:
-            words = set(m["text"].lower().split())
-            score = len(q.intersection(words))
-            if score > 0:
-                scored.append((score, m["text"]))
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [t for _, t in scored[:top_k]]
\ No newline at end of file
+        """BM25 keyword retrieval, fused with embedding search when enabled."""
+        keyword_hits = self.index.search(query, top_k)
+        if self.vectors is None:
+            return [self.memories[i]["text"] for _, i in keyword_hits]
+
+        try:
+            vector_hits = self.vectors.search(query, top_k)
+        except Exception as e:
+            self.logger.error(f"Vector memory search failed: {e}")
+            vector_hits = []
+        # Reciprocal rank fusion keeps the two score scales comparable
+        fused: Dict[int, float] = {}
+        for hits in (keyword_hits, vector_hits):
+            for rank, (_, doc_id) in enumerate(hits):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (60 + rank)
+        ranked = sorted(fused.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]
+        return [self.memories[i]["text"] for i, _ in ranked]
\ No newline at end of file
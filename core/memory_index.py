@@ -0,0 +1,166 @@
+"""
+Search indexes for the SAM Assistant memory service
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens used for both indexing and querying."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """Incremental inverted index with BM25 scoring.
+
+    Documents are identified by their position in the memory list, so
+    adding one only touches the postings of its own terms.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: List[int] = []
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: int, text: str):
+        tokens = tokenize(text)
+        # Pad for ids that were skipped (e.g. entries without text)
+        while len(self.doc_lengths) <= doc_id:
+            self.doc_lengths.append(0)
+        self.doc_lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[float, int]]:
+        """Return up to top_k (score, doc_id) pairs, best first."""
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return []
+        avg_len = (self.total_length / n_docs) or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1.0 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        # Ties go to the older memory, matching the previous keyword ranking
+        best = heapq.nsmallest(top_k, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [(score, doc_id) for doc_id, score in best]
+
+
+class VectorIndex:
+    """Optional embedding matrix with cosine top-k search.
+
+    Vectors are normalized on insert and appended as raw float32 rows to
+    a sidecar file, so embeddings survive restarts without re-encoding
+    and an append never rewrites earlier rows. The row width is kept in a
+    small ``.dim`` file next to it, since it cannot be told from the rows.
+    """
+
+    def __init__(self, embed: Callable[[str], Sequence[float]], path: Optional[Path] = None):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("numpy is required for vector memory search")
+        self.embed = embed
+        self.path = path
+        self.dim_path = path.with_suffix(".dim") if path is not None else None
+        self.dim: Optional[int] = None
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _normalize(self, vector: Sequence[float]):
+        v = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+    def _reserve(self, rows: int):
+        if rows <= self._matrix.shape[0]:
+            return
+        # Grow geometrically so appends stay amortized O(1)
+        capacity = max(rows, 2 * self._matrix.shape[0], 64)
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        if self._count:
+            grown[: self._count] = self._matrix[: self._count]
+        self._matrix = grown
+
+    def load(self, expected_rows: int) -> bool:
+        """Load persisted rows; returns False if the file does not line up."""
+        if self.path is None or not self.path.exists() or expected_rows == 0:
+            return False
+        try:
+            dim = int(self.dim_path.read_text().strip())
+        except (OSError, ValueError):
+            return False
+        data = np.fromfile(self.path, dtype=np.float32)
+        if dim <= 0 or data.size != expected_rows * dim:
+            return False
+        self.dim = dim
+        self._matrix = data.reshape(expected_rows, self.dim).copy()
+        self._count = expected_rows
+        return True
+
+    def rebuild(self, texts: Sequence[str]):
+        """Re-embed every text and rewrite the sidecar file."""
+        self._count = 0
+        self.dim = None
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        if self.path is not None:
+            for path in (self.path, self.dim_path):
+                if path.exists():
+                    path.unlink()
+        for text in texts:
+            self.add(text)
+
+    def add(self, text: str):
+        v = self._normalize(self.embed(text))
+        if self.dim is None:
+            self.dim = v.shape[0]
+            if self.path is not None:
+                self.dim_path.write_text(str(self.dim))
+        if v.shape[0] != self.dim:
+            raise ValueError(f"Embedding dimension changed from {self.dim} to {v.shape[0]}")
+        self._reserve(self._count + 1)
+        self._matrix[self._count] = v
+        self._count += 1
+        if self.path is not None:
+            with open(self.path, "ab") as f:
+                f.write(v.tobytes())
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[float, int]]:
+        """Return up to top_k (cosine, row) pairs, best first."""
+        if not self._count:
+            return []
+        q = self._normalize(self.embed(query))
+        sims = self._matrix[: self._count] @ q
+        k = min(top_k, self._count)
+        # argpartition selects the top k without sorting the whole column
+        idx = np.argpartition(-sims, k - 1)[:k]
+        idx = idx[np.argsort(-sims[idx], kind="stable")]
+        return [(float(sims[i]), int(i)) for i in idx]
@@ -0,0 +1,179 @@
+"""
+Append-only journal persistence for the SAM Assistant memory service
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class MemoryJournal:
+    """Snapshot plus JSON-lines journal.
+
+    The snapshot keeps the original ``memory.json`` layout (a JSON list).
+    Each new entry is appended to the journal as one line tagged with its
+    position, so a write is O(1) and a torn tail only loses that line.
+    Journal lines already covered by the snapshot are skipped on load,
+    which makes a crash between snapshot and truncation harmless.
+
+    Only a torn or unparseable final line is ever cut off. A snapshot that
+    cannot be read, or a journal that does not continue from it, is moved
+    aside with a ``.corrupt-<time>`` suffix instead of being overwritten.
+    Writes are fsynced once per ``fsync_batch`` entries and, through a
+    timer, at most ``fsync_interval`` seconds after the last one.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Path,
+        journal_path: Optional[Path] = None,
+        fsync_batch: int = 16,
+        fsync_interval: float = 1.0,
+        compact_every: int = 500,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or snapshot_path.with_suffix(".journal.jsonl")
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        self._handle = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._journal_entries = 0
+        self._lock = threading.RLock()
+        self._sync_timer: Optional[threading.Timer] = None
+
+    def _quarantine(self, path: Path) -> Path:
+        """Move a file that cannot be trusted out of the way, keeping its contents."""
+        aside = path.with_name(f"{path.name}.corrupt-{int(time.time())}")
+        os.replace(path, aside)
+        self.logger.error(f"Moved unreadable {path.name} aside to {aside.name}")
+        return aside
+
+    def load(self) -> List[Dict]:
+        """Load the snapshot and replay the journal on top of it."""
+        entries: List[Dict] = []
+        if self.snapshot_path.exists():
+            try:
+                with open(self.snapshot_path, "r") as f:
+                    entries = json.load(f)
+                if not isinstance(entries, list):
+                    raise ValueError("snapshot is not a list")
+            except Exception as e:
+                # The journal only makes sense on top of this snapshot, so both
+                # are kept for recovery and memory starts empty
+                self.logger.error(f"Error loading memory snapshot: {e}")
+                self._quarantine(self.snapshot_path)
+                if self.journal_path.exists():
+                    self._quarantine(self.journal_path)
+                entries = []
+        base = len(entries)
+
+        if self.journal_path.exists():
+            with open(self.journal_path, "rb") as f:
+                lines = f.readlines()
+            good_offset, broken = 0, None
+            for number, raw in enumerate(lines):
+                last = number == len(lines) - 1
+                try:
+                    if not raw.endswith(b"\n"):
+                        raise ValueError("torn write")
+                    record = json.loads(raw)
+                    seq, entry = record["id"], record["entry"]
+                except Exception:
+                    broken = "tail" if last else "corrupt"
+                    break
+                if seq > len(entries):
+                    # Missing base or lost lines: later lines cannot be applied
+                    broken = "gap"
+                    break
+                if seq == len(entries):
+                    entries.append(entry)
+                good_offset += len(raw)
+
+            if broken == "tail":
+                self.logger.warning("Discarding incomplete memory journal tail")
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(good_offset)
+            elif broken:
+                # Keep the whole journal for recovery; continue from the good prefix
+                aside = self._quarantine(self.journal_path)
+                with open(aside, "rb") as src, open(self.journal_path, "wb") as dst:
+                    dst.write(src.read(good_offset))
+                    dst.flush()
+                    os.fsync(dst.fileno())
+
+        self._journal_entries = len(entries) - base
+        return entries
+
+    def _open(self):
+        if self._handle is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self.journal_path, "a", encoding="utf-8")
+        return self._handle
+
+    def append(self, seq: int, entry: Dict):
+        """Append one entry; fsync once per batch, or by timer within the interval."""
+        with self._lock:
+            handle = self._open()
+            handle.write(json.dumps({"id": seq, "entry": entry}) + "\n")
+            handle.flush()
+            self._unsynced += 1
+            self._journal_entries += 1
+            if (self._unsynced >= self.fsync_batch
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self.sync()
+            elif self._sync_timer is None:
+                # The tail of a burst must not wait for the next append
+                self._sync_timer = threading.Timer(self.fsync_interval, self.sync)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+
+    def sync(self):
+        """Force pending journal writes to disk."""
+        with self._lock:
+            if self._sync_timer is not None:
+                if self._sync_timer is not threading.current_thread():
+                    self._sync_timer.cancel()
+                self._sync_timer = None
+            if self._handle is not None and self._unsynced:
+                os.fsync(self._handle.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    @property
+    def pending(self) -> int:
+        """Entries in the journal that the snapshot does not cover yet."""
+        return self._journal_entries
+
+    def needs_compaction(self) -> bool:
+        return self._journal_entries >= self.compact_every
+
+    def compact(self, entries: List[Dict]):
+        """Write a fresh snapshot atomically, then empty the journal."""
+        with self._lock:
+            self.sync()
+            tmp_path = self.snapshot_path.with_suffix(self.snapshot_path.suffix + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self.close()
+            with open(self.journal_path, "w"):
+                pass
+            self._journal_entries = 0
+
+    def close(self):
+        with self._lock:
+            self.sync()
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
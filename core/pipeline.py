@@ -0,0 +1,260 @@
+"""
+Staged asyncio command pipeline shared by the assistant front ends
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# The job whose stage handler is running in the current thread/task
+_current_job: contextvars.ContextVar[Optional["Job"]] = contextvars.ContextVar("pipeline_job", default=None)
+
+
+def current_job() -> Optional["Job"]:
+    """Job being processed by the calling stage handler, if any."""
+    return _current_job.get()
+
+
+@dataclass
+class Stage:
+    """One pipeline stage: a bounded queue drained by ``workers`` workers.
+
+    ``handler(job, payload)`` may be a plain function, run on the stage's
+    own thread pool, or a coroutine function, awaited on the loop. It
+    returns ``(next_stage, payload)`` to hand the job on, or None when
+    the job is done.
+    """
+    name: str
+    handler: Callable[["Job", Any], Any]
+    workers: int = 1
+    queue_size: int = 8
+
+
+@dataclass(eq=False)
+class Job:
+    """One command travelling through the pipeline."""
+    id: int
+    key: Optional[str] = None
+    created_at: float = field(default_factory=time.monotonic)
+    _cancelled: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+
+class CommandPipeline:
+    """Bounded, staged command processing on one asyncio event loop.
+
+    Replaces a thread per command (or per audio chunk) with a fixed set
+    of workers per stage. ``submit`` applies admission control: when
+    ``max_inflight`` jobs are already in the pipeline, new work is
+    refused instead of queued without limit. Submitting with a
+    ``supersede`` key cancels the previous job under that key, so a new
+    command makes the stale one drop out at its next stage boundary.
+    Results reach the UI through the single ``ui_dispatch`` callable.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        ui_dispatch: Optional[Callable[[Callable[[], None]], None]] = None,
+        max_inflight: int = 16,
+        name: str = "pipeline",
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.name = name
+        self.stages: Dict[str, Stage] = {stage.name: stage for stage in stages}
+        self.ui_dispatch = ui_dispatch
+        self.max_inflight = max_inflight
+        self.metrics = {"admitted": 0, "rejected": 0, "cancelled": 0, "completed": 0, "failed": 0}
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._latest: Dict[str, Job] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._own_loop = False
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    # ----- lifecycle -----
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start workers on ``loop``, or on a private loop thread if None."""
+        if self._loop is not None:
+            return
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            self._own_loop = True
+            threading.Thread(target=loop.run_forever, name=f"{self.name}-loop", daemon=True).start()
+        for stage in self.stages.values():
+            self._queues[stage.name] = asyncio.Queue(maxsize=stage.queue_size)
+            self._executors[stage.name] = ThreadPoolExecutor(
+                max_workers=stage.workers, thread_name_prefix=f"{self.name}-{stage.name}"
+            )
+        self._loop = loop
+        # Callbacks run in order, so workers exist before any submitted put
+        if self._in_loop_thread(loop):
+            self._spawn_workers()
+        else:
+            loop.call_soon_threadsafe(self._spawn_workers)
+
+    def _spawn_workers(self):
+        for stage in self.stages.values():
+            for _ in range(stage.workers):
+                self._tasks.append(self._loop.create_task(self._worker(stage)))
+
+    @staticmethod
+    def _in_loop_thread(loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def stop(self):
+        """Cancel workers and drop queued work."""
+        if self._loop is None:
+            return
+        loop, self._loop = self._loop, None
+
+        def shutdown():
+            for task in self._tasks:
+                task.cancel()
+            self._tasks.clear()
+
+        if self._in_loop_thread(loop):
+            shutdown()
+        else:
+            loop.call_soon_threadsafe(shutdown)
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
+        if self._own_loop:
+            loop.call_soon_threadsafe(loop.stop)
+
+    # ----- submission -----
+
+    def submit(self, stage: str, payload: Any, supersede: Optional[str] = None,
+               job: Optional[Job] = None) -> Optional[Job]:
+        """Queue ``payload`` for ``stage`` from any thread.
+
+        Returns the job, or None if the pipeline is full or not running.
+        Passing ``job`` adds more work for an existing job (for example
+        speech for a reply) without a new admission slot.
+        """
+        if self._loop is None or stage not in self.stages:
+            return None
+        if job is None:
+            with self._lock:
+                if self._inflight >= self.max_inflight:
+                    self.metrics["rejected"] += 1
+                    return None
+                self._inflight += 1
+                self.metrics["admitted"] += 1
+                job = Job(next(self._ids), key=supersede)
+                if supersede:
+                    previous = self._latest.get(supersede)
+                    self._latest[supersede] = job
+                    if previous is not None and not previous.cancelled:
+                        previous.cancel()
+                        self.metrics["cancelled"] += 1
+            owned = True
+        else:
+            owned = False
+        asyncio.run_coroutine_threadsafe(self._queues[stage].put((job, payload, owned)), self._loop)
+        return job
+
+    def cancel(self, key: str):
+        """Cancel the latest job submitted under ``key``."""
+        with self._lock:
+            job = self._latest.get(key)
+            if job is not None and not job.cancelled:
+                job.cancel()
+                self.metrics["cancelled"] += 1
+
+    def clear(self, stage: str):
+        """Drop everything still waiting in one stage's queue."""
+        if self._loop is None:
+            return
+
+        def drain():
+            q = self._queues[stage]
+            while not q.empty():
+                job, _, owned = q.get_nowait()
+                q.task_done()
+                if owned:
+                    self._release(job)
+
+        self._loop.call_soon_threadsafe(drain)
+
+    def to_ui(self, fn: Callable, *args, job: Optional[Job] = None):
+        """Hand a callable to the UI thread unless its job was superseded."""
+        job = job or current_job()
+        if job is not None and job.cancelled:
+            return
+        if self.ui_dispatch is None:
+            fn(*args)
+        else:
+            self.ui_dispatch(lambda: fn(*args))
+
+    def _release(self, job: Job):
+        with self._lock:
+            self._inflight -= 1
+            if job.key and self._latest.get(job.key) is job:
+                del self._latest[job.key]
+
+    # ----- workers -----
+
+    async def _worker(self, stage: Stage):
+        q = self._queues[stage.name]
+        loop = asyncio.get_running_loop()
+        while True:
+            job, payload, owned = await q.get()
+            try:
+                result = None
+                if not job.cancelled:
+                    token = _current_job.set(job)
+                    try:
+                        if asyncio.iscoroutinefunction(stage.handler):
+                            result = await stage.handler(job, payload)
+                        else:
+                            # Carry the job (and any deadline) into the pool thread
+                            context = contextvars.copy_context()
+                            result = await loop.run_in_executor(
+                                self._executors[stage.name], context.run, stage.handler, job, payload
+                            )
+                    finally:
+                        _current_job.reset(token)
+                if result is not None and not job.cancelled:
+                    next_stage, next_payload = result
+                    await self._queues[next_stage].put((job, next_payload, owned))
+                    owned = False  # the next stage now releases the slot
+                elif owned and not job.cancelled:
+                    self.metrics["completed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.metrics["failed"] += 1
+                self.logger.error(f"Error in {self.name} stage '{stage.name}': {e}")
+            finally:
+                q.task_done()
+                if owned:
+                    self._release(job)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self.metrics)
+            stats["inflight"] = self._inflight
+        stats["queued"] = {name: q.qsize() for name, q in self._queues.items()}
+        return stats
@@ -0,0 +1,152 @@
+"""
+Atomic, change-aware persistence for user profiles
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+# Written into every profile but left out of its content hash
+_VOLATILE_KEYS = ("last_updated",)
+
+
+def atomic_write_json(path: Path, data: Any, indent: Optional[int] = 2) -> None:
+    """Write JSON to a temp file in the same directory, fsync it, then rename over ``path``.
+
+    Readers see either the old file or the new one, never a partial write.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def content_hash(data: Dict) -> str:
+    stable = {k: v for k, v in data.items() if k not in _VOLATILE_KEYS}
+    raw = json.dumps(stable, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ProfileStore:
+    """``profile_<name>.json`` files plus an index naming them.
+
+    The index (``profiles.json``) records each profile's file and content
+    hash and which profile was used last, so loading never globs the
+    directory. ``save`` skips the write entirely when the content hash is
+    unchanged, and every write goes through a temp file and rename. An
+    existing directory of profiles without an index is indexed once on
+    first use.
+    """
+
+    def __init__(self, directory: Union[str, Path], index_name: str = "profiles.json"):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.directory = Path(directory)
+        self.index_path = self.directory / index_name
+        self.metrics = {"writes": 0, "unchanged": 0}
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+
+    @staticmethod
+    def filename(name: str) -> str:
+        clean = str(name).replace(" ", "_").replace("/", "_").replace("\\", "_")
+        return f"profile_{clean}.json"
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if isinstance(index.get("profiles"), dict):
+                return index
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning(f"Rebuilding unreadable profile index: {e}")
+        return self._rebuild_index()
+
+    def _rebuild_index(self) -> Dict:
+        index: Dict[str, Any] = {"last_used": None, "profiles": {}}
+        latest = -1.0
+        for path in self.directory.glob("profile_*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                mtime = path.stat().st_mtime
+            except Exception as e:
+                self.logger.warning(f"Skipping unreadable profile {path.name}: {e}")
+                continue
+            name = data.get("username") or path.stem[len("profile_"):]
+            index["profiles"][name] = {"file": path.name, "hash": content_hash(data)}
+            if mtime > latest:
+                latest, index["last_used"] = mtime, name
+        if index["profiles"]:
+            self._write_index(index)
+        return index
+
+    def _write_index(self, index: Dict) -> None:
+        try:
+            atomic_write_json(self.index_path, index)
+        except Exception as e:
+            self.logger.error(f"Could not write profile index: {e}")
+
+    # ----- public API -----
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._index["profiles"])
+
+    @property
+    def last_used(self) -> Optional[str]:
+        return self._index.get("last_used")
+
+    def load(self, name: Optional[str] = None) -> Optional[Dict]:
+        """Profile ``name`` (the last used one by default), or None if there is none."""
+        with self._lock:
+            name = name or self._index.get("last_used")
+            entry = self._index["profiles"].get(name) if name else None
+        if entry is None:
+            return None
+        try:
+            with open(self.directory / entry["file"], "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.error(f"Could not load profile {name}: {e}")
+            return None
+
+    def save(self, name: str, data: Dict) -> bool:
+        """Write ``data`` as profile ``name`` if it changed; returns True when written.
+
+        Raises OSError if the profile file cannot be written.
+        """
+        digest = content_hash(data)
+        with self._lock:
+            entry = self._index["profiles"].get(name)
+            index_changed = self._index.get("last_used") != name
+            self._index["last_used"] = name
+            if entry is not None and entry.get("hash") == digest:
+                self.metrics["unchanged"] += 1
+                if index_changed:
+                    self._write_index(self._index)
+                return False
+            filename = entry["file"] if entry else self.filename(name)
+            data = dict(data, last_updated=datetime.now().isoformat())
+            atomic_write_json(self.directory / filename, data)
+            self._index["profiles"][name] = {"file": filename, "hash": digest}
+            self._write_index(self._index)
+            self.metrics["writes"] += 1
+        return True
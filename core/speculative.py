@@ -0,0 +1,193 @@
+"""
+Speculative dispatch of short commands from partial transcripts
+"""
+from __future__ import annotations
+
+import logging
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class SpeculativeRule:
+    """A short command that is safe to run before the utterance ends.
+
+    ``pattern`` must match the whole normalized transcript. ``command``
+    is the canonical command that runs it, formatted with the named
+    groups of the match, falling back to ``defaults``. ``state`` names
+    the piece of system state the command changes; it is captured before
+    the command runs and put back on rollback, so only commands whose
+    whole effect is that state belong in the table.
+    """
+    intent: str
+    pattern: str
+    command: str
+    state: str
+    defaults: Tuple[Tuple[str, str], ...] = ()
+
+
+SPECULATIVE_RULES = (
+    SpeculativeRule("mute", r"mute(?: (?:the )?(?:volume|sound))?", "mute", "mute"),
+    SpeculativeRule("unmute", r"unmute(?: (?:the )?(?:volume|sound))?", "unmute", "mute"),
+    SpeculativeRule(
+        "volume_up", r"(?:turn )?(?:the )?volume up(?: by (?P<amount>\d{1,2}))?",
+        "volume up by {amount}", "volume", (("amount", "5"),),
+    ),
+    SpeculativeRule(
+        "volume_down", r"(?:turn )?(?:the )?volume down(?: by (?P<amount>\d{1,2}))?",
+        "volume down by {amount}", "volume", (("amount", "5"),),
+    ),
+    SpeculativeRule(
+        "brightness_up", r"(?:turn )?(?:the )?brightness up(?: by (?P<amount>\d{1,2}))?",
+        "brightness up by {amount}", "brightness", (("amount", "10"),),
+    ),
+    SpeculativeRule(
+        "brightness_down", r"(?:turn )?(?:the )?brightness down(?: by (?P<amount>\d{1,2}))?",
+        "brightness down by {amount}", "brightness", (("amount", "10"),),
+    ),
+)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+@dataclass
+class _Dispatched:
+    rule: SpeculativeRule
+    slots: Dict[str, str] = field(default_factory=dict)
+    prior: Any = None
+    text: str = ""
+    future: Optional[Future] = None  # resolves to whether the command ran
+
+    @property
+    def command(self) -> str:
+        return self.rule.command.format(**self.slots)
+
+
+class SpeculativeDispatcher:
+    """Runs short, reversible commands from partial transcripts.
+
+    Feed every partial hypothesis of one utterance to ``on_partial`` and
+    the final transcript to ``on_final``. Once a partial has matched a
+    rule unchanged for ``stable_ms`` of audio, its command runs through
+    ``execute`` right away, after ``capture(rule.state)`` has recorded
+    the state it changes. The final transcript then either confirms it
+    (the caller skips normal processing) or, if it turned out to say
+    something else, ``restore(rule.state, prior)`` puts that state back
+    before the final transcript is processed as usual. When ``capture``
+    returns None the state cannot be restored, so nothing is dispatched
+    early and the command waits for the final transcript.
+
+    ``capture`` and ``execute`` run on a worker thread, since they can
+    take a while (brightness goes through PowerShell) and ``on_partial``
+    is called from the loop reading the microphone. ``on_final`` waits
+    for them before settling.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[str], None],
+        capture: Callable[[str], Any],
+        restore: Callable[[str, Any], None],
+        rules: Tuple[SpeculativeRule, ...] = SPECULATIVE_RULES,
+        stable_ms: int = 250,
+        on_rollback: Optional[Callable[[str, str, Optional[str]], None]] = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.execute = execute
+        self.capture = capture
+        self.restore = restore
+        self.on_rollback = on_rollback
+        self.stable_ms = stable_ms
+        self._rules = [(rule, re.compile(rule.pattern)) for rule in rules]
+        self.metrics = {"dispatched": 0, "confirmed": 0, "rolled_back": 0}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculative")
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the previous utterance."""
+        self._candidate: Optional[str] = None
+        self._candidate_since = 0
+        self._dispatched: Optional[_Dispatched] = None
+        self._declined: Optional[str] = None
+
+    def _match(self, text: str) -> Optional[_Dispatched]:
+        for rule, pattern in self._rules:
+            m: Optional[re.Match] = pattern.fullmatch(text)
+            if m:
+                slots = dict(rule.defaults)
+                slots.update({k: v for k, v in m.groupdict().items() if v is not None})
+                return _Dispatched(rule, slots)
+        return None
+
+    def on_partial(self, text: str, audio_ms: int) -> Optional[str]:
+        """Consider one partial hypothesis heard ``audio_ms`` into the utterance.
+
+        Returns the command that was handed to the worker, if this partial
+        triggered one. At most one command runs per utterance.
+        """
+        dispatched = self._dispatched
+        if dispatched is not None:
+            if not dispatched.future.done() or dispatched.future.result():
+                return None
+            # The worker declined it (state unreadable); a later partial may still qualify
+            self._declined, self._dispatched = dispatched.text, None
+        text = _normalize(text)
+        if text != self._candidate:
+            self._candidate, self._candidate_since = text, audio_ms
+            return None
+        if audio_ms - self._candidate_since < self.stable_ms or text == self._declined:
+            return None
+        match = self._match(text)
+        if match is None:
+            return None
+        match.text = text
+        match.future = self._executor.submit(self._dispatch, match)
+        self._dispatched = match
+        return match.command
+
+    def _dispatch(self, match: _Dispatched) -> bool:
+        """Worker side of ``on_partial``: record the prior state, then run the command."""
+        try:
+            match.prior = self.capture(match.rule.state)
+        except Exception as e:
+            self.logger.error(f"Reading {match.rule.state} state failed: {e}")
+            match.prior = None
+        if match.prior is None:
+            return False
+        self.metrics["dispatched"] += 1
+        try:
+            self.execute(match.command)
+        except Exception as e:
+            self.logger.error(f"Speculative command '{match.command}' failed: {e}")
+        return True
+
+    def on_final(self, text: str) -> bool:
+        """Settle the utterance against its final transcript.
+
+        Returns True when the final transcript is exactly the command that
+        already ran, so the caller must not run it again. Otherwise any
+        speculative command has been rolled back and the caller processes
+        the transcript normally.
+        """
+        dispatched, self._dispatched = self._dispatched, None
+        self._candidate = None
+        if dispatched is None or not dispatched.future.result():
+            return False
+        final = self._match(_normalize(text))
+        if final is not None and final.command == dispatched.command:
+            self.metrics["confirmed"] += 1
+            return True
+        self.metrics["rolled_back"] += 1
+        error = None
+        try:
+            self.restore(dispatched.rule.state, dispatched.prior)
+        except Exception as e:
+            self.logger.error(f"Rolling back '{dispatched.command}' failed: {e}")
+            error = str(e)
+        if self.on_rollback is not None:
+            self.on_rollback(dispatched.command, text, error)
+        return False
@@ -0,0 +1,44 @@
+"""
+Helpers for consuming streamed LLM output
+"""
+from __future__ import annotations
+
+import re
+from typing import List
+
+# End of a sentence: terminal punctuation (Latin, Devanagari danda, CJK)
+# followed by whitespace, or a line break.
+_SENTENCE_END = re.compile(r"(?<=[.!?।。！？])\s+|\n+")
+
+
+class SentenceBuffer:
+    """Accumulates streamed text and releases it one complete sentence at a time.
+
+    Used to hand speech to TTS as soon as the first sentence is complete,
+    instead of waiting for the full completion.
+    """
+
+    def __init__(self, min_chars: int = 12):
+        # Very short fragments ("Hi!") are held back and merged with the
+        # next sentence so the voice does not stutter between them.
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk; return any sentences completed by it."""
+        self._buffer += chunk
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.start()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        """Return whatever is left once the stream has ended."""
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest
@@ -0,0 +1,26 @@
+"""
+Google Web Speech STT provider (online)
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import speech_recognition as sr
+
+from core.interfaces import STTError, STTProvider
+
+
+class GoogleSTTProvider(STTProvider):
+    name = "google"
+
+    def __init__(self, recognizer: Optional[sr.Recognizer] = None):
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def transcribe(self, pcm: bytes, sample_rate: int = 16000, language: str = "en-US") -> str:
+        audio = sr.AudioData(pcm, sample_rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio, language=language)
+        except sr.UnknownValueError:
+            return ""
+        except sr.RequestError as e:
+            raise STTError(f"Google speech recognition request failed: {e}") from e
@@ -0,0 +1,162 @@
+"""
+Offline STT providers backed by local models in MODELS_DIR
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import speech_recognition as sr
+
+from core.interfaces import STTError, STTProvider, STTStream
+
+try:
+    import vosk
+    vosk.SetLogLevel(-1)
+    VOSK_AVAILABLE = True
+except ImportError:
+    vosk = None
+    VOSK_AVAILABLE = False
+
+SAMPLE_RATE = 16000
+
+
+def _to_16k(pcm: bytes, sample_rate: int) -> bytes:
+    if sample_rate == SAMPLE_RATE:
+        return pcm
+    return sr.AudioData(pcm, sample_rate, 2).get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)
+
+
+class _VoskStream(STTStream):
+    def __init__(self, recognizer, sample_rate: int):
+        self._recognizer = recognizer
+        self._sample_rate = sample_rate
+        self._done: List[str] = []
+
+    def _text(self, partial: str = "") -> str:
+        return " ".join(part for part in self._done + [partial] if part)
+
+    def accept(self, pcm: bytes) -> str:
+        if self._recognizer.AcceptWaveform(_to_16k(pcm, self._sample_rate)):
+            # Vosk closed a segment at a pause; keep its text and start afresh
+            self._done.append(json.loads(self._recognizer.Result()).get("text", ""))
+            return self._text()
+        return self._text(json.loads(self._recognizer.PartialResult()).get("partial", ""))
+
+    def finish(self) -> str:
+        self._done.append(json.loads(self._recognizer.FinalResult()).get("text", ""))
+        return self._text()
+
+
+class VoskSTTProvider(STTProvider):
+    """Kaldi-based offline recognition with one Vosk model per language.
+
+    Models are looked up under ``model_dir`` by full language code first
+    ("en-US"), then by primary language ("en"). A model is loaded on its
+    first use and kept for the life of the process.
+    """
+
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, model_dir: Union[str, Path]):
+        if not VOSK_AVAILABLE:
+            raise RuntimeError("vosk is not installed (pip install vosk)")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.model_dir = Path(model_dir)
+        self._models: Dict[str, "vosk.Model"] = {}
+        self._lock = threading.Lock()
+
+    def _model_path(self, language: str) -> Optional[Path]:
+        for name in (language, language.split("-")[0]):
+            path = self.model_dir / name
+            if path.is_dir():
+                return path
+        return None
+
+    def supports(self, language: str) -> bool:
+        return self._model_path(language) is not None
+
+    def _model(self, language: str):
+        path = self._model_path(language)
+        if path is None:
+            raise STTError(f"No Vosk model for {language} under {self.model_dir}")
+        with self._lock:
+            model = self._models.get(str(path))
+            if model is None:
+                self.logger.info(f"Loading Vosk model {path}")
+                model = vosk.Model(str(path))
+                self._models[str(path)] = model
+            return model
+
+    def transcribe(self, pcm: bytes, sample_rate: int = SAMPLE_RATE, language: str = "en-US") -> str:
+        # Recognizers are cheap and not thread-safe; models are shared
+        recognizer = vosk.KaldiRecognizer(self._model(language), SAMPLE_RATE)
+        recognizer.AcceptWaveform(_to_16k(pcm, sample_rate))
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+    def open_stream(self, sample_rate: int = SAMPLE_RATE, language: str = "en-US") -> STTStream:
+        return _VoskStream(vosk.KaldiRecognizer(self._model(language), SAMPLE_RATE), sample_rate)
+
+
+class WhisperCppSTTProvider(STTProvider):
+    """Offline recognition through the whisper.cpp command-line binary.
+
+    ``model_path`` is a ggml model file; English-only models
+    (``*.en.bin``) only report support for English.
+    """
+
+    name = "whisper"
+
+    def __init__(
+        self,
+        model_path: Union[str, Path],
+        binary: str = "whisper-cli",
+        threads: int = 4,
+        timeout: float = 60.0,
+    ):
+        self.model_path = Path(model_path)
+        if not self.model_path.is_file():
+            raise RuntimeError(f"whisper.cpp model not found: {self.model_path}")
+        resolved = shutil.which(binary)
+        if resolved is None:
+            raise RuntimeError(f"whisper.cpp binary not found: {binary}")
+        self.binary = resolved
+        self.threads = threads
+        self.timeout = timeout
+
+    def supports(self, language: str) -> bool:
+        return not self.model_path.name.endswith(".en.bin") or language.lower().startswith("en")
+
+    def transcribe(self, pcm: bytes, sample_rate: int = SAMPLE_RATE, language: str = "en-US") -> str:
+        wav = sr.AudioData(pcm, sample_rate, 2).get_wav_data(convert_rate=SAMPLE_RATE, convert_width=2)
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(wav)
+            result = subprocess.run(
+                [
+                    self.binary, "-m", str(self.model_path), "-f", path,
+                    "-l", language.split("-")[0], "-t", str(self.threads),
+                    "-nt",  # no timestamps
+                    "-np",  # no progress or system info
+                ],
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise STTError(f"whisper.cpp failed: {e}") from e
+        finally:
+            os.unlink(path)
+        if result.returncode != 0:
+            raise STTError(f"whisper.cpp exited with {result.returncode}: {result.stderr.strip()[-200:]}")
+        text = " ".join(line.strip() for line in result.stdout.splitlines() if line.strip())
+        return "" if text == "[BLANK_AUDIO]" else text
@@ -0,0 +1,125 @@
+"""
+Per-language selection between the available STT engines
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from config.settings import STT_CONFIG, VOICE_CONFIG
+from core.interfaces import STTError, STTProvider, STTStream
+
+
+def _google(**options) -> STTProvider:
+    from core.stt.google_provider import GoogleSTTProvider
+    return GoogleSTTProvider(**options)
+
+
+def _vosk(**options) -> STTProvider:
+    from core.stt.offline_provider import VoskSTTProvider
+    return VoskSTTProvider(**options)
+
+
+def _whisper(**options) -> STTProvider:
+    from core.stt.offline_provider import WhisperCppSTTProvider
+    return WhisperCppSTTProvider(**options)
+
+
+ENGINES: Dict[str, Callable[..., STTProvider]] = {
+    "google": _google,
+    "vosk": _vosk,
+    "whisper": _whisper,
+}
+
+
+class STTRouter(STTProvider):
+    """Picks an engine per language and falls back when it cannot serve.
+
+    Engines are created on first use. One whose package, binary or model
+    is missing is disabled after logging once, and requests go to the
+    fallback engine instead; so does any request the selected engine
+    fails on.
+    """
+
+    name = "router"
+
+    def __init__(
+        self,
+        engine: str = "google",
+        engine_by_language: Optional[Dict[str, str]] = None,
+        fallback: Optional[str] = "google",
+        engines: Optional[Dict[str, Dict]] = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.engine = engine
+        self.engine_by_language = dict(engine_by_language or {})
+        self.fallback = fallback
+        self.options = dict(engines or {})
+        self._providers: Dict[str, Optional[STTProvider]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "STTRouter":
+        return cls(
+            engine=VOICE_CONFIG.get("stt_engine", "google"),
+            engine_by_language=STT_CONFIG.get("engine_by_language"),
+            fallback=STT_CONFIG.get("fallback", "google"),
+            engines=STT_CONFIG.get("engines"),
+        )
+
+    def provider(self, name: str) -> Optional[STTProvider]:
+        """The engine called ``name``, or None if it is unknown or unavailable."""
+        with self._lock:
+            if name not in self._providers:
+                try:
+                    self._providers[name] = ENGINES[name](**self.options.get(name, {}))
+                except Exception as e:
+                    self.logger.warning(f"STT engine '{name}' unavailable: {e}")
+                    self._providers[name] = None
+            return self._providers[name]
+
+    def engine_for(self, language: str, engine: Optional[str] = None) -> Optional[STTProvider]:
+        """Engine to use for ``language``; ``engine`` overrides the configuration."""
+        choices = [
+            engine,
+            self.engine_by_language.get(language),
+            self.engine_by_language.get(language.split("-")[0]),
+            self.engine,
+            self.fallback,
+        ]
+        for name in choices:
+            if name:
+                provider = self.provider(name)
+                if provider is not None and provider.supports(language):
+                    return provider
+        return None
+
+    def supports(self, language: str) -> bool:
+        return self.engine_for(language) is not None
+
+    def streams_partials(self, language: str, engine: Optional[str] = None) -> bool:
+        """Whether the engine for ``language`` reports partial hypotheses."""
+        provider = self.engine_for(language, engine)
+        return provider is not None and provider.streaming
+
+    def open_stream(self, sample_rate: int = 16000, language: str = "en-US",
+                    engine: Optional[str] = None) -> STTStream:
+        provider = self.engine_for(language, engine)
+        if provider is None:
+            raise STTError(f"No speech recognition engine available for {language}")
+        return provider.open_stream(sample_rate, language)
+
+    def transcribe(self, pcm: bytes, sample_rate: int = 16000, language: str = "en-US",
+                   engine: Optional[str] = None) -> str:
+        provider = self.engine_for(language, engine)
+        if provider is None:
+            raise STTError(f"No speech recognition engine available for {language}")
+        try:
+            return provider.transcribe(pcm, sample_rate, language)
+        except STTError as e:
+            fallback = self.provider(self.fallback) if self.fallback else None
+            if fallback is None or fallback is provider or not fallback.supports(language):
+                raise
+            self.logger.warning(f"{provider.name} failed ({e}); retrying with {fallback.name}")
+            return fallback.transcribe(pcm, sample_rate, language)
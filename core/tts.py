@@ -0,0 +1,437 @@
+"""
+Shared text-to-speech service with a priority queue and an on-disk synthesis cache
+"""
+from __future__ import annotations
+
+import collections
+import hashlib
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config.settings import TTS_CONFIG
+from core.streaming import SentenceBuffer
+
+try:
+    import pygame
+    PYGAME_AVAILABLE = True
+except ImportError:
+    pygame = None
+    PYGAME_AVAILABLE = False
+
+# Lower runs first. URGENT also cuts off the sentence being spoken.
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+def _default_engine():
+    import pyttsx3
+    return pyttsx3.init()
+
+
+class SynthesisCache:
+    """On-disk LRU of synthesized phrases, keyed by voice, rate, volume and text.
+
+    Recency is the file's modification time, refreshed on every hit, so
+    the order survives restarts without a separate index.
+    """
+
+    def __init__(self, directory: Path, max_entries: int = 200, max_bytes: int = 50 * 1024 * 1024):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.metrics = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        # key -> size in bytes, least recently used first
+        self._entries: "collections.OrderedDict[str, int]" = collections.OrderedDict()
+        files = sorted(self.directory.glob("*.wav"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            if path.stem.endswith(".tmp"):
+                path.unlink()  # synthesis interrupted by a crash
+                continue
+            self._entries[path.stem] = path.stat().st_size
+        self._bytes = sum(self._entries.values())
+        self._evict()
+
+    @staticmethod
+    def key(voice: Any, rate: Any, volume: Any, text: str) -> str:
+        raw = "\x1f".join(str(part) for part in (voice, rate, volume, " ".join(text.split())))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}.wav"
+
+    def get(self, key: str) -> Optional[Path]:
+        with self._lock:
+            if key not in self._entries:
+                self.metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.metrics["hits"] += 1
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._bytes -= self._entries.pop(key, 0)
+            return None
+        return path
+
+    def add(self, key: str) -> None:
+        """Register a file just written to ``path_for(key)``."""
+        size = self.path_for(key).stat().st_size
+        with self._lock:
+            self._bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self.metrics["stores"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.metrics["evictions"] += 1
+            try:
+                self.path_for(key).unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.metrics)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        return stats
+
+
+class TTSService:
+    """One speech worker shared by every caller in the process.
+
+    ``speak`` splits text into sentences and queues them by priority, so
+    it never blocks the caller and the first sentence starts as soon as
+    the worker is free. The engine lives on the worker thread only.
+
+    * ``interrupt()`` stops the current sentence and drops everything
+      queued (the user started talking, or pressed stop).
+    * ``PRIORITY_URGENT`` barges in: the current sentence is cut off and
+      the urgent one goes next, the rest of the queue is kept.
+    * Sentences queued with a ``job`` are skipped once the job is cancelled.
+
+    Short phrases that recur (or are listed in ``always_cache``) are
+    synthesized once to a WAV in ``cache`` and replayed from disk.
+    """
+
+    def __init__(
+        self,
+        engine_factory: Optional[Callable[[], Any]] = None,
+        cache: Optional[SynthesisCache] = None,
+        always_cache: Iterable[str] = (),
+        cache_min_uses: int = 2,
+        cache_max_chars: int = 120,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.engine_factory = engine_factory or _default_engine
+        self.cache = cache
+        self.always_cache = {self._phrase(p) for p in always_cache}
+        self.cache_min_uses = cache_min_uses
+        self.cache_max_chars = cache_max_chars
+        # Called with the engine on the worker thread before each live utterance;
+        # properties passed to configure() are applied after it
+        self.prepare: Optional[Callable[[Any], None]] = None
+        self.metrics = {"queued": 0, "spoken": 0, "skipped": 0, "interrupted": 0, "from_cache": 0}
+
+        self._engine = None
+        self._properties: Dict[str, Any] = {}
+        self._uses: Dict[str, int] = {}
+        self._listeners: List[Callable[[bool], None]] = []
+        self._heap: List = []
+        self._tasks: collections.deque = collections.deque()
+        self._voices: Optional[List] = None
+        self._seq = itertools.count()
+        self._generation = 0
+        self._stops = 0  # bumped whenever the current sentence is cut off
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._speaking = False
+        self._current_priority: Optional[int] = None
+        self._channel = None
+        self._player_ready = False
+
+    # ----- public API -----
+
+    @property
+    def speaking(self) -> bool:
+        return self._speaking
+
+    def add_listener(self, callback: Callable[[bool], None]) -> None:
+        """Call ``callback(speaking)`` whenever speech starts or the queue runs dry."""
+        self._listeners.append(callback)
+
+    def configure(self, **properties) -> None:
+        """Set engine properties (voice, rate, volume) for the next utterance.
+
+        ``voice_index`` selects a voice by its position in the engine's
+        voice list. The properties stay on the engine until changed, or
+        until ``prepare`` changes them for a later utterance.
+        """
+        with self._cond:
+            self._properties.update(properties)
+
+    def call(self, fn: Callable[[Any], Any], timeout: float = 5.0) -> Any:
+        """Run ``fn(engine)`` on the worker thread, between sentences, and return its result."""
+        future: Future = Future()
+        self._ensure_started()
+        with self._cond:
+            self._tasks.append((fn, future))
+            self._cond.notify()
+        return future.result(timeout)
+
+    def voices(self) -> List:
+        """(id, name) of every voice the engine offers."""
+        if self._voices is None:
+            self._voices = self.call(
+                lambda engine: [(v.id, v.name) for v in engine.getProperty("voices") or []]
+            )
+        return self._voices
+
+    def speak(self, text: str, priority: int = PRIORITY_NORMAL, interrupt: bool = False,
+              job: Any = None) -> int:
+        """Queue text sentence by sentence; returns the number of sentences queued."""
+        if not text or not text.strip():
+            return 0
+        buffer = SentenceBuffer()
+        sentences = buffer.feed(text)
+        rest = buffer.flush()
+        if rest:
+            sentences.append(rest)
+        if interrupt:
+            self.interrupt()
+        self._ensure_started()
+        with self._cond:
+            for sentence in sentences:
+                heapq.heappush(self._heap, (priority, next(self._seq), self._generation, sentence, job))
+            self.metrics["queued"] += len(sentences)
+            barge_in = (priority == PRIORITY_URGENT and self._current_priority is not None
+                        and self._current_priority > PRIORITY_URGENT)
+            self._cond.notify()
+        if barge_in:
+            self._stop_current()
+        return len(sentences)
+
+    def interrupt(self) -> None:
+        """Stop the current sentence and drop everything queued."""
+        with self._cond:
+            self._generation += 1
+            dropped = len(self._heap)
+            self._heap.clear()
+            self.metrics["skipped"] += dropped
+        self._stop_current()
+
+    def stop(self) -> None:
+        """Shut the worker down."""
+        self.interrupt()
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats: Dict[str, Any] = dict(self.metrics)
+            stats["pending"] = len(self._heap)
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+    # ----- worker -----
+
+    def _ensure_started(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._worker, name="tts", daemon=True)
+            self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                idle = not self._heap
+            if idle and self._speaking:
+                self._set_speaking(False)
+            with self._cond:
+                while self._running and not self._heap and not self._tasks:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                task = self._tasks.popleft() if self._tasks else None
+            if task is not None:
+                fn, future = task
+                try:
+                    if self._engine is None:
+                        self._engine = self.engine_factory()
+                    future.set_result(fn(self._engine))
+                except Exception as e:
+                    future.set_exception(e)
+                continue
+            with self._cond:
+                if not self._heap:
+                    continue
+                priority, _, generation, text, job = heapq.heappop(self._heap)
+                if generation != self._generation or (job is not None and job.cancelled):
+                    self.metrics["skipped"] += 1
+                    continue
+                self._current_priority = priority
+            if not self._speaking:
+                self._set_speaking(True)
+            try:
+                self._say(text)
+                self.metrics["spoken"] += 1
+            except Exception as e:
+                self.logger.error(f"TTS error: {e}")
+                self._engine = None  # recreate on the next sentence
+            finally:
+                with self._cond:
+                    self._current_priority = None
+
+    def _set_speaking(self, speaking: bool) -> None:
+        self._speaking = speaking
+        for callback in self._listeners:
+            try:
+                callback(speaking)
+            except Exception as e:
+                self.logger.error(f"TTS listener error: {e}")
+
+    def _get_engine(self):
+        if self._engine is None:
+            self._engine = self.engine_factory()
+        if self.prepare is not None:
+            self.prepare(self._engine)
+        with self._cond:
+            properties, self._properties = self._properties, {}
+        for name, value in properties.items():
+            if name == "voice_index":
+                voices = self._engine.getProperty("voices")
+                if voices and 0 <= value < len(voices):
+                    self._engine.setProperty("voice", voices[value].id)
+            else:
+                self._engine.setProperty(name, value)
+        return self._engine
+
+    @staticmethod
+    def _phrase(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def _should_cache(self, text: str) -> bool:
+        if self.cache is None or len(text) > self.cache_max_chars or not self._init_player():
+            return False
+        phrase = self._phrase(text)
+        if phrase in self.always_cache:
+            return True
+        if len(self._uses) > 2000:
+            self._uses.clear()
+        self._uses[phrase] = self._uses.get(phrase, 0) + 1
+        return self._uses[phrase] >= self.cache_min_uses
+
+    def _say(self, text: str) -> None:
+        engine = self._get_engine()
+        if self._should_cache(text):
+            key = SynthesisCache.key(
+                engine.getProperty("voice"), engine.getProperty("rate"), engine.getProperty("volume"), text
+            )
+            path = self.cache.get(key)
+            if path is None:
+                path = self.cache.path_for(key)
+                tmp = path.with_suffix(".tmp.wav")
+                cut_off = (self._generation, self._stops)
+                engine.save_to_file(text, str(tmp))
+                engine.runAndWait()
+                if (self._generation, self._stops) != cut_off:
+                    # Interrupted mid-synthesis: the file may be truncated, and
+                    # the user asked for silence either way
+                    tmp.unlink(missing_ok=True)
+                    return
+                if tmp.exists() and tmp.stat().st_size > 0:
+                    tmp.replace(path)
+                    self.cache.add(key)
+                else:
+                    path = None
+            else:
+                self.metrics["from_cache"] += 1
+            if path is not None:
+                self._play(path)
+                return
+        engine.say(text)
+        engine.runAndWait()
+
+    # ----- playback of cached audio -----
+
+    def _init_player(self) -> bool:
+        if not self._player_ready and PYGAME_AVAILABLE:
+            try:
+                if not pygame.mixer.get_init():
+                    pygame.mixer.init()
+                self._player_ready = True
+            except Exception as e:
+                self.logger.warning(f"Cached speech playback unavailable: {e}")
+                self.cache = None
+        return self._player_ready
+
+    def _play(self, path: Path) -> None:
+        channel = pygame.mixer.Sound(str(path)).play()
+        self._channel = channel
+        try:
+            while channel is not None and channel.get_busy():
+                time.sleep(0.02)
+        finally:
+            self._channel = None
+
+    def _stop_current(self) -> None:
+        self._stops += 1
+        self.metrics["interrupted"] += int(self._speaking)
+        channel = self._channel
+        if channel is not None:
+            channel.stop()
+        engine = self._engine
+        if engine is not None:
+            try:
+                engine.stop()
+            except Exception:
+                pass
+
+
+_service: Optional[TTSService] = None
+_service_lock = threading.Lock()
+
+
+def get_tts_service() -> TTSService:
+    """Return the process-wide TTS service, configured from TTS_CONFIG."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            cache = None
+            if TTS_CONFIG.get("cache_enabled", True):
+                try:
+                    cache = SynthesisCache(
+                        TTS_CONFIG["cache_dir"],
+                        max_entries=TTS_CONFIG.get("cache_max_entries", 200),
+                        max_bytes=TTS_CONFIG.get("cache_max_bytes", 50 * 1024 * 1024),
+                    )
+                except Exception as e:
+                    logging.getLogger("TTSService").warning(f"TTS cache unavailable: {e}")
+            _service = TTSService(
+                cache=cache,
+                always_cache=TTS_CONFIG.get("always_cache", ()),
+                cache_min_uses=TTS_CONFIG.get("cache_min_uses", 2),
+                cache_max_chars=TTS_CONFIG.get("cache_max_chars", 120),
+            )
+        return _service
@@ -0,0 +1,214 @@
+"""
+Multi-rate, frame-dropping pipeline for camera analysis stages
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    CV2_AVAILABLE = False
+
+_COLOR_CODES = {"rgb": "COLOR_BGR2RGB", "gray": "COLOR_BGR2GRAY"}
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted ``values`` (0.0 when empty)."""
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+
+class VideoFrame:
+    """One captured BGR frame plus the resized copies stages asked for.
+
+    ``view`` converts the frame once per (width, color, mirror) and
+    caches the result, so stages sharing an input size share the resize
+    and color conversion.
+    """
+
+    def __init__(self, image, seq: int, timestamp: float):
+        self.image = image
+        self.seq = seq
+        self.timestamp = timestamp
+        self.height, self.width = image.shape[:2]
+        self._views: Dict[Tuple[Optional[int], str, bool], Any] = {}
+        self._lock = threading.Lock()
+
+    def view(self, width: Optional[int] = None, color: str = "bgr", mirror: bool = True):
+        """The frame scaled down to ``width`` (never up), converted and optionally mirrored."""
+        key = (width, color, mirror)
+        with self._lock:
+            cached = self._views.get(key)
+        if cached is not None:
+            return cached
+        image = self.image
+        if width and width < self.width:
+            height = round(self.height * width / self.width)
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        if mirror:
+            image = cv2.flip(image, 1)
+        if color != "bgr":
+            image = cv2.cvtColor(image, getattr(cv2, _COLOR_CODES[color]))
+        with self._lock:
+            self._views[key] = image
+        return image
+
+    def scale_for(self, width: Optional[int]) -> float:
+        """Factor mapping coordinates in ``view(width)`` back to the full frame."""
+        return self.width / width if width and width < self.width else 1.0
+
+
+class LatestSlot:
+    """Mailbox holding only the newest value.
+
+    Publishing overwrites whatever a reader has not picked up yet, so a
+    slow reader skips values instead of building a backlog.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._value: Any = None
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def publish(self, value: Any) -> int:
+        with self._cond:
+            self._seq += 1
+            self._value = value
+            self._cond.notify_all()
+            return self._seq
+
+    def latest(self) -> Any:
+        return self._value
+
+    def wait_newer(self, seq: int, timeout: float) -> Tuple[int, Any]:
+        """Wait for a value newer than ``seq``; returns (seq, value), or (seq, None) on timeout."""
+        with self._cond:
+            if self._seq <= seq:
+                self._cond.wait_for(lambda: self._seq > seq, timeout)
+            if self._seq <= seq:
+                return seq, None
+            return self._seq, self._value
+
+
+@dataclass
+class VisionStage:
+    """A detector run at most ``rate_hz`` times a second on the newest input.
+
+    ``process`` receives the newest value of ``source``: the ``"frame"``
+    slot (a VideoFrame) or another stage's name, to build on its result.
+    Whatever it returns, unless None, is published under ``name``.
+    """
+    name: str
+    process: Callable[[Any], Any]
+    rate_hz: float
+    source: str = "frame"
+
+
+class VisionPipeline:
+    """Runs each VisionStage on its own thread against the newest frame.
+
+    ``submit`` never blocks: a frame replaces the previous one whether or
+    not every stage has seen it. Each stage wakes at its own rate, takes
+    the newest input and counts the ones it skipped as dropped, so a slow
+    detector lowers only its own rate and never delays capture or the
+    other stages.
+
+    The last ``latency_window`` run times of each stage are kept for the
+    percentiles in ``stats``.
+    """
+
+    def __init__(self, stages: Sequence[VisionStage], latency_window: int = 500):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.stages = list(stages)
+        self.slots: Dict[str, LatestSlot] = {"frame": LatestSlot()}
+        for stage in self.stages:
+            self.slots[stage.name] = LatestSlot()
+        self.metrics: Dict[str, Dict[str, float]] = {
+            stage.name: {"processed": 0, "dropped": 0, "busy_ms": 0.0} for stage in self.stages
+        }
+        self.latencies: Dict[str, deque] = {stage.name: deque(maxlen=latency_window) for stage in self.stages}
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._started_at = 0.0
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._started_at = time.monotonic()
+        for stage in self.stages:
+            thread = threading.Thread(target=self._run, args=(stage,), name=f"vision-{stage.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._running = False
+        threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout=1.0)
+
+    def submit(self, frame: VideoFrame) -> None:
+        self.slots["frame"].publish(frame)
+
+    def result(self, name: str) -> Any:
+        """Newest output of stage ``name`` (None before its first result)."""
+        return self.slots[name].latest()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        elapsed = max(time.monotonic() - self._started_at, 1e-6) if self._started_at else 0.0
+        stats = {}
+        for name, m in self.metrics.items():
+            processed = m["processed"]
+            latencies = sorted(self.latencies[name])
+            stats[name] = {
+                "processed": processed,
+                "dropped": m["dropped"],
+                "fps": processed / elapsed if elapsed else 0.0,
+                "avg_ms": m["busy_ms"] / processed if processed else 0.0,
+                "p50_ms": _percentile(latencies, 0.50),
+                "p95_ms": _percentile(latencies, 0.95),
+                "p99_ms": _percentile(latencies, 0.99),
+            }
+        return stats
+
+    def _run(self, stage: VisionStage) -> None:
+        source, output = self.slots[stage.source], self.slots[stage.name]
+        metrics, latencies = self.metrics[stage.name], self.latencies[stage.name]
+        period = 1.0 / stage.rate_hz if stage.rate_hz > 0 else 0.0
+        seen = source.seq
+        next_due = time.monotonic()
+        while self._running:
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            seq, value = source.wait_newer(seen, timeout=0.5)
+            if value is None:
+                continue
+            if seen:
+                metrics["dropped"] += seq - seen - 1
+            seen = seq
+            started = time.monotonic()
+            try:
+                result = stage.process(value)
+            except Exception as e:
+                self.logger.error(f"Error in vision stage {stage.name}: {e}")
+                result = None
+            finished = time.monotonic()
+            metrics["processed"] += 1
+            metrics["busy_ms"] += (finished - started) * 1000
+            latencies.append((finished - started) * 1000)
+            if result is not None:
+                output.publish(result)
+            # Keep the cadence, but never try to catch up on missed slots
+            next_due = max(next_due + period, finished)
@@ -3,7 +3,6 @@ Enhanced SAM AI Assistant - Computer Vision Module
 """
 import cv2
 import numpy as np
-import threading
 import time
 import logging
 from typing import Dict, List, Tuple, Optional, Callable
@@ -12,6 +11,11 @@ from datetime import datetime
 import json
 
 from core.base_assistant import BaseAssistant
+from core.camera import get_camera_service
+from core.vision_pipeline import VideoFrame, VisionPipeline, VisionStage
+from features.vision_workers import close_detectors, create_detectors
+from features.face_tracker import FaceTracker
+from features.landmarks import GestureSmoother, classify_gestures, classify_pose
 from config.settings import CV_CONFIG
 
 class ComputerVisionController:
@@ -21,10 +25,9 @@ class ComputerVisionController:
         self.assistant = assistant
         self.logger = logging.getLogger(self.__class__.__name__)
         
-        # Camera setup
-        self.camera = None
+        # Camera setup: frames come from the shared capture service
+        self.camera = get_camera_service()
         self.camera_active = False
-        self.current_frame = None
         
         # MediaPipe setup
         self.mp_hands = mp.solutions.hands
@@ -32,19 +35,10 @@ class ComputerVisionController:
         self.mp_face_mesh = mp.solutions.face_mesh
         self.mp_drawing = mp.solutions.drawing_utils
         
-        # Detection models
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=2,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.5
-        )
-        
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.5
-        )
+        # Face, hand and pose detectors are created when the camera starts,
+        # in worker processes if CV_CONFIG["worker_processes"] is set
+        self.detectors = {}
+        self.face_tracker = None
         
         self.face_mesh = self.mp_face_mesh.FaceMesh(
             static_image_mode=False,
@@ -54,11 +48,6 @@ class ComputerVisionController:
             min_tracking_confidence=0.5
         )
         
-        # Face detection
-        self.face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
-        
         # Object detection (simplified - would use YOLO or similar)
         self.object_classes = [
             'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus',
@@ -86,8 +75,9 @@ class ComputerVisionController:
             'pose_detected': []
         }
         
-        # Gesture recognition
-        self.gesture_history = []
+        # Gesture recognition, debounced by a majority vote over recent frames
+        smoothing = CV_CONFIG.get("gesture_smoothing", {})
+        self.gesture_smoother = GestureSmoother(smoothing.get("window", 5), smoothing.get("min_votes", 3))
         self.gesture_commands = {
             'thumbs_up': self.handle_thumbs_up,
             'peace_sign': self.handle_peace_sign,
@@ -113,28 +103,58 @@ class ComputerVisionController:
         self.fps_start_time = time.time()
         self.current_fps = 0
         
+        # Detectors run at their own rates on the newest captured frame
+        self.stage_config = CV_CONFIG.get("stages", {})
+        stages = [
+            VisionStage("faces", self._detect_faces, self.stage_config["faces"]["rate_hz"]),
+            VisionStage("hands", self._detect_hands, self.stage_config["hands"]["rate_hz"]),
+            VisionStage("pose", self._detect_pose, self.stage_config["pose"]["rate_hz"]),
+        ]
+        if CV_CONFIG.get("emotion_detection", True):
+            stages.append(
+                VisionStage("emotions", self._detect_emotions, self.stage_config["emotions"]["rate_hz"], source="faces")
+            )
+        self.pipeline = VisionPipeline(stages)
+        
+    @property
+    def current_frame(self) -> Optional[np.ndarray]:
+        """Newest camera frame as a read-only view into the capture ring (not a copy)"""
+        frame = self.camera.latest() if self.camera_active else None
+        return frame.image if frame is not None else None
+    
     def start_camera(self, camera_index: int = None) -> bool:
         """Start camera capture"""
         try:
-            if camera_index is None:
-                camera_index = CV_CONFIG["camera_index"]
-            
-            self.camera = cv2.VideoCapture(camera_index)
+            if self.camera_active:
+                return True
+            if camera_index is not None:
+                self.camera.index = camera_index
             
-            if not self.camera.isOpened():
-                self.logger.error(f"Failed to open camera {camera_index}")
+            if not self.camera.acquire():
                 return False
             
-            # Set camera properties
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-            self.camera.set(cv2.CAP_PROP_FPS, 30)
+            capture = CV_CONFIG.get("capture", {})
+            self.detectors = create_detectors(
+                ("faces", "hands", "pose"),
+                processes=CV_CONFIG.get("worker_processes", False),
+                max_frame_bytes=capture.get("width", 1280) * capture.get("height", 720) * 3,
+            )
+            # Full face detection every few frames, optical-flow tracking in between
+            tracking = CV_CONFIG.get("face_tracking", {})
+            self.face_tracker = FaceTracker(
+                self.detectors["faces"],
+                detect_every=tracking.get("detect_every", 5),
+                min_confidence=tracking.get("min_confidence", 0.5),
+            )
             
             self.camera_active = True
+            self.pipeline.start()
             
-            # Start processing thread
-            self.processing_thread = threading.Thread(target=self._process_video, daemon=True)
-            self.processing_thread.start()
+            # Hand every frame to the detector stages on the capture thread;
+            # submitting only swaps a reference, the stages pick their own pace
+            self.camera.subscribe(self._on_frame)
+            if CV_CONFIG.get("show_video", False):
+                self._display = self.camera.subscribe(self._show_frame, rate_hz=30, name="debug-view")
             
             self.logger.info("Camera started successfully")
             return True
@@ -145,79 +165,102 @@ class ComputerVisionController:
     
     def stop_camera(self):
         """Stop camera capture"""
+        if not self.camera_active:
+            return
         self.camera_active = False
-        
-        if self.camera:
-            self.camera.release()
-            self.camera = None
+        self.camera.unsubscribe(self._on_frame)
+        if getattr(self, "_display", None) is not None:
+            self.camera.unsubscribe(self._display)
+            self._display = None
+        self.pipeline.stop()
+        self.gesture_smoother.reset()
+        self.camera.release()
+        close_detectors(self.detectors)
+        self.detectors = {}
+        self.face_tracker = None
         
         self.logger.info("Camera stopped")
     
-    def _process_video(self):
-        """Main video processing loop"""
-        while self.camera_active and self.camera:
-            try:
-                ret, frame = self.camera.read()
-                if not ret:
-                    continue
-                
-                self.current_frame = frame.copy()
-                
-                # Flip frame horizontally for mirror effect
-                frame = cv2.flip(frame, 1)
-                
-                # Convert BGR to RGB for MediaPipe
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Process detections
-                self._detect_faces(frame)
-                self._detect_hands(rgb_frame, frame)
-                self._detect_pose(rgb_frame, frame)
-                self._detect_emotions(frame)
-                
-                # Update FPS
-                self._update_fps()
-                
-                # Add FPS to frame
-                cv2.putText(frame, f"FPS: {self.current_fps:.1f}", 
-                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                
-                # Display frame (optional - for debugging)
-                if CV_CONFIG.get("show_video", False):
-                    cv2.imshow("SAM Vision", frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        break
-                
-                time.sleep(0.01)  # Small delay to prevent excessive CPU usage
-                
-            except Exception as e:
-                self.logger.error(f"Error in video processing: {e}")
-                time.sleep(0.1)
+    def _on_frame(self, frame):
+        """Capture-thread hand-off: publish the ring frame to the detector stages"""
+        self.pipeline.submit(VideoFrame(frame.image, frame.seq, frame.timestamp))
+        self._update_fps()
+    
+    def _show_frame(self, frame):
+        """Debug window with the latest detections drawn on a mirrored frame"""
+        display_frame = cv2.flip(frame.image, 1)
+        self._draw_overlays(display_frame)
+        cv2.imshow("SAM Vision", display_frame)
+        cv2.waitKey(1)
     
-    def _detect_faces(self, frame):
-        """Detect faces in frame"""
+    def face_crops(self) -> List[Tuple[int, np.ndarray]]:
+        """(track id, grayscale crop) of every tracked face, largest first.
+
+        Crops come from the newest full-resolution frame, unmirrored, so
+        callers such as face authentication need not detect faces again.
+        """
+        frame = self.current_frame
+        if frame is None:
+            return []
+        height, width = frame.shape[:2]
+        crops = []
+        for face in sorted(self.tracking_data['faces'], key=lambda f: f['area'], reverse=True):
+            x, y, w, h = face['bbox']
+            x = width - x - w  # tracks live in the mirrored view
+            x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + w, width), min(y + h, height)
+            if x1 - x0 < 20 or y1 - y0 < 20:
+                continue
+            crops.append((face['track_id'], cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)))
+        return crops
+    
+    def _draw_overlays(self, frame):
+        """Draw the latest result of every stage onto a mirrored full-size frame"""
+        height, width = frame.shape[:2]
+        for face in self.tracking_data['faces']:
+            x, y, w, h = face['bbox']
+            cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
+            cv2.putText(frame, f"Face #{face['track_id']}", (x, y-10), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 0), 2)
+        for emotion_data in self.tracking_data['emotions']:
+            x, y, w, h = emotion_data['bbox']
+            cv2.putText(frame, f"Emotion: {emotion_data['emotion']}", 
+                       (x, y-30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        for hand in self.tracking_data['hands']:
+            for lx, ly, _ in hand['landmarks']:
+                cv2.circle(frame, (int(lx * width), int(ly * height)), 3, (0, 255, 0), -1)
+            if hand.get('gesture'):
+                cv2.putText(frame, f"Gesture: {hand['gesture']}", 
+                           (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        for pose in self.tracking_data['poses']:
+            if pose.get('analysis'):
+                cv2.putText(frame, f"Pose: {pose['analysis']}", 
+                           (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
+        cv2.putText(frame, f"FPS: {self.current_fps:.1f}", 
+                   (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    
+    def _detect_faces(self, video_frame: VideoFrame):
+        """Track faces; the grayscale view and tracks are passed on to emotion analysis"""
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
-                gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30)
-            )
+            width = self.stage_config["faces"].get("width")
+            gray = video_frame.view(width, "gray")
+            scale = video_frame.scale_for(width)
+            tracks = self.face_tracker.update(gray, min_size=max(12, int(30 / scale)))
             
             current_faces = []
             
-            for (x, y, w, h) in faces:
+            for track in tracks:
+                # Boxes are reported in full-frame (mirrored) coordinates
+                x, y, w, h = (int(v * scale) for v in track.bbox)
                 face_data = {
+                    'track_id': track.id,
+                    'confidence': float(track.confidence),
                     'bbox': (x, y, w, h),
                     'center': (x + w//2, y + h//2),
                     'area': w * h,
-                    'timestamp': time.time()
+                    'timestamp': video_frame.timestamp
                 }
                 
                 current_faces.append(face_data)
-                
-                # Draw rectangle around face
-                cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
-                cv2.putText(frame, "Face", (x, y-10), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 0), 2)
             
             # Update tracking data
             self.tracking_data['faces'] = current_faces
@@ -225,203 +268,124 @@ class ComputerVisionController:
             # Trigger callbacks
             if current_faces:
                 self._trigger_callbacks('face_detected', current_faces)
+            
+            return {'gray': gray, 'scale': scale, 'faces': current_faces}
                 
         except Exception as e:
             self.logger.error(f"Error in face detection: {e}")
+            return None
     
-    def _detect_hands(self, rgb_frame, display_frame):
+    def _detect_hands(self, video_frame: VideoFrame):
         """Detect hands and gestures"""
         try:
-            results = self.hands.process(rgb_frame)
+            hands = self.detectors["hands"](video_frame.view(self.stage_config["hands"].get("width"), "rgb"))
             
-            current_hands = []
+            # (n, 21, 3) array of normalized landmarks, classified in one pass
+            gestures = self._recognize_gestures(hands)
             
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    # Draw hand landmarks
-                    self.mp_drawing.draw_landmarks(
-                        display_frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS
-                    )
-                    
-                    # Extract hand data
-                    landmarks = []
-                    for landmark in hand_landmarks.landmark:
-                        landmarks.append([landmark.x, landmark.y, landmark.z])
-                    
-                    hand_data = {
-                        'landmarks': landmarks,
-                        'timestamp': time.time()
-                    }
-                    
-                    current_hands.append(hand_data)
-                    
-                    # Recognize gestures
-                    gesture = self._recognize_gesture(landmarks)
-                    if gesture:
-                        cv2.putText(display_frame, f"Gesture: {gesture}", 
-                                   (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                        
-                        if gesture in self.gesture_commands:
-                            self.gesture_commands[gesture]()
+            current_hands = [
+                {
+                    'landmarks': hand,
+                    'gesture': gesture,
+                    'timestamp': video_frame.timestamp
+                }
+                for hand, gesture in zip(hands, gestures)
+            ]
             
             # Update tracking data
             self.tracking_data['hands'] = current_hands
             
-            # Trigger callbacks
-            if current_hands:
+            # Act once per held gesture, not on every frame it is seen
+            gesture = self.gesture_smoother.update(next((g for g in gestures if g), None))
+            if gesture:
+                if gesture in self.gesture_commands:
+                    self.gesture_commands[gesture]()
                 self._trigger_callbacks('gesture_detected', current_hands)
+            
+            return current_hands
                 
         except Exception as e:
             self.logger.error(f"Error in hand detection: {e}")
+            return None
     
-    def _detect_pose(self, rgb_frame, display_frame):
+    def _detect_pose(self, video_frame: VideoFrame):
         """Detect body pose"""
         try:
-            results = self.pose.process(rgb_frame)
+            pose = self.detectors["pose"](video_frame.view(self.stage_config["pose"].get("width"), "rgb"))
             
-            if results.pose_landmarks:
-                # Draw pose landmarks
-                self.mp_drawing.draw_landmarks(
-                    display_frame, results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS
-                )
-                
-                # Extract pose data
-                landmarks = []
-                for landmark in results.pose_landmarks.landmark:
-                    landmarks.append([landmark.x, landmark.y, landmark.z, landmark.visibility])
-                
+            if len(pose):
+                # (33, 4) array: normalized x, y, z and visibility
                 pose_data = {
-                    'landmarks': landmarks,
-                    'timestamp': time.time()
+                    'landmarks': pose,
+                    'analysis': self._analyze_pose(pose),
+                    'timestamp': video_frame.timestamp
                 }
                 
                 # Update tracking data
                 self.tracking_data['poses'] = [pose_data]
                 
-                # Analyze pose
-                pose_analysis = self._analyze_pose(landmarks)
-                if pose_analysis:
-                    cv2.putText(display_frame, f"Pose: {pose_analysis}", 
-                               (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
-                
                 # Trigger callbacks
                 self._trigger_callbacks('pose_detected', pose_data)
+                return pose_data
+            
+            return None
                 
         except Exception as e:
             self.logger.error(f"Error in pose detection: {e}")
+            return None
     
-    def _detect_emotions(self, frame):
-        """Detect emotions from facial expressions"""
+    def _detect_emotions(self, face_result):
+        """Detect emotions from the faces the face stage found"""
         try:
             # Simplified emotion detection
             # In a real implementation, you'd use a trained emotion recognition model
             
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(gray, 1.1, 5)
+            gray, scale = face_result['gray'], face_result['scale']
+            current_emotions = []
             
-            for (x, y, w, h) in faces:
-                face_roi = gray[y:y+h, x:x+w]
+            for face in face_result['faces']:
+                x, y, w, h = face['bbox']
+                # Crop from the grayscale view the face was tracked in
+                sx, sy, sw, sh = (int(v / scale) for v in (x, y, w, h))
+                face_roi = gray[max(sy, 0):sy+sh, max(sx, 0):sx+sw]
+                if face_roi.size == 0:
+                    continue
                 
                 # Placeholder emotion detection
                 # This would be replaced with actual emotion recognition
                 emotion = self._analyze_facial_expression(face_roi)
                 
                 if emotion:
-                    cv2.putText(frame, f"Emotion: {emotion}", 
-                               (x, y-30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                    
                     emotion_data = {
+                        'track_id': face['track_id'],
                         'emotion': emotion,
                         'confidence': 0.8,  # Placeholder
                         'bbox': (x, y, w, h),
-                        'timestamp': time.time()
+                        'timestamp': face['timestamp']
                     }
                     
-                    self.tracking_data['emotions'] = [emotion_data]
+                    current_emotions.append(emotion_data)
                     self._trigger_callbacks('emotion_detected', emotion_data)
+            
+            self.tracking_data['emotions'] = current_emotions
+            return current_emotions
                 
         except Exception as e:
             self.logger.error(f"Error in emotion detection: {e}")
+            return None
     
-    def _recognize_gesture(self, landmarks) -> Optional[str]:
-        """Recognize hand gestures from landmarks"""
+    def _recognize_gestures(self, hands) -> List[Optional[str]]:
+        """Recognize hand gestures from an (n, 21, 3) landmark array"""
         try:
-            # Simplified gesture recognition
-            # This would be more sophisticated in a real implementation
-            
-            # Get key points
-            thumb_tip = landmarks[4]
-            thumb_ip = landmarks[3]
-            index_tip = landmarks[8]
-            index_pip = landmarks[6]
-            middle_tip = landmarks[12]
-            ring_tip = landmarks[16]
-            pinky_tip = landmarks[20]
-            
-            # Thumbs up detection
-            if (thumb_tip[1] < thumb_ip[1] and 
-                index_tip[1] > index_pip[1] and
-                middle_tip[1] > landmarks[10][1]):
-                return "thumbs_up"
-            
-            # Peace sign detection
-            if (index_tip[1] < index_pip[1] and 
-                middle_tip[1] < landmarks[10][1] and
-                ring_tip[1] > landmarks[14][1] and
-                pinky_tip[1] > landmarks[18][1]):
-                return "peace_sign"
-            
-            # Pointing detection
-            if (index_tip[1] < index_pip[1] and
-                middle_tip[1] > landmarks[10][1] and
-                ring_tip[1] > landmarks[14][1] and
-                pinky_tip[1] > landmarks[18][1]):
-                return "pointing"
-            
-            # Fist detection
-            if (all(tip[1] > pip[1] for tip, pip in [
-                (index_tip, index_pip),
-                (middle_tip, landmarks[10]),
-                (ring_tip, landmarks[14]),
-                (pinky_tip, landmarks[18])
-            ])):
-                return "fist"
-            
-            return None
-            
+            return classify_gestures(hands)
         except Exception as e:
             self.logger.error(f"Error recognizing gesture: {e}")
-            return None
+            return [None] * len(hands)
     
     def _analyze_pose(self, landmarks) -> Optional[str]:
-        """Analyze body pose"""
+        """Analyze body pose from a (33, 4) landmark array"""
         try:
-            # Simplified pose analysis
-            # Get key body points
-            left_shoulder = landmarks[11]
-            right_shoulder = landmarks[12]
-            left_elbow = landmarks[13]
-            right_elbow = landmarks[14]
-            left_wrist = landmarks[15]
-            right_wrist = landmarks[16]
-            
-            # Check if arms are raised
-            if (left_wrist[1] < left_shoulder[1] and 
-                right_wrist[1] < right_shoulder[1]):
-                return "arms_raised"
-            
-            # Check if person is sitting
-            left_hip = landmarks[23]
-            right_hip = landmarks[24]
-            left_knee = landmarks[25]
-            right_knee = landmarks[26]
-            
-            if (left_knee[1] > left_hip[1] and 
-                right_knee[1] > right_hip[1]):
-                return "sitting"
-            
-            return "standing"
-            
+            return classify_pose(landmarks)
         except Exception as e:
             self.logger.error(f"Error analyzing pose: {e}")
             return None
@@ -543,6 +507,7 @@ class ComputerVisionController:
         return {
             "camera_active": self.camera_active,
             "current_fps": self.current_fps,
+            "stages": self.pipeline.stats(),
             "faces_detected": len(self.tracking_data['faces']),
             "hands_detected": len(self.tracking_data['hands']),
             "poses_detected": len(self.tracking_data['poses']),
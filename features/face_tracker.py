@@ -0,0 +1,187 @@
+"""
+Enhanced SAM AI Assistant - Detect-then-track face tracking
+"""
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+_LK_PARAMS = dict(
+    winSize=(15, 15),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03),
+)
+
+
+@dataclass
+class FaceTrack:
+    """One face followed across frames; ``bbox`` is (x, y, w, h) in tracker input pixels"""
+    id: int
+    bbox: Tuple[int, int, int, int]
+    confidence: float = 1.0
+    hits: int = 1
+    misses: int = 0
+    points: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+def _iou(a, b) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = min(ax + aw, bx + bw) - max(ax, bx)
+    h = min(ay + ah, by + bh) - max(ay, by)
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+class FaceTracker:
+    """Runs the face detector every ``detect_every`` frames and follows faces in between.
+
+    Between detections each face is moved by pyramidal Lucas-Kanade
+    optical flow on corner points inside its box, with a forward-backward
+    check. A track's confidence is the share of its points that survive;
+    when any track drops below ``min_confidence`` the detector runs on
+    the next frame instead of waiting. Detections are matched to existing
+    tracks by overlap, so a face keeps its track id for as long as it
+    stays in view.
+    """
+
+    def __init__(
+        self,
+        detect: Callable[..., np.ndarray],
+        detect_every: int = 5,
+        min_confidence: float = 0.5,
+        min_points: int = 6,
+        match_iou: float = 0.3,
+        max_misses: int = 2,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.detect = detect
+        self.detect_every = max(1, detect_every)
+        self.min_confidence = min_confidence
+        self.min_points = min_points
+        self.match_iou = match_iou
+        self.max_misses = max_misses
+        self.metrics = {"frames": 0, "detections": 0}
+        self.tracks: List[FaceTrack] = []
+        self._ids = itertools.count(1)
+        self._prev: Optional[np.ndarray] = None
+        self._since_detection = 0
+
+    def reset(self):
+        self.tracks = []
+        self._prev = None
+        self._since_detection = 0
+
+    def update(self, gray: np.ndarray, **detect_kwargs) -> List[FaceTrack]:
+        """Advance every track to ``gray`` and return the live tracks"""
+        self.metrics["frames"] += 1
+        if self._prev is not None and self._prev.shape == gray.shape and self.tracks:
+            self._follow(self._prev, gray)
+        else:
+            self.tracks = []
+        self._since_detection += 1
+        if (self._prev is None or self._since_detection >= self.detect_every
+                or any(t.confidence < self.min_confidence for t in self.tracks)):
+            self._redetect(gray, self.detect(gray, **detect_kwargs))
+        self._prev = gray
+        return list(self.tracks)
+
+    # ----- tracking between detections -----
+
+    def _seed(self, gray: np.ndarray, track: FaceTrack):
+        x, y, w, h = track.bbox
+        # Inner part of the box: corners on the face rather than the background
+        mask = np.zeros(gray.shape, np.uint8)
+        mask[y + h // 5:y + h - h // 10, x + w // 5:x + w - w // 5] = 255
+        track.points = cv2.goodFeaturesToTrack(gray, maxCorners=30, qualityLevel=0.01, minDistance=3, mask=mask)
+        if track.points is None or len(track.points) < self.min_points:
+            track.confidence = 0.0
+
+    def _follow(self, prev: np.ndarray, gray: np.ndarray):
+        tracks = [t for t in self.tracks if t.points is not None and len(t.points)]
+        for track in self.tracks:
+            if track.points is None or not len(track.points):
+                track.confidence = 0.0
+        if not tracks:
+            return
+        # One flow call for the points of every face
+        counts = [len(t.points) for t in tracks]
+        p0 = np.concatenate([t.points for t in tracks]).astype(np.float32)
+        p1, status, _ = cv2.calcOpticalFlowPyrLK(prev, gray, p0, None, **_LK_PARAMS)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, prev, p1, None, **_LK_PARAMS)
+        error = np.abs(p0 - back).reshape(-1, 2).max(axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < 1.0)
+
+        height, width = gray.shape[:2]
+        start = 0
+        for track, count in zip(tracks, counts):
+            end = start + count
+            ok = good[start:end]
+            old, new = p0[start:end][ok].reshape(-1, 2), p1[start:end][ok].reshape(-1, 2)
+            start = end
+            track.confidence = ok.mean() if count else 0.0
+            if len(new) < self.min_points:
+                track.confidence = 0.0
+                track.points = None
+                continue
+            dx, dy = np.median(new - old, axis=0)
+            # Scale from the spread of the points around their centre
+            spread_old = np.linalg.norm(old - old.mean(axis=0), axis=1)
+            spread_new = np.linalg.norm(new - new.mean(axis=0), axis=1)
+            valid = spread_old > 1.0
+            scale = float(np.median(spread_new[valid] / spread_old[valid])) if valid.any() else 1.0
+            x, y, w, h = track.bbox
+            cx, cy = x + w / 2 + dx, y + h / 2 + dy
+            w, h = w * scale, h * scale
+            x, y = int(round(cx - w / 2)), int(round(cy - h / 2))
+            w, h = int(round(w)), int(round(h))
+            if w <= 0 or h <= 0 or x + w <= 0 or y + h <= 0 or x >= width or y >= height:
+                track.confidence = 0.0
+                track.points = None
+                continue
+            track.bbox = (x, y, w, h)
+            track.points = new.reshape(-1, 1, 2)
+
+    # ----- detection -----
+
+    def _redetect(self, gray: np.ndarray, boxes: np.ndarray):
+        self.metrics["detections"] += 1
+        self._since_detection = 0
+        boxes = [tuple(int(v) for v in box) for box in boxes]
+        pairs = sorted(
+            ((_iou(t.bbox, b), ti, bi) for ti, t in enumerate(self.tracks) for bi, b in enumerate(boxes)),
+            reverse=True,
+        )
+        matched_tracks, matched_boxes = set(), set()
+        for overlap, ti, bi in pairs:
+            if overlap < self.match_iou:
+                break
+            if ti in matched_tracks or bi in matched_boxes:
+                continue
+            matched_tracks.add(ti)
+            matched_boxes.add(bi)
+            track = self.tracks[ti]
+            track.bbox, track.confidence, track.misses = boxes[bi], 1.0, 0
+            track.hits += 1
+            self._seed(gray, track)
+
+        kept = []
+        for ti, track in enumerate(self.tracks):
+            if ti in matched_tracks:
+                kept.append(track)
+                continue
+            # Missed by the detector: keep following it briefly if the flow is still sure
+            track.misses += 1
+            if track.misses <= self.max_misses and track.confidence >= self.min_confidence:
+                kept.append(track)
+        for bi, box in enumerate(boxes):
+            if bi not in matched_boxes:
+                track = FaceTrack(next(self._ids), box)
+                self._seed(gray, track)
+                kept.append(track)
+        self.tracks = kept
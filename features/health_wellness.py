@@ -8,13 +8,40 @@ import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import threading
-import sqlite3
 import numpy as np
 import cv2
 
 from core.base_assistant import BaseAssistant
+from core.db import get_database, to_epoch, day_bounds, RollupSpec, DailyRollups, rollup_migration
+from features.landmarks import analyze_posture
 from config.settings import DATA_DIR
 
+# Per-day aggregates kept current by triggers for the dashboard stats
+HEALTH_ROLLUPS = [
+    RollupSpec("fitness_minutes", "fitness_activities", "duration"),
+    RollupSpec("fitness_calories", "fitness_activities", "calories_burned"),
+    RollupSpec("meditation_minutes", "meditation_sessions", "duration"),
+    RollupSpec("sleep_quality", "sleep_data", "quality_score"),
+    RollupSpec("mood", "mental_health_entries", "mood_score"),
+]
+
+# Schema migrations for health_wellness.db, applied in order (see Database.migrate)
+HEALTH_MIGRATIONS = [
+    # Sortable epoch column and indexes so per-day and windowed stats are range scans
+    (
+        "ALTER TABLE fitness_activities ADD COLUMN created_epoch INTEGER",
+        "UPDATE fitness_activities SET created_epoch = CAST(strftime('%s', created_at) AS INTEGER)",
+        "CREATE INDEX IF NOT EXISTS idx_fitness_created_epoch ON fitness_activities (created_epoch)",
+        "CREATE INDEX IF NOT EXISTS idx_fitness_created_at ON fitness_activities (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_meditation_created_at ON meditation_sessions (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_sleep_created_at ON sleep_data (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_mental_health_created_at ON mental_health_entries (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_health_metrics_type ON health_metrics (metric_type, recorded_at)",
+    ),
+    # Daily rollup table with insert/delete triggers, backfilled from history
+    rollup_migration(HEALTH_ROLLUPS),
+]
+
 class HealthWellnessController:
     """Comprehensive health and wellness management system"""
     
@@ -44,92 +71,91 @@ class HealthWellnessController:
         """Setup health and wellness database"""
         try:
             self.db_path = DATA_DIR / "health_wellness.db"
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Fitness activities table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS fitness_activities (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    activity_type TEXT NOT NULL,
-                    duration INTEGER,
-                    calories_burned INTEGER,
-                    distance REAL,
-                    intensity TEXT,
-                    notes TEXT,
-                    created_at TEXT
-                )
-            ''')
-            
-            # Health metrics table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS health_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    metric_type TEXT NOT NULL,
-                    value REAL,
-                    unit TEXT,
-                    notes TEXT,
-                    recorded_at TEXT
-                )
-            ''')
-            
-            # Sleep data table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sleep_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    sleep_start TEXT,
-                    sleep_end TEXT,
-                    duration INTEGER,
-                    quality_score INTEGER,
-                    notes TEXT,
-                    created_at TEXT
-                )
-            ''')
-            
-            # Meditation sessions table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS meditation_sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_type TEXT,
-                    duration INTEGER,
-                    mood_before INTEGER,
-                    mood_after INTEGER,
-                    notes TEXT,
-                    created_at TEXT
-                )
-            ''')
-            
-            # Nutrition entries table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS nutrition_entries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    meal_type TEXT,
-                    food_item TEXT,
-                    calories INTEGER,
-                    protein REAL,
-                    carbs REAL,
-                    fat REAL,
-                    fiber REAL,
-                    created_at TEXT
-                )
-            ''')
-            
-            # Mental health entries table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS mental_health_entries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    mood_score INTEGER,
-                    stress_level INTEGER,
-                    anxiety_level INTEGER,
-                    energy_level INTEGER,
-                    notes TEXT,
-                    created_at TEXT
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
-            
+            self.db = get_database(self.db_path)
+            with self.db.cursor() as cursor:
+                # Fitness activities table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS fitness_activities (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        activity_type TEXT NOT NULL,
+                        duration INTEGER,
+                        calories_burned INTEGER,
+                        distance REAL,
+                        intensity TEXT,
+                        notes TEXT,
+                        created_at TEXT
+                    )
+                ''')
+                
+                # Health metrics table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS health_metrics (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        metric_type TEXT NOT NULL,
+                        value REAL,
+                        unit TEXT,
+                        notes TEXT,
+                        recorded_at TEXT
+                    )
+                ''')
+                
+                # Sleep data table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS sleep_data (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        sleep_start TEXT,
+                        sleep_end TEXT,
+                        duration INTEGER,
+                        quality_score INTEGER,
+                        notes TEXT,
+                        created_at TEXT
+                    )
+                ''')
+                
+                # Meditation sessions table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS meditation_sessions (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        session_type TEXT,
+                        duration INTEGER,
+                        mood_before INTEGER,
+                        mood_after INTEGER,
+                        notes TEXT,
+                        created_at TEXT
+                    )
+                ''')
+                
+                # Nutrition entries table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS nutrition_entries (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        meal_type TEXT,
+                        food_item TEXT,
+                        calories INTEGER,
+                        protein REAL,
+                        carbs REAL,
+                        fat REAL,
+                        fiber REAL,
+                        created_at TEXT
+                    )
+                ''')
+                
+                # Mental health entries table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS mental_health_entries (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        mood_score INTEGER,
+                        stress_level INTEGER,
+                        anxiety_level INTEGER,
+                        energy_level INTEGER,
+                        notes TEXT,
+                        created_at TEXT
+                    )
+                ''')
+
+            self.db.migrate(HEALTH_MIGRATIONS)
+            self.rollups = DailyRollups(self.db, HEALTH_ROLLUPS)
+
             self.logger.info("Health & Wellness database initialized")
             
         except Exception as e:
@@ -432,22 +458,18 @@ class FitnessTracker:
             duration = (end_time - self.current_workout['start_time']).total_seconds() / 60  # minutes
             
             # Save workout to database
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO fitness_activities (activity_type, duration, calories_burned, distance, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                self.current_workout['activity_type'],
-                int(duration),
-                self.current_workout['calories_burned'],
-                self.current_workout['distance'],
-                datetime.now().isoformat()
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO fitness_activities (activity_type, duration, calories_burned, distance, created_at, created_epoch)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    self.current_workout['activity_type'],
+                    int(duration),
+                    self.current_workout['calories_burned'],
+                    self.current_workout['distance'],
+                    end_time.isoformat(),
+                    to_epoch(end_time)
+                ))
             
             self.logger.info(f"Ended workout: {self.current_workout['activity_type']}, Duration: {duration:.1f} minutes")
             self.current_workout = None
@@ -466,16 +488,12 @@ class FitnessTracker:
             if calories is None:
                 calories = self._estimate_calories(activity_type, duration)
             
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO fitness_activities (activity_type, duration, calories_burned, distance, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (activity_type, duration, calories, distance or 0.0, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                created_at = datetime.now()
+                cursor.execute('''
+                    INSERT INTO fitness_activities (activity_type, duration, calories_burned, distance, created_at, created_epoch)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (activity_type, duration, calories, distance or 0.0, created_at.isoformat(), to_epoch(created_at)))
             
             self.logger.info(f"Logged activity: {activity_type}")
             return True
@@ -522,18 +540,15 @@ class FitnessTracker:
     def get_today_activity_count(self) -> int:
         """Get count of activities today"""
         try:
-            today = datetime.now().date().isoformat()
-            
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
+            day_start, day_end = day_bounds()
             
-            cursor.execute('''
-                SELECT COUNT(*) FROM fitness_activities 
-                WHERE DATE(created_at) = ?
-            ''', (today,))
-            
-            count = cursor.fetchone()[0]
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT COUNT(*) FROM fitness_activities 
+                    WHERE created_epoch >= ? AND created_epoch < ?
+                ''', (day_start, day_end))
+                
+                count = cursor.fetchone()[0]
             
             return count
             
@@ -544,21 +559,11 @@ class FitnessTracker:
     def get_weekly_progress(self) -> Dict:
         """Get weekly fitness progress"""
         try:
-            week_start = (datetime.now() - timedelta(days=7)).isoformat()
-            
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT SUM(duration), SUM(calories_burned) FROM fitness_activities 
-                WHERE created_at >= ?
-            ''', (week_start,))
-            
-            result = cursor.fetchone()
-            total_minutes = result[0] or 0
-            total_calories = result[1] or 0
+            week_start = datetime.now() - timedelta(days=7)
             
-            conn.close()
+            rollups = self.controller.rollups
+            total_minutes = int(rollups.total('fitness_minutes', week_start))
+            total_calories = int(rollups.total('fitness_calories', week_start))
             
             return {
                 'total_minutes': total_minutes,
@@ -701,22 +706,17 @@ class MeditationGuide:
             actual_duration = (end_time - self.current_session['start_time']).total_seconds() / 60
             
             # Save session to database
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO meditation_sessions (session_type, duration, mood_before, mood_after, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                self.current_session['type'],
-                int(actual_duration),
-                self.current_session.get('mood_before'),
-                self.current_session.get('mood_after'),
-                datetime.now().isoformat()
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO meditation_sessions (session_type, duration, mood_before, mood_after, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (
+                    self.current_session['type'],
+                    int(actual_duration),
+                    self.current_session.get('mood_before'),
+                    self.current_session.get('mood_after'),
+                    datetime.now().isoformat()
+                ))
             
             self.logger.info(f"Completed meditation session: {actual_duration:.1f} minutes")
             self.current_session = None
@@ -729,16 +729,13 @@ class MeditationGuide:
         try:
             week_start = (datetime.now() - timedelta(days=7)).isoformat()
             
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT COUNT(*) FROM meditation_sessions 
-                WHERE created_at >= ?
-            ''', (week_start,))
-            
-            count = cursor.fetchone()[0]
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT COUNT(*) FROM meditation_sessions 
+                    WHERE created_at >= ?
+                ''', (week_start,))
+                
+                count = cursor.fetchone()[0]
             
             return count
             
@@ -749,14 +746,7 @@ class MeditationGuide:
     def get_total_meditation_time(self) -> int:
         """Get total meditation time in minutes"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT SUM(duration) FROM meditation_sessions')
-            total = cursor.fetchone()[0] or 0
-            
-            conn.close()
-            return total
+            return int(self.controller.rollups.total('meditation_minutes'))
             
         except Exception as e:
             self.logger.error(f"Error getting total meditation time: {e}")
@@ -805,16 +795,11 @@ class HealthMonitor:
     def record_metric(self, metric_type: str, value: float, unit: str, notes: str = "") -> bool:
         """Record a health metric"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO health_metrics (metric_type, value, unit, notes, recorded_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (metric_type, value, unit, notes, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO health_metrics (metric_type, value, unit, notes, recorded_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (metric_type, value, unit, notes, datetime.now().isoformat()))
             
             self.logger.info(f"Recorded {metric_type}: {value} {unit}")
             return True
@@ -886,22 +871,17 @@ class SleepTracker:
             quality_score = self._calculate_sleep_quality(duration)
             
             # Save sleep data
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO sleep_data (sleep_start, sleep_end, duration, quality_score, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                self.sleep_session['start_time'].isoformat(),
-                end_time.isoformat(),
-                int(duration * 60),  # Convert to minutes
-                quality_score,
-                datetime.now().isoformat()
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO sleep_data (sleep_start, sleep_end, duration, quality_score, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (
+                    self.sleep_session['start_time'].isoformat(),
+                    end_time.isoformat(),
+                    int(duration * 60),  # Convert to minutes
+                    quality_score,
+                    datetime.now().isoformat()
+                ))
             
             self.logger.info(f"Sleep tracking ended: {duration:.1f} hours")
             self.sleep_session = None
@@ -937,17 +917,14 @@ class SleepTracker:
     def get_last_sleep_stats(self) -> Dict:
         """Get last sleep session statistics"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM sleep_data 
-                ORDER BY created_at DESC 
-                LIMIT 1
-            ''')
-            
-            row = cursor.fetchone()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT * FROM sleep_data 
+                    ORDER BY created_at DESC 
+                    LIMIT 1
+                ''')
+                
+                row = cursor.fetchone()
             
             if row:
                 return {
@@ -971,18 +948,9 @@ class SleepTracker:
     def get_average_sleep_quality(self) -> float:
         """Get average sleep quality over last 7 days"""
         try:
-            week_start = (datetime.now() - timedelta(days=7)).isoformat()
-            
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
+            week_start = datetime.now() - timedelta(days=7)
             
-            cursor.execute('''
-                SELECT AVG(quality_score) FROM sleep_data 
-                WHERE created_at >= ?
-            ''', (week_start,))
-            
-            avg_quality = cursor.fetchone()[0] or 0
-            conn.close()
+            avg_quality = self.controller.rollups.average('sleep_quality', week_start) or 0
             
             return avg_quality
             
@@ -1065,47 +1033,13 @@ class PostureMonitor:
     def _analyze_posture(self, pose_data: Dict) -> Dict:
         """Analyze posture from pose landmarks"""
         try:
-            landmarks = pose_data.get('landmarks', [])
+            landmarks = pose_data.get('landmarks')
             
-            if not landmarks:
+            if landmarks is None or not len(landmarks):
                 return {'good_posture': True, 'score': 5, 'issues': [], 'suggestions': []}
             
-            issues = []
-            suggestions = []
-            score = 10
-            
-            # Get key body points
-            left_shoulder = landmarks[11]
-            right_shoulder = landmarks[12]
-            nose = landmarks[0]
-            left_ear = landmarks[7]
-            right_ear = landmarks[8]
-            
-            # Check shoulder alignment
-            shoulder_diff = abs(left_shoulder[1] - right_shoulder[1])
-            if shoulder_diff > 0.05:  # Threshold for shoulder misalignment
-                issues.append("Uneven shoulders")
-                suggestions.append("Align your shoulders")
-                score -= 2
-            
-            # Check head position (forward head posture)
-            ear_avg_x = (left_ear[0] + right_ear[0]) / 2
-            shoulder_avg_x = (left_shoulder[0] + right_shoulder[0]) / 2
-            
-            if ear_avg_x > shoulder_avg_x + 0.05:  # Head too far forward
-                issues.append("Forward head posture")
-                suggestions.append("Pull your head back and align with shoulders")
-                score -= 3
-            
-            # Check overall posture score
-            good_posture = score >= 7
-            
-            return {
-                'good_posture': good_posture,
-                'score': score,
-                'issues': issues,
-                'suggestions': suggestions
-            }
+            # Shoulder alignment and forward head posture from the (33, 4) array
+            return analyze_posture(landmarks)
             
         except Exception as e:
             self.logger.error(f"Error analyzing posture: {e}")
@@ -1160,16 +1094,11 @@ class NutritionTracker:
                 carbs = nutrition.get('carbs', 15)
                 fat = nutrition.get('fat', 3)
             
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO nutrition_entries (meal_type, food_item, calories, protein, carbs, fat, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (meal_type, food_item, calories, protein, carbs, fat, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO nutrition_entries (meal_type, food_item, calories, protein, carbs, fat, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (meal_type, food_item, calories, protein, carbs, fat, datetime.now().isoformat()))
             
             self.logger.info(f"Logged food: {food_item}")
             return True
@@ -1272,16 +1201,11 @@ class MentalHealthAssistant:
                          notes: str = "") -> bool:
         """Record a mental health entry"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO mental_health_entries (mood_score, stress_level, anxiety_level, energy_level, notes, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (mood_score, stress_level, anxiety_level, energy_level, notes, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO mental_health_entries (mood_score, stress_level, anxiety_level, energy_level, notes, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (mood_score, stress_level, anxiety_level, energy_level, notes, datetime.now().isoformat()))
             
             self.logger.info(f"Recorded mood entry: mood={mood_score}, stress={stress_level}")
             return True
@@ -1304,18 +1228,9 @@ class MentalHealthAssistant:
     def get_average_mood(self) -> float:
         """Get average mood over last 7 days"""
         try:
-            week_start = (datetime.now() - timedelta(days=7)).isoformat()
-            
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT AVG(mood_score) FROM mental_health_entries 
-                WHERE created_at >= ?
-            ''', (week_start,))
+            week_start = datetime.now() - timedelta(days=7)
             
-            avg_mood = cursor.fetchone()[0] or 5
-            conn.close()
+            avg_mood = self.controller.rollups.average('mood', week_start) or 5
             
             return avg_mood
             
@@ -1326,17 +1241,14 @@ class MentalHealthAssistant:
     def get_current_stress_level(self) -> int:
         """Get most recent stress level"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT stress_level FROM mental_health_entries 
-                ORDER BY created_at DESC 
-                LIMIT 1
-            ''')
-            
-            result = cursor.fetchone()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT stress_level FROM mental_health_entries 
+                    ORDER BY created_at DESC 
+                    LIMIT 1
+                ''')
+                
+                result = cursor.fetchone()
             
             return result[0] if result else 5
             
@@ -0,0 +1,197 @@
+"""
+Enhanced SAM AI Assistant - Gesture and posture classifiers on landmark arrays
+"""
+import json
+from collections import Counter, deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Hand landmarks (MediaPipe Hands): (21, 3) normalized x, y, z
+THUMB_IP, THUMB_TIP = 3, 4
+FINGER_PIPS = np.array([6, 10, 14, 18])   # index, middle, ring, pinky
+FINGER_TIPS = np.array([8, 12, 16, 20])
+
+# Pose landmarks (MediaPipe Pose): (33, 4) normalized x, y, z, visibility
+EARS = np.array([7, 8])
+SHOULDERS = np.array([11, 12])
+WRISTS = np.array([15, 16])
+HIPS = np.array([23, 24])
+KNEES = np.array([25, 26])
+
+
+def _batch(landmarks, points: int) -> np.ndarray:
+    """View one (points, k) array, or a batch of them, as (n, points, k) float32."""
+    array = np.asarray(landmarks, np.float32)
+    return array.reshape((-1, points) + array.shape[-1:])
+
+
+# ----- hands -----
+
+def finger_states(hands) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(thumb_up (n,), extended (n, 4), folded (n, 4)) for index..pinky.
+
+    Image y grows downwards, so a fingertip above its PIP joint is
+    extended and one below it is folded; level counts as neither.
+    """
+    hands = _batch(hands, 21)
+    tips_y = hands[:, FINGER_TIPS, 1]
+    pips_y = hands[:, FINGER_PIPS, 1]
+    thumb_up = hands[:, THUMB_TIP, 1] < hands[:, THUMB_IP, 1]
+    return thumb_up, tips_y < pips_y, tips_y > pips_y
+
+
+def _gesture_rule(thumb_up: bool, up, down) -> Optional[str]:
+    """The gesture rules on one hand's finger states; the first match wins."""
+    if thumb_up and down[0] and down[1]:
+        return "thumbs_up"
+    if up[0] and up[1] and down[2] and down[3]:
+        return "peace_sign"
+    if up[0] and down[1] and down[2] and down[3]:
+        return "pointing"
+    if all(down):
+        return "fist"
+    return None
+
+
+# The 9 finger-state bits (thumb up, 4 extended, 4 folded) index a table
+# of the rules' answers, so classifying a batch is one lookup per hand
+_STATE_BITS = 1 << np.arange(9)
+_GESTURE_TABLE = np.array([
+    _gesture_rule(bool(code & 1), [code >> i & 1 for i in range(1, 5)], [code >> i & 1 for i in range(5, 9)])
+    for code in range(1 << 9)
+], dtype=object)
+
+
+def classify_gestures(hands) -> List[Optional[str]]:
+    """Gesture name (or None) for each hand in an (n, 21, 3) batch."""
+    hands = _batch(hands, 21)
+    if not len(hands):
+        return []
+    thumb_up, up, down = finger_states(hands)
+    codes = np.concatenate([thumb_up[:, None], up, down], axis=1) @ _STATE_BITS
+    return _GESTURE_TABLE[codes].tolist()
+
+
+def classify_gesture(hand) -> Optional[str]:
+    """Gesture name for one (21, 3) hand, or None."""
+    return classify_gestures(hand)[0]
+
+
+# ----- body -----
+
+def classify_poses(poses) -> List[str]:
+    """"arms_raised", "sitting" or "standing" for each pose in an (n, 33, 4) batch."""
+    poses = _batch(poses, 33)
+    y = poses[:, :, 1]
+    arms_raised = (y[:, WRISTS] < y[:, SHOULDERS]).all(axis=1)
+    sitting = (y[:, KNEES] > y[:, HIPS]).all(axis=1)
+    return np.where(arms_raised, "arms_raised", np.where(sitting, "sitting", "standing")).tolist()
+
+
+def classify_pose(pose) -> Optional[str]:
+    """Body pose name for one (33, 4) pose, or None if there is none."""
+    poses = classify_poses(pose)
+    return poses[0] if poses else None
+
+
+def posture_features(poses) -> Dict[str, np.ndarray]:
+    """Per-pose shoulder tilt and forward head offset (normalized units)."""
+    poses = _batch(poses, 33)
+    shoulders = poses[:, SHOULDERS, :2]
+    return {
+        "shoulder_tilt": np.abs(shoulders[:, 0, 1] - shoulders[:, 1, 1]),
+        "head_forward": poses[:, EARS, 0].mean(axis=1) - shoulders[:, :, 0].mean(axis=1),
+    }
+
+
+def analyze_postures(poses, shoulder_limit: float = 0.05, head_limit: float = 0.05) -> List[Dict]:
+    """Posture score (0-10), issues and suggestions for each pose in a batch."""
+    features = posture_features(poses)
+    uneven = features["shoulder_tilt"] > shoulder_limit
+    forward = features["head_forward"] > head_limit
+    scores = 10 - 2 * uneven - 3 * forward
+    results = []
+    for score, is_uneven, is_forward in zip(scores.tolist(), uneven.tolist(), forward.tolist()):
+        issues, suggestions = [], []
+        if is_uneven:
+            issues.append("Uneven shoulders")
+            suggestions.append("Align your shoulders")
+        if is_forward:
+            issues.append("Forward head posture")
+            suggestions.append("Pull your head back and align with shoulders")
+        results.append({
+            'good_posture': score >= 7,
+            'score': score,
+            'issues': issues,
+            'suggestions': suggestions
+        })
+    return results
+
+
+def analyze_posture(pose) -> Dict:
+    """Posture analysis of one (33, 4) pose."""
+    return analyze_postures(pose)[0]
+
+
+# ----- smoothing -----
+
+class GestureSmoother:
+    """Majority vote over the last ``window`` per-frame gestures.
+
+    ``update`` returns a gesture only on the frame it becomes stable,
+    i.e. once it holds at least ``min_votes`` of the window and differs
+    from the previous stable gesture, so holding a gesture fires once
+    and single-frame misclassifications never fire at all.
+    """
+
+    def __init__(self, window: int = 5, min_votes: int = 3):
+        self.history = deque(maxlen=max(1, window))
+        self.min_votes = min(max(1, min_votes), self.history.maxlen)
+        self.current: Optional[str] = None
+
+    def update(self, gesture: Optional[str]) -> Optional[str]:
+        self.history.append(gesture)
+        label, votes = Counter(self.history).most_common(1)[0]
+        if votes < self.min_votes or label == self.current:
+            return None
+        self.current = label
+        return label
+
+    def reset(self):
+        self.history.clear()
+        self.current = None
+
+
+# ----- recorded landmarks -----
+
+def save_landmarks(path: Union[str, Path], landmarks, labels: Optional[List[Optional[str]]] = None):
+    """Write an (n, points, k) landmark array, and optional per-sample labels, to .npz."""
+    arrays = {"landmarks": np.asarray(landmarks, np.float32)}
+    if labels is not None:
+        arrays["labels"] = np.array(["" if label is None else label for label in labels])
+    np.savez_compressed(str(path), **arrays)
+
+
+def load_landmarks(path: Union[str, Path]) -> Tuple[np.ndarray, Optional[List[Optional[str]]]]:
+    """Read recorded landmarks and labels (None where unlabelled or "none").
+
+    ``.npz`` as written by ``save_landmarks``; ``.npy`` with just the
+    array; or ``.jsonl`` with one ``{"landmarks": [[x, y, z], ...],
+    "label": "fist"}`` object per line, which is easy to write by hand.
+    """
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        samples = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+        landmarks = np.array([s["landmarks"] for s in samples], np.float32)
+        labels = [s.get("label") for s in samples] if any("label" in s for s in samples) else None
+    elif path.suffix == ".npz":
+        with np.load(str(path)) as data:
+            landmarks = data["landmarks"].astype(np.float32)
+            labels = data["labels"].tolist() if "labels" in data else None
+    else:
+        landmarks, labels = np.load(str(path)).astype(np.float32), None
+    if labels is not None:
+        labels = [None if label in ("", "none", None) else label for label in labels]
+    return landmarks, labels
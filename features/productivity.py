@@ -14,11 +14,29 @@ import email
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import calendar
-import sqlite3
 
 from core.base_assistant import BaseAssistant
+from core.db import get_database, to_epoch, day_bounds
 from config.settings import API_KEYS, DATA_DIR
 
+# Schema migrations for productivity.db, applied in order (see Database.migrate)
+PRODUCTIVITY_MIGRATIONS = [
+    # Sortable epoch columns and indexes so per-day stats are range scans
+    (
+        "ALTER TABLE tasks ADD COLUMN completed_epoch INTEGER",
+        "UPDATE tasks SET completed_epoch = CAST(strftime('%s', completed_at) AS INTEGER)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_completed ON tasks (status, completed_epoch)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_priority ON tasks (status, priority DESC, created_at)",
+        "ALTER TABLE events ADD COLUMN start_epoch INTEGER",
+        "UPDATE events SET start_epoch = CAST(strftime('%s', start_time) AS INTEGER)",
+        "CREATE INDEX IF NOT EXISTS idx_events_start_epoch ON events (start_epoch)",
+        "CREATE INDEX IF NOT EXISTS idx_events_start_time ON events (start_time)",
+        "ALTER TABLE time_entries ADD COLUMN start_epoch INTEGER",
+        "UPDATE time_entries SET start_epoch = CAST(strftime('%s', start_time) AS INTEGER)",
+        "CREATE INDEX IF NOT EXISTS idx_time_entries_start_epoch ON time_entries (start_epoch)",
+    ),
+]
+
 class ProductivityController:
     """Comprehensive productivity management system"""
     
@@ -48,70 +66,68 @@ class ProductivityController:
         """Setup productivity database"""
         try:
             self.db_path = DATA_DIR / "productivity.db"
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Tasks table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    priority INTEGER DEFAULT 1,
-                    status TEXT DEFAULT 'pending',
-                    due_date TEXT,
-                    created_at TEXT,
-                    completed_at TEXT,
-                    category TEXT,
-                    tags TEXT
-                )
-            ''')
-            
-            # Calendar events table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    start_time TEXT,
-                    end_time TEXT,
-                    location TEXT,
-                    attendees TEXT,
-                    reminder_time TEXT,
-                    created_at TEXT
-                )
-            ''')
-            
-            # Notes table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS notes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    content TEXT,
-                    category TEXT,
-                    tags TEXT,
-                    created_at TEXT,
-                    updated_at TEXT
-                )
-            ''')
-            
-            # Time tracking table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS time_entries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    task_id INTEGER,
-                    project TEXT,
-                    description TEXT,
-                    start_time TEXT,
-                    end_time TEXT,
-                    duration INTEGER,
-                    created_at TEXT
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
-            
+            self.db = get_database(self.db_path)
+            with self.db.cursor() as cursor:
+                # Tasks table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS tasks (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        title TEXT NOT NULL,
+                        description TEXT,
+                        priority INTEGER DEFAULT 1,
+                        status TEXT DEFAULT 'pending',
+                        due_date TEXT,
+                        created_at TEXT,
+                        completed_at TEXT,
+                        category TEXT,
+                        tags TEXT
+                    )
+                ''')
+                
+                # Calendar events table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS events (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        title TEXT NOT NULL,
+                        description TEXT,
+                        start_time TEXT,
+                        end_time TEXT,
+                        location TEXT,
+                        attendees TEXT,
+                        reminder_time TEXT,
+                        created_at TEXT
+                    )
+                ''')
+                
+                # Notes table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS notes (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        title TEXT NOT NULL,
+                        content TEXT,
+                        category TEXT,
+                        tags TEXT,
+                        created_at TEXT,
+                        updated_at TEXT
+                    )
+                ''')
+                
+                # Time tracking table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS time_entries (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        task_id INTEGER,
+                        project TEXT,
+                        description TEXT,
+                        start_time TEXT,
+                        end_time TEXT,
+                        duration INTEGER,
+                        created_at TEXT
+                    )
+                ''')
+
+            self.db.migrate(PRODUCTIVITY_MIGRATIONS)
+
             self.logger.info("Productivity database initialized")
             
         except Exception as e:
@@ -362,21 +378,17 @@ class TaskManager:
                    due_date: str = None, category: str = "", tags: List[str] = None) -> Optional[int]:
         """Create a new task"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO tasks (title, description, priority, due_date, created_at, category, tags)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                title, description, priority, due_date,
-                datetime.now().isoformat(), category,
-                json.dumps(tags or [])
-            ))
-            
-            task_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO tasks (title, description, priority, due_date, created_at, category, tags)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    title, description, priority, due_date,
+                    datetime.now().isoformat(), category,
+                    json.dumps(tags or [])
+                ))
+                
+                task_id = cursor.lastrowid
             
             self.logger.info(f"Created task: {title}")
             return task_id
@@ -388,16 +400,12 @@ class TaskManager:
     def complete_task(self, task_id: int) -> bool:
         """Mark task as complete"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                UPDATE tasks SET status = 'completed', completed_at = ?
-                WHERE id = ?
-            ''', (datetime.now().isoformat(), task_id))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                completed_at = datetime.now()
+                cursor.execute('''
+                    UPDATE tasks SET status = 'completed', completed_at = ?, completed_epoch = ?
+                    WHERE id = ?
+                ''', (completed_at.isoformat(), to_epoch(completed_at), task_id))
             
             return cursor.rowcount > 0
             
@@ -408,29 +416,25 @@ class TaskManager:
     def get_pending_tasks(self) -> List[Dict]:
         """Get all pending tasks"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM tasks WHERE status = 'pending'
-                ORDER BY priority DESC, created_at ASC
-            ''')
-            
-            tasks = []
-            for row in cursor.fetchall():
-                tasks.append({
-                    'id': row[0],
-                    'title': row[1],
-                    'description': row[2],
-                    'priority': row[3],
-                    'status': row[4],
-                    'due_date': row[5],
-                    'created_at': row[6],
-                    'category': row[8],
-                    'tags': json.loads(row[9]) if row[9] else []
-                })
-            
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT * FROM tasks WHERE status = 'pending'
+                    ORDER BY priority DESC, created_at ASC
+                ''')
+                
+                tasks = []
+                for row in cursor.fetchall():
+                    tasks.append({
+                        'id': row[0],
+                        'title': row[1],
+                        'description': row[2],
+                        'priority': row[3],
+                        'status': row[4],
+                        'due_date': row[5],
+                        'created_at': row[6],
+                        'category': row[8],
+                        'tags': json.loads(row[9]) if row[9] else []
+                    })
             return tasks
             
         except Exception as e:
@@ -440,13 +444,9 @@ class TaskManager:
     def get_task_count(self) -> int:
         """Get total task count"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT COUNT(*) FROM tasks')
-            count = cursor.fetchone()[0]
-            
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM tasks')
+                count = cursor.fetchone()[0]
             return count
             
         except Exception as e:
@@ -456,18 +456,15 @@ class TaskManager:
     def get_completed_today_count(self) -> int:
         """Get count of tasks completed today"""
         try:
-            today = datetime.now().date().isoformat()
-            
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT COUNT(*) FROM tasks 
-                WHERE status = 'completed' AND DATE(completed_at) = ?
-            ''', (today,))
+            day_start, day_end = day_bounds()
             
-            count = cursor.fetchone()[0]
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT COUNT(*) FROM tasks 
+                    WHERE status = 'completed' AND completed_epoch >= ? AND completed_epoch < ?
+                ''', (day_start, day_end))
+                
+                count = cursor.fetchone()[0]
             
             return count
             
@@ -487,20 +484,17 @@ class CalendarManager:
                     end_time: str = None, location: str = "", attendees: List[str] = None) -> Optional[int]:
         """Create a new calendar event"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO events (title, description, start_time, end_time, location, attendees, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                title, description, start_time, end_time, location,
-                json.dumps(attendees or []), datetime.now().isoformat()
-            ))
-            
-            event_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO events (title, description, start_time, end_time, location, attendees, created_at, start_epoch)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    title, description, start_time, end_time, location,
+                    json.dumps(attendees or []), datetime.now().isoformat(),
+                    to_epoch(start_time)
+                ))
+                
+                event_id = cursor.lastrowid
             
             self.logger.info(f"Created event: {title}")
             return event_id
@@ -514,28 +508,24 @@ class CalendarManager:
         try:
             end_date = (datetime.now() + timedelta(days=days)).isoformat()
             
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM events 
-                WHERE start_time >= ? AND start_time <= ?
-                ORDER BY start_time ASC
-            ''', (datetime.now().isoformat(), end_date))
-            
-            events = []
-            for row in cursor.fetchall():
-                events.append({
-                    'id': row[0],
-                    'title': row[1],
-                    'description': row[2],
-                    'start_time': row[3],
-                    'end_time': row[4],
-                    'location': row[5],
-                    'attendees': json.loads(row[6]) if row[6] else []
-                })
-            
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT * FROM events 
+                    WHERE start_time >= ? AND start_time <= ?
+                    ORDER BY start_time ASC
+                ''', (datetime.now().isoformat(), end_date))
+                
+                events = []
+                for row in cursor.fetchall():
+                    events.append({
+                        'id': row[0],
+                        'title': row[1],
+                        'description': row[2],
+                        'start_time': row[3],
+                        'end_time': row[4],
+                        'location': row[5],
+                        'attendees': json.loads(row[6]) if row[6] else []
+                    })
             return events
             
         except Exception as e:
@@ -545,28 +535,23 @@ class CalendarManager:
     def get_today_events(self) -> List[Dict]:
         """Get today's events"""
         try:
-            today = datetime.now().date().isoformat()
-            tomorrow = (datetime.now().date() + timedelta(days=1)).isoformat()
-            
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM events 
-                WHERE DATE(start_time) = ?
-                ORDER BY start_time ASC
-            ''', (today,))
-            
-            events = []
-            for row in cursor.fetchall():
-                events.append({
-                    'id': row[0],
-                    'title': row[1],
-                    'start_time': row[3],
-                    'end_time': row[4]
-                })
-            
-            conn.close()
+            day_start, day_end = day_bounds()
+            
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT * FROM events 
+                    WHERE start_epoch >= ? AND start_epoch < ?
+                    ORDER BY start_time ASC
+                ''', (day_start, day_end))
+                
+                events = []
+                for row in cursor.fetchall():
+                    events.append({
+                        'id': row[0],
+                        'title': row[1],
+                        'start_time': row[3],
+                        'end_time': row[4]
+                    })
             return events
             
         except Exception as e:
@@ -643,20 +628,16 @@ class NoteManager:
     def create_note(self, title: str, content: str, category: str = "", tags: List[str] = None) -> Optional[int]:
         """Create a new note"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO notes (title, content, category, tags, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                title, content, category, json.dumps(tags or []),
-                datetime.now().isoformat(), datetime.now().isoformat()
-            ))
-            
-            note_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO notes (title, content, category, tags, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    title, content, category, json.dumps(tags or []),
+                    datetime.now().isoformat(), datetime.now().isoformat()
+                ))
+                
+                note_id = cursor.lastrowid
             
             self.logger.info(f"Created note: {title}")
             return note_id
@@ -668,26 +649,22 @@ class NoteManager:
     def search_notes(self, search_term: str) -> List[Dict]:
         """Search notes by content"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM notes 
-                WHERE title LIKE ? OR content LIKE ?
-                ORDER BY updated_at DESC
-            ''', (f'%{search_term}%', f'%{search_term}%'))
-            
-            notes = []
-            for row in cursor.fetchall():
-                notes.append({
-                    'id': row[0],
-                    'title': row[1],
-                    'content': row[2],
-                    'category': row[3],
-                    'tags': json.loads(row[4]) if row[4] else []
-                })
-            
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT * FROM notes 
+                    WHERE title LIKE ? OR content LIKE ?
+                    ORDER BY updated_at DESC
+                ''', (f'%{search_term}%', f'%{search_term}%'))
+                
+                notes = []
+                for row in cursor.fetchall():
+                    notes.append({
+                        'id': row[0],
+                        'title': row[1],
+                        'content': row[2],
+                        'category': row[3],
+                        'tags': json.loads(row[4]) if row[4] else []
+                    })
             return notes
             
         except Exception as e:
@@ -697,13 +674,9 @@ class NoteManager:
     def get_note_count(self) -> int:
         """Get total note count"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT COUNT(*) FROM notes')
-            count = cursor.fetchone()[0]
-            
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM notes')
+                count = cursor.fetchone()[0]
             return count
             
         except Exception as e:
@@ -809,24 +782,20 @@ class TimeTracker:
             duration = (end_time - self.current_session['start_time']).total_seconds()
             
             # Save to database
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO time_entries (task_id, project, description, start_time, end_time, duration, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                self.current_session.get('task_id'),
-                self.current_session['project'],
-                self.current_session['description'],
-                self.current_session['start_time'].isoformat(),
-                end_time.isoformat(),
-                int(duration),
-                datetime.now().isoformat()
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO time_entries (task_id, project, description, start_time, end_time, duration, created_at, start_epoch)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    self.current_session.get('task_id'),
+                    self.current_session['project'],
+                    self.current_session['description'],
+                    self.current_session['start_time'].isoformat(),
+                    end_time.isoformat(),
+                    int(duration),
+                    datetime.now().isoformat(),
+                    to_epoch(self.current_session['start_time'])
+                ))
             
             self.logger.info(f"Stopped tracking time for: {self.current_session['project']}")
             self.current_session = None
@@ -844,18 +813,15 @@ class TimeTracker:
     def get_today_hours(self) -> float:
         """Get total hours tracked today"""
         try:
-            today = datetime.now().date().isoformat()
+            day_start, day_end = day_bounds()
             
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT SUM(duration) FROM time_entries 
-                WHERE DATE(start_time) = ?
-            ''', (today,))
-            
-            total_seconds = cursor.fetchone()[0] or 0
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT SUM(duration) FROM time_entries 
+                    WHERE start_epoch >= ? AND start_epoch < ?
+                ''', (day_start, day_end))
+                
+                total_seconds = cursor.fetchone()[0] or 0
             
             return total_seconds / 3600  # Convert to hours
             
@@ -16,8 +16,21 @@ import cv2
 import numpy as np
 
 from core.base_assistant import BaseAssistant
+from core.db import get_database
 from config.settings import DATA_DIR, SECURITY_CONFIG
 
+# Schema migrations for security.db, applied in order (see Database.migrate)
+SECURITY_MIGRATIONS = [
+    # Indexes for the monitor's windowed counts and log retention deletes
+    (
+        "CREATE INDEX IF NOT EXISTS idx_security_events_type_created ON security_events (event_type, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_security_events_created ON security_events (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_access_logs_created ON access_logs (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_active_expires ON sessions (is_active, expires_at)",
+    ),
+]
+
 class SecurityController:
     """Comprehensive security and privacy management system"""
     
@@ -54,81 +67,89 @@ class SecurityController:
         """Setup security database"""
         try:
             self.db_path = DATA_DIR / "security.db"
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Users table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    salt TEXT NOT NULL,
-                    email TEXT,
-                    role TEXT DEFAULT 'user',
-                    created_at TEXT,
-                    last_login TEXT,
-                    failed_attempts INTEGER DEFAULT 0,
-                    locked_until TEXT
-                )
-            ''')
-            
-            # Security events table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS security_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    event_type TEXT NOT NULL,
-                    user_id INTEGER,
-                    description TEXT,
-                    ip_address TEXT,
-                    user_agent TEXT,
-                    severity TEXT,
-                    created_at TEXT
-                )
-            ''')
-            
-            # Sessions table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT UNIQUE NOT NULL,
-                    user_id INTEGER,
-                    created_at TEXT,
-                    expires_at TEXT,
-                    last_activity TEXT,
-                    ip_address TEXT,
-                    is_active INTEGER DEFAULT 1
-                )
-            ''')
-            
-            # Biometric data table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS biometric_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    biometric_type TEXT,
-                    data_hash TEXT,
-                    created_at TEXT,
-                    last_used TEXT
-                )
+            self.db = get_database(self.db_path)
+            with self.db.cursor() as cursor:
+                # Users table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS users (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        username TEXT UNIQUE NOT NULL,
+                        password_hash TEXT NOT NULL,
+                        salt TEXT NOT NULL,
+                        email TEXT,
+                        role TEXT DEFAULT 'user',
+                        created_at TEXT,
+                        last_login TEXT,
+                        failed_attempts INTEGER DEFAULT 0,
+                        locked_until TEXT
+                    )
+                ''')
+                
+                # Security events table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS security_events (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        event_type TEXT NOT NULL,
+                        user_id INTEGER,
+                        description TEXT,
+                        ip_address TEXT,
+                        user_agent TEXT,
+                        severity TEXT,
+                        created_at TEXT
+                    )
+                ''')
+                
+                # Sessions table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS sessions (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        session_id TEXT UNIQUE NOT NULL,
+                        user_id INTEGER,
+                        created_at TEXT,
+                        expires_at TEXT,
+                        last_activity TEXT,
+                        ip_address TEXT,
+                        is_active INTEGER DEFAULT 1
+                    )
+                ''')
+                
+                # Biometric data table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS biometric_data (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id INTEGER,
+                        biometric_type TEXT,
+                        data_hash TEXT,
+                        created_at TEXT,
+                        last_used TEXT
+                    )
+                ''')
+                
+                # Access logs table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS access_logs (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id INTEGER,
+                        resource TEXT,
+                        action TEXT,
+                        result TEXT,
+                        ip_address TEXT,
+                        created_at TEXT
+                    )
+                ''')
+            
+            self.db.migrate(SECURITY_MIGRATIONS)
+            
+            # Event and access logs are written behind the caller in batches
+            self.event_writer = self.db.writer('''
+                INSERT INTO security_events (event_type, user_id, description, severity, created_at)
+                VALUES (?, ?, ?, ?, ?)
             ''')
-            
-            # Access logs table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS access_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    resource TEXT,
-                    action TEXT,
-                    result TEXT,
-                    ip_address TEXT,
-                    created_at TEXT
-                )
+            self.access_log_writer = self.db.writer('''
+                INSERT INTO access_logs (user_id, resource, action, result, created_at)
+                VALUES (?, ?, ?, ?, ?)
             ''')
             
-            conn.commit()
-            conn.close()
-            
             self.logger.info("Security database initialized")
             
         except Exception as e:
@@ -409,16 +430,7 @@ class SecurityController:
                           description: str, severity: str = "info"):
         """Log security event"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO security_events (event_type, user_id, description, severity, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (event_type, user_id, description, severity, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
+            self.event_writer.put((event_type, user_id, description, severity, datetime.now().isoformat()))
             
         except Exception as e:
             self.logger.error(f"Error logging security event: {e}")
@@ -451,16 +463,11 @@ class AuthenticationManager:
             salt = os.urandom(32)
             password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000)
             
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO users (username, password_hash, salt, email, role, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (username, password_hash.hex(), salt.hex(), email, role, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO users (username, password_hash, salt, email, role, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (username, password_hash.hex(), salt.hex(), email, role, datetime.now().isoformat()))
             
             self.logger.info(f"User created: {username}")
             return True
@@ -475,63 +482,53 @@ class AuthenticationManager:
     def verify_credentials(self, username: str, password: str) -> Optional[Dict]:
         """Verify user credentials"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, username, password_hash, salt, email, role, failed_attempts, locked_until
-                FROM users WHERE username = ?
-            ''', (username,))
-            
-            user_data = cursor.fetchone()
-            
-            if not user_data:
-                conn.close()
-                return None
-            
-            # Check if account is locked
-            if user_data[7]:  # locked_until
-                locked_until = datetime.fromisoformat(user_data[7])
-                if datetime.now() < locked_until:
-                    conn.close()
-                    return None
-            
-            # Verify password
-            stored_hash = bytes.fromhex(user_data[2])
-            salt = bytes.fromhex(user_data[3])
-            password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000)
-            
-            if password_hash == stored_hash:
-                # Update last login
+            with self.controller.db.cursor() as cursor:
                 cursor.execute('''
-                    UPDATE users SET last_login = ?, failed_attempts = 0, locked_until = NULL
-                    WHERE id = ?
-                ''', (datetime.now().isoformat(), user_data[0]))
+                    SELECT id, username, password_hash, salt, email, role, failed_attempts, locked_until
+                    FROM users WHERE username = ?
+                ''', (username,))
                 
-                conn.commit()
-                conn.close()
+                user_data = cursor.fetchone()
                 
-                return {
-                    'id': user_data[0],
-                    'username': user_data[1],
-                    'email': user_data[4],
-                    'role': user_data[5]
-                }
-            else:
-                # Increment failed attempts
-                failed_attempts = user_data[6] + 1
-                locked_until = None
+                if not user_data:
+                    return None
                 
-                if failed_attempts >= 3:
-                    locked_until = (datetime.now() + timedelta(minutes=15)).isoformat()
+                # Check if account is locked
+                if user_data[7]:  # locked_until
+                    locked_until = datetime.fromisoformat(user_data[7])
+                    if datetime.now() < locked_until:
+                        return None
                 
-                cursor.execute('''
-                    UPDATE users SET failed_attempts = ?, locked_until = ?
-                    WHERE id = ?
-                ''', (failed_attempts, locked_until, user_data[0]))
+                # Verify password
+                stored_hash = bytes.fromhex(user_data[2])
+                salt = bytes.fromhex(user_data[3])
+                password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000)
                 
-                conn.commit()
-                conn.close()
+                if password_hash == stored_hash:
+                    # Update last login
+                    cursor.execute('''
+                        UPDATE users SET last_login = ?, failed_attempts = 0, locked_until = NULL
+                        WHERE id = ?
+                    ''', (datetime.now().isoformat(), user_data[0]))
+                    
+                    return {
+                        'id': user_data[0],
+                        'username': user_data[1],
+                        'email': user_data[4],
+                        'role': user_data[5]
+                    }
+                else:
+                    # Increment failed attempts
+                    failed_attempts = user_data[6] + 1
+                    locked_until = None
+                    
+                    if failed_attempts >= 3:
+                        locked_until = (datetime.now() + timedelta(minutes=15)).isoformat()
+                    
+                    cursor.execute('''
+                        UPDATE users SET failed_attempts = ?, locked_until = ?
+                        WHERE id = ?
+                    ''', (failed_attempts, locked_until, user_data[0]))
                 
                 return None
                 
@@ -720,20 +717,15 @@ class PrivacyManager:
         try:
             cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
             
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            # Delete old security events
-            cursor.execute('DELETE FROM security_events WHERE created_at < ?', (cutoff_date,))
-            
-            # Delete old access logs
-            cursor.execute('DELETE FROM access_logs WHERE created_at < ?', (cutoff_date,))
-            
-            # Delete old sessions
-            cursor.execute('DELETE FROM sessions WHERE created_at < ?', (cutoff_date,))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                # Delete old security events
+                cursor.execute('DELETE FROM security_events WHERE created_at < ?', (cutoff_date,))
+                
+                # Delete old access logs
+                cursor.execute('DELETE FROM access_logs WHERE created_at < ?', (cutoff_date,))
+                
+                # Delete old sessions
+                cursor.execute('DELETE FROM sessions WHERE created_at < ?', (cutoff_date,))
             
             self.logger.info(f"Deleted logs older than {days} days")
             
@@ -775,16 +767,7 @@ class AccessControl:
                           action: str, result: str):
         """Log access attempt"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO access_logs (user_id, resource, action, result, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, resource, action, result, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
+            self.controller.access_log_writer.put((user_id, resource, action, result, datetime.now().isoformat()))
             
         except Exception as e:
             self.logger.error(f"Error logging access attempt: {e}")
@@ -832,16 +815,16 @@ class SecurityMonitor:
             # Check last hour for failed attempts
             hour_ago = (datetime.now() - timedelta(hours=1)).isoformat()
             
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT COUNT(*) FROM security_events 
-                WHERE event_type = 'authentication_failure' AND created_at >= ?
-            ''', (hour_ago,))
+            # Make sure queued events are visible to the count
+            self.controller.event_writer.flush()
             
-            failed_attempts = cursor.fetchone()[0]
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT COUNT(*) FROM security_events 
+                    WHERE event_type = 'authentication_failure' AND created_at >= ?
+                ''', (hour_ago,))
+                
+                failed_attempts = cursor.fetchone()[0]
             
             if failed_attempts > 10:  # Threshold for suspicious activity
                 self.controller.log_security_event(
@@ -881,7 +864,6 @@ class BiometricAuthentication:
         self.controller = security_controller
         self.logger = logging.getLogger(self.__class__.__name__)
         
-        self.face_cascade = None
         self.face_recognizer = None
         self.known_faces = {}
         
@@ -891,11 +873,7 @@ class BiometricAuthentication:
     def _initialize_face_recognition(self):
         """Initialize face recognition components"""
         try:
-            # Load face cascade
-            self.face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
-            
+            # Faces are found by the vision controller's tracker; only recognition happens here
             # Initialize face recognizer
             self.face_recognizer = cv2.face.LBPHFaceRecognizer_create()
             
@@ -907,7 +885,7 @@ class BiometricAuthentication:
     
     def is_available(self) -> bool:
         """Check if biometric authentication is available"""
-        return (self.face_cascade is not None and 
+        return (self.face_recognizer is not None and 
                 hasattr(self.controller.assistant, 'computer_vision') and
                 self.controller.assistant.computer_vision.camera_active)
     
@@ -947,22 +925,13 @@ class BiometricAuthentication:
             if not self.is_available():
                 return False
             
-            # Capture current face
-            current_frame = self.controller.assistant.computer_vision.current_frame
+            # Faces already tracked by the vision pipeline, largest first
+            faces = self.controller.assistant.computer_vision.face_crops()
             
-            if current_frame is None:
+            if not faces:
                 return False
             
-            # Detect faces
-            gray = cv2.cvtColor(current_frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(gray, 1.1, 5)
-            
-            if len(faces) == 0:
-                return False
-            
-            # Use the largest face
-            (x, y, w, h) = max(faces, key=lambda face: face[2] * face[3])
-            face_roi = gray[y:y+h, x:x+w]
+            _, face_roi = faces[0]
             
             # Recognize face
             if self.face_recognizer:
@@ -1002,26 +971,18 @@ class BiometricAuthentication:
                 return samples
             
             cv_controller = self.controller.assistant.computer_vision
+            track_id = None
             
             for i in range(num_samples):
-                # Get current frame
-                current_frame = cv_controller.current_frame
-                
-                if current_frame is None:
-                    time.sleep(0.5)
-                    continue
+                # Faces already tracked by the vision pipeline, largest first
+                faces = cv_controller.face_crops()
                 
-                # Convert to grayscale
-                gray = cv2.cvtColor(current_frame, cv2.COLOR_BGR2GRAY)
+                if track_id is None and faces:
+                    # Follow the largest face, so every sample is the same person
+                    track_id = faces[0][0]
+                face_roi = next((crop for tid, crop in faces if tid == track_id), None)
                 
-                # Detect faces
-                faces = self.face_cascade.detectMultiScale(gray, 1.1, 5)
-                
-                if len(faces) > 0:
-                    # Use the largest face
-                    (x, y, w, h) = max(faces, key=lambda face: face[2] * face[3])
-                    face_roi = gray[y:y+h, x:x+w]
-                    
+                if face_roi is not None:
                     # Resize to standard size
                     face_roi = cv2.resize(face_roi, (200, 200))
                     samples.append(face_roi)
@@ -1060,16 +1021,11 @@ class BiometricAuthentication:
             # Create hash of biometric data for storage
             data_hash = hashlib.sha256(str(data).encode()).hexdigest()
             
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO biometric_data (user_id, biometric_type, data_hash, created_at)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, biometric_type, data_hash, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO biometric_data (user_id, biometric_type, data_hash, created_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (user_id, biometric_type, data_hash, datetime.now().isoformat()))
             
         except Exception as e:
             self.logger.error(f"Error saving biometric data: {e}")
@@ -1092,15 +1048,12 @@ class BiometricAuthentication:
     def _get_user_by_id(self, user_id: int) -> Optional[Dict]:
         """Get user information by ID"""
         try:
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, username, email, role FROM users WHERE id = ?
-            ''', (user_id,))
-            
-            user_data = cursor.fetchone()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT id, username, email, role FROM users WHERE id = ?
+                ''', (user_id,))
+                
+                user_data = cursor.fetchone()
             
             if user_data:
                 return {
@@ -1133,16 +1086,11 @@ class SessionManager:
             session_id = hashlib.sha256(f"{user_id}_{time.time()}".encode()).hexdigest()
             expires_at = (datetime.now() + timedelta(minutes=SECURITY_CONFIG["session_timeout"])).isoformat()
             
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO sessions (session_id, user_id, created_at, expires_at, last_activity)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (session_id, user_id, datetime.now().isoformat(), expires_at, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO sessions (session_id, user_id, created_at, expires_at, last_activity)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (session_id, user_id, datetime.now().isoformat(), expires_at, datetime.now().isoformat()))
             
             self.current_session_id = session_id
             self.logger.info(f"Session created: {session_id}")
@@ -1159,15 +1107,10 @@ class SessionManager:
             if not self.current_session_id:
                 return
             
-            conn = sqlite3.connect(self.controller.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                UPDATE sessions SET is_active = 0 WHERE session_id = ?
-            ''', (self.current_session_id,))
-            
-            conn.commit()
-            conn.close()
+            with self.controller.db.cursor() as cursor:
+                cursor.execute('''
+                    UPDATE sessions SET is_active = 0 WHERE session_id = ?
+                ''', (self.current_session_id,))
             
             self.logger.info(f"Session ended: {self.current_session_id}")
             self.current_session_id = None
@@ -1191,16 +1134,11 @@ class SessionManager:
                 # Clean up expired sessions
                 current_time = datetime.now().isoformat()
                 
-                conn = sqlite3.connect(self.controller.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    UPDATE sessions SET is_active = 0 
-                    WHERE expires_at < ? AND is_active = 1
-                ''', (current_time,))
-                
-                conn.commit()
-                conn.close()
+                with self.controller.db.cursor() as cursor:
+                    cursor.execute('''
+                        UPDATE sessions SET is_active = 0 
+                        WHERE expires_at < ? AND is_active = 1
+                    ''', (current_time,))
                 
                 time.sleep(300)  # Check every 5 minutes
                 
@@ -0,0 +1,183 @@
+"""
+Enhanced SAM AI Assistant - Vision detectors, in-process or in worker processes
+"""
+import logging
+import multiprocessing as mp
+import threading
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable
+
+import cv2
+import numpy as np
+
+# Results are compact arrays rather than MediaPipe objects, so they cost
+# next to nothing to send back from a worker process:
+#   faces -> int32   (n, 4)   x, y, w, h in input pixels
+#   hands -> float32 (n, 21, 3) normalized landmarks
+#   pose  -> float32 (33, 4)  normalized landmarks + visibility, or (0, 4)
+EMPTY_FACES = np.zeros((0, 4), np.int32)
+EMPTY_HANDS = np.zeros((0, 21, 3), np.float32)
+EMPTY_POSE = np.zeros((0, 4), np.float32)
+
+
+def _face_detector() -> Callable[[np.ndarray], np.ndarray]:
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+
+    def detect(gray: np.ndarray, min_size: int = 30) -> np.ndarray:
+        faces = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_size, min_size))
+        return np.asarray(faces, np.int32).reshape(-1, 4) if len(faces) else EMPTY_FACES
+    return detect
+
+
+def _hand_detector() -> Callable[[np.ndarray], np.ndarray]:
+    import mediapipe
+    hands = mediapipe.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=2,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.5
+    )
+
+    def detect(rgb: np.ndarray) -> np.ndarray:
+        results = hands.process(rgb)
+        if not results.multi_hand_landmarks:
+            return EMPTY_HANDS
+        return np.array(
+            [[[p.x, p.y, p.z] for p in hand.landmark] for hand in results.multi_hand_landmarks], np.float32
+        )
+    return detect
+
+
+def _pose_detector() -> Callable[[np.ndarray], np.ndarray]:
+    import mediapipe
+    pose = mediapipe.solutions.pose.Pose(
+        static_image_mode=False,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.5
+    )
+
+    def detect(rgb: np.ndarray) -> np.ndarray:
+        results = pose.process(rgb)
+        if not results.pose_landmarks:
+            return EMPTY_POSE
+        return np.array([[p.x, p.y, p.z, p.visibility] for p in results.pose_landmarks.landmark], np.float32)
+    return detect
+
+
+DETECTORS: Dict[str, Callable[[], Callable]] = {
+    "faces": _face_detector,
+    "hands": _hand_detector,
+    "pose": _pose_detector,
+}
+
+
+def _worker_main(name: str, shm_name: str, conn):
+    """Worker process: run one detector on frames the parent places in shared memory"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        detect = DETECTORS[name]()
+        conn.send(("ready", None))
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            seq, shape, dtype, kwargs = message
+            frame = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+            try:
+                conn.send((seq, detect(frame, **kwargs)))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+            del frame
+    except (EOFError, KeyboardInterrupt):
+        pass
+    except Exception as e:
+        try:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+        except Exception:
+            pass
+    finally:
+        shm.close()
+
+
+class ProcessDetector:
+    """Runs one detector in its own process, outside this process's GIL.
+
+    Each call copies the (already downscaled) input into a shared-memory
+    buffer, which the worker wraps without copying, and waits for the
+    compact result array. One call is in flight at a time, which is all
+    a VisionPipeline stage ever issues.
+    """
+
+    def __init__(self, name: str, max_bytes: int, start_timeout: float = 60.0):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.name = name
+        # spawn: MediaPipe and OpenCV threads do not survive fork()
+        context = mp.get_context("spawn")
+        self.shm = shared_memory.SharedMemory(create=True, size=max_bytes)
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(name, self.shm.name, child), name=f"vision-{name}", daemon=True
+        )
+        self.process.start()
+        child.close()
+        self._lock = threading.Lock()
+        self._seq = 0
+        if not self.conn.poll(start_timeout):
+            self.close()
+            raise RuntimeError(f"Vision worker '{name}' did not start")
+        status, error = self.conn.recv()
+        if status != "ready":
+            self.close()
+            raise RuntimeError(f"Vision worker '{name}' failed to start: {error}")
+
+    def __call__(self, image: np.ndarray, **kwargs) -> np.ndarray:
+        if image.nbytes > self.shm.size:
+            raise ValueError(f"{image.shape} frame exceeds the {self.shm.size} byte buffer of '{self.name}'")
+        with self._lock:
+            np.ndarray(image.shape, image.dtype, buffer=self.shm.buf)[...] = image
+            self._seq += 1
+            try:
+                self.conn.send((self._seq, image.shape, image.dtype.str, kwargs))
+                seq, result = self.conn.recv()
+            except (EOFError, OSError) as e:
+                raise RuntimeError(f"Vision worker '{self.name}' exited") from e
+        if seq == "error":
+            raise RuntimeError(result)
+        return result
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout=2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.shm.close()
+        self.shm.unlink()
+
+
+def create_detectors(names: Iterable[str], processes: bool = False,
+                     max_frame_bytes: int = 1280 * 720 * 3) -> Dict[str, Callable]:
+    """Detector callables by name, in worker processes when ``processes`` is set.
+
+    A detector whose worker fails to start runs in-process instead.
+    """
+    logger = logging.getLogger("VisionWorkers")
+    detectors = {}
+    for name in names:
+        if processes:
+            try:
+                detectors[name] = ProcessDetector(name, max_frame_bytes)
+                continue
+            except Exception as e:
+                logger.warning(f"Running '{name}' in-process: {e}")
+        detectors[name] = DETECTORS[name]()
+    return detectors
+
+
+def close_detectors(detectors: Dict[str, Callable]):
+    for detector in detectors.values():
+        if isinstance(detector, ProcessDetector):
+            detector.close()
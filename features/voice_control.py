@@ -5,7 +5,6 @@ import asyncio
 import threading
 import queue
 import speech_recognition as sr
-import pyttsx3
 import numpy as np
 from typing import Optional, Callable, Dict, List
 import logging
@@ -13,6 +12,11 @@ import time
 import re
 
 from core.base_assistant import BaseAssistant
+from core.interfaces import STTError
+from core.stt.router import STTRouter
+from core.pipeline import CommandPipeline, Stage, current_job
+from core.streaming import SentenceBuffer
+from core.tts import get_tts_service
 from config.settings import VOICE_CONFIG
 from config.settings import AI_CONFIG
 
@@ -27,9 +31,12 @@ class VoiceController:
         self.recognizer = sr.Recognizer()
         self.microphone = sr.Microphone()
         self.audio_queue = queue.Queue()
+        self.stt = STTRouter.from_config()
         
-        # Text-to-speech
-        self.tts_engine = pyttsx3.init()
+        # Text-to-speech, shared with the rest of the process and never
+        # blocking the caller (or the event loop)
+        self.tts = get_tts_service()
+        self.tts.add_listener(self._on_speaking_changed)
         self.setup_tts()
         
         # Voice processing
@@ -39,6 +46,15 @@ class VoiceController:
         self.conversation_mode = False
         # Event loop reference (set when listening starts)
         self.loop = None
+        # Bounded recognition and command workers instead of a thread per chunk
+        self.pipeline = CommandPipeline(
+            [
+                Stage("stt", self._recognize_audio, workers=2, queue_size=4),
+                Stage("command", self._command_stage, workers=1, queue_size=4),
+            ],
+            max_inflight=8,
+            name="voice",
+        )
         
         # Multi-language support
         self.supported_languages = {
@@ -67,15 +83,17 @@ class VoiceController:
     def setup_tts(self):
         """Setup text-to-speech engine"""
         try:
-            voices = self.tts_engine.getProperty('voices')
-            if voices and len(voices) > VOICE_CONFIG["voice_id"]:
-                self.tts_engine.setProperty('voice', voices[VOICE_CONFIG["voice_id"]].id)
-            
-            self.tts_engine.setProperty('rate', VOICE_CONFIG["tts_rate"])
-            self.tts_engine.setProperty('volume', VOICE_CONFIG["tts_volume"])
+            self.tts.configure(
+                voice_index=VOICE_CONFIG["voice_id"],
+                rate=VOICE_CONFIG["tts_rate"],
+                volume=VOICE_CONFIG["tts_volume"],
+            )
             
         except Exception as e:
             self.logger.error(f"Error setting up TTS: {e}")
+
+    def _on_speaking_changed(self, speaking: bool):
+        self.assistant.state.is_speaking = speaking
     
     def setup_voice_recognition(self):
         """Setup speech recognition with calibration"""
@@ -173,6 +191,9 @@ class VoiceController:
             # Fallback if called outside an event loop; will be set later when available
             self.loop = None
         
+        # Recognition and commands run on the assistant's loop when there is one
+        self.pipeline.start(self.loop)
+
         # Start background listening thread
         self.listen_thread = threading.Thread(target=self._listen_continuously, daemon=True)
         self.listen_thread.start()
@@ -201,12 +222,9 @@ class VoiceController:
                         phrase_time_limit=10
                     )
                 
-                # Process audio in background
-                threading.Thread(
-                    target=self._process_audio, 
-                    args=(audio,), 
-                    daemon=True
-                ).start()
+                # Process audio on the bounded STT workers
+                if self.pipeline.submit("stt", audio) is None:
+                    self.logger.warning("Speech pipeline is full; dropping audio chunk")
                 
             except sr.WaitTimeoutError:
                 continue
@@ -214,14 +232,27 @@ class VoiceController:
                 self.logger.error(f"Error in continuous listening: {e}")
                 time.sleep(1)
     
+    def _recognize_audio(self, job, audio):
+        """Pipeline "stt" stage"""
+        self._process_audio(audio)
+        return None
+
+    async def _command_stage(self, job, text: str):
+        """Pipeline "command" stage"""
+        await self._process_command(text)
+        return None
+
     def _process_audio(self, audio):
         """Process audio input"""
         try:
-            # Recognize speech
-            text = self.recognizer.recognize_google(
-                audio, 
-                language=self.current_language
+            # Recognize speech with the engine configured for this language
+            text = self.stt.transcribe(
+                audio.get_raw_data(convert_width=2),
+                audio.sample_rate,
+                language=self.current_language,
             ).lower()
+            if not text:
+                raise sr.UnknownValueError()
             
             self.logger.info(f"Recognized: {text}")
             self.assistant.update_activity()
@@ -235,22 +266,10 @@ class VoiceController:
                 else:
                     return
             
-            # Process command
-            # Schedule the coroutine on the main event loop from this background thread
-            try:
-                if self.loop is None:
-                    # Attempt to get a running loop again if not set
-                    try:
-                        self.loop = asyncio.get_running_loop()
-                    except RuntimeError:
-                        self.loop = None
-                if self.loop:
-                    asyncio.run_coroutine_threadsafe(self._process_command(text), self.loop)
-                else:
-                    # As a last resort, run the coroutine in a new event loop (blocking)
-                    asyncio.run(self._process_command(text))
-            except Exception as e:
-                self.logger.error(f"Error scheduling command processing: {e}")
+            # Process command; a new utterance supersedes one still in progress
+            if self.pipeline.submit("command", text, supersede="command") is None:
+                self.logger.warning("Command pipeline is full; dropping command")
+                self.speak("I'm still working on your earlier requests.")
             
             # Reset wake word detection after processing
             if not self.conversation_mode:
@@ -260,7 +279,7 @@ class VoiceController:
             if self.wake_word_detected or self.conversation_mode:
                 self.speak("I didn't understand that. Could you repeat?")
                 self.wake_word_detected = False
-        except sr.RequestError as e:
+        except STTError as e:
             self.logger.error(f"Speech recognition error: {e}")
             self.speak("Sorry, I'm having trouble with speech recognition.")
     
@@ -310,6 +329,7 @@ class VoiceController:
             # Fall back to echo if LLM not available
             if not getattr(self.assistant, "llm", None):
                 response = f"You said: {text}. (LLM is not configured)"
+                self.speak(response)
             else:
                 context = self.assistant.get_context()
                 memories = []
@@ -318,24 +338,57 @@ class VoiceController:
                 except Exception:
                     memories = []
 
-                # Run generation in a thread so we don't block the event loop
-                response = await asyncio.to_thread(
-                    self.assistant.llm.generate_response,
+                # Speech starts at the first complete sentence of the stream
+                response = await self._stream_and_speak(text, context, memories)
+
+            # Record
+            self.assistant.add_to_conversation("assistant", response)
+            
+        except Exception as e:
+            self.logger.error(f"Error handling general query: {e}")
+            self.speak("I'm sorry, I couldn't process that request.")
+
+    async def _stream_and_speak(self, text: str, context: Optional[str], memories: List[str]) -> str:
+        """Stream an LLM reply and start speaking at the first sentence boundary"""
+        sentences: queue.Queue = queue.Queue()
+
+        job = current_job()
+
+        def produce() -> str:
+            buffer = SentenceBuffer()
+            parts = []
+            try:
+                for chunk in self.assistant.llm.stream_response(
                     user_text=text,
                     context=context,
                     persona=AI_CONFIG.get("personality"),
                     memories=memories,
                     max_tokens=AI_CONFIG.get("max_tokens", 512),
                     temperature=AI_CONFIG.get("temperature", 0.7),
-                )
+                ):
+                    if job is not None and job.cancelled:
+                        break  # superseded by a newer command
+                    parts.append(chunk)
+                    for sentence in buffer.feed(chunk):
+                        sentences.put(sentence)
+                rest = buffer.flush()
+                if rest:
+                    sentences.put(rest)
+            finally:
+                sentences.put(None)
+            return "".join(parts)
 
-            # Speak and record
-            self.speak(response)
-            self.assistant.add_to_conversation("assistant", response)
-            
-        except Exception as e:
-            self.logger.error(f"Error handling general query: {e}")
-            self.speak("I'm sorry, I couldn't process that request.")
+        def speak_all():
+            while True:
+                sentence = sentences.get()
+                if sentence is None:
+                    return
+                if job is None or not job.cancelled:
+                    self.speak(sentence)
+
+        # Generation and speech run side by side, off the event loop
+        response, _ = await asyncio.gather(asyncio.to_thread(produce), asyncio.to_thread(speak_all))
+        return response
 
     def remember_that(self, text: str):
         """Store a memory from a voice command like 'remember that ...'"""
@@ -372,18 +425,11 @@ class VoiceController:
     
     def speak(self, text: str, interrupt: bool = False):
         """Text-to-speech with queue management"""
-        if interrupt:
-            self.tts_engine.stop()
-        
-        self.assistant.state.is_speaking = True
-        
         try:
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
+            # Queued on the TTS worker; dropped if the current command is superseded
+            self.tts.speak(text, interrupt=interrupt, job=current_job())
         except Exception as e:
             self.logger.error(f"TTS error: {e}")
-        finally:
-            self.assistant.state.is_speaking = False
     
     def change_language(self, text: str):
         """Change voice recognition language"""
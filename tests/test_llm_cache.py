@@ -0,0 +1,42 @@
+"""
+Near-duplicate lookups in the LLM response cache
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.llm_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(tmp_path / "llm_cache.db", near_duplicate_threshold=0.6)
+
+
+def test_exact_prompt_hits(cache):
+    cache.put("Convert 100 USD to EUR?", "92 EUR")
+    assert cache.get("convert 100 usd  to eur") == "92 EUR"
+
+
+def test_filler_words_still_match(cache):
+    cache.put("what is the weather in paris", "Sunny")
+    assert cache.get("whats the weather in paris please") == "Sunny"
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("convert 100 usd to eur", "convert 100 eur to usd"),
+    ("who is taller than bob", "bob is taller than who"),
+    ("turn the lights on", "turn the lights off"),
+])
+def test_reordered_or_flipped_prompts_miss(cache, cached, asked):
+    cache.put(cached, "cached reply")
+    assert cache.get(asked) is None
+
+
+def test_near_duplicates_off_by_default(tmp_path):
+    cache = ResponseCache(tmp_path / "llm_cache.db")
+    cache.put("what is the weather in paris", "Sunny")
+    assert cache.get("whats the weather in paris please") is None